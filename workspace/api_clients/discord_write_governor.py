@@ -0,0 +1,204 @@
+# api_clients/discord_write_governor.py
+import asyncio
+import heapq
+import itertools
+from collections import Counter
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class WritePriority(IntEnum):
+    """
+    Discordへの書き込みの優先度 (値が小さいほど優先される)
+    """
+
+    INTERACTION = 0  # インタラクションへの応答
+    EMBED_EDIT = 1  # 募集Embedの編集
+    ROLE_EDIT = 2  # 定期実行によるロール付与・剥奪
+    DM = 3  # DMでの通知
+
+
+# この優先度以上の書き込みはバックグラウンド扱いとし、予約枠を使わせない
+BACKGROUND_PRIORITY = WritePriority.ROLE_EDIT
+
+
+def channel_bucket(channel_id: int) -> str:
+    """メッセージ送信・編集のバケット (Discordのレート制限はチャンネル単位)"""
+    return f"channel:{channel_id}"
+
+
+def member_roles_bucket(guild_id: int) -> str:
+    """メンバーのロール変更のバケット (Discordのレート制限はギルド単位)"""
+    return f"guild:{guild_id}:member_roles"
+
+
+def dm_bucket(user_id: object) -> str:
+    """DM送信のバケット (Discordのレート制限はDMチャンネル単位)"""
+    return f"dm:{user_id}"
+
+
+def interaction_bucket(interaction_id: int) -> str:
+    """インタラクション応答のバケット (応答はインタラクションのトークン単位)"""
+    return f"interaction:{interaction_id}"
+
+
+class _Bucket:
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # 実行中・待機中の書き込みの数 (0になったらバケットを破棄する)
+        self.users = 0
+
+
+class DiscordWriteGovernor:
+    """
+    Discord REST APIへの書き込みを優先度付きで調停するクラス
+
+    全体の同時実行数を制限しつつ、一部の枠をEmbed編集用に予約しておくことで、
+    大量のロール更新中でも募集操作の反映が遅れないようにする。
+    インタラクション応答は3秒以内に返す必要があり、グローバルのレート制限の対象外のため
+    全体の枠を使わない (429で待機中のEmbed編集が枠を埋めていても応答が遅れないように)。
+    同じバケット(レート制限の単位)への書き込みはバケットごとの同時実行数に制限する。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        reserved_foreground: int = 1,
+        bucket_concurrency: int = 1,
+    ):
+        if max_concurrency <= reserved_foreground:
+            raise ValueError("max_concurrency must be greater than reserved_foreground")
+        self.max_concurrency = max_concurrency
+        self.reserved_foreground = reserved_foreground
+        self.bucket_concurrency = bucket_concurrency
+
+        self._seq = itertools.count()
+        # (優先度, 到着順, Future) の最小ヒープ
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        # 使用中のバケットのみ保持する (DMなどユーザー単位のバケットで増え続けないように)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._active = 0
+        self._active_background = 0
+        self._active_interaction = 0
+
+        # メトリクス
+        self._queue_depth: Counter = Counter()
+        self._completed: Counter = Counter()
+        self._failed: Counter = Counter()
+
+    def _can_run(self, priority: int) -> bool:
+        if self._active >= self.max_concurrency:
+            return False
+        if priority >= BACKGROUND_PRIORITY:
+            background_limit = self.max_concurrency - self.reserved_foreground
+            return self._active_background < background_limit
+        return True
+
+    def _take(self, priority: int):
+        self._active += 1
+        if priority >= BACKGROUND_PRIORITY:
+            self._active_background += 1
+
+    def _release(self, priority: int):
+        self._active -= 1
+        if priority >= BACKGROUND_PRIORITY:
+            self._active_background -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """
+        空き枠があれば、優先度の高い待機者から順に実行を許可する
+        """
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                self._queue_depth[priority] -= 1
+                continue
+            if not self._can_run(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._queue_depth[priority] -= 1
+            self._take(priority)
+            future.set_result(None)
+
+    async def _acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._queue_depth[priority] += 1
+        self._wake_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 枠を割り当てられた直後にキャンセルされた場合は枠を返却する
+            if future.done() and not future.cancelled():
+                self._release(priority)
+            raise
+
+    async def submit(
+        self,
+        priority: WritePriority,
+        bucket: str,
+        factory: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        書き込み処理を優先度キューに投入し、実行結果を返す
+
+        Args:
+            priority (WritePriority): 書き込みの優先度
+            bucket (str): レート制限の単位を表すキー (channel_bucket()等で生成)
+            factory (Callable): 実行時に呼び出されるコルーチン関数
+        """
+        state = self._buckets.get(bucket)
+        if state is None:
+            state = self._buckets[bucket] = _Bucket(self.bucket_concurrency)
+        state.users += 1
+        try:
+            # バケットの待機中はグローバルの枠を消費しない
+            async with state.semaphore:
+                if priority == WritePriority.INTERACTION:
+                    result = await self._run_interaction(priority, factory)
+                else:
+                    await self._acquire(priority)
+                    try:
+                        result = await factory()
+                    except Exception:
+                        self._failed[priority] += 1
+                        raise
+                    finally:
+                        self._release(priority)
+        finally:
+            state.users -= 1
+            if state.users == 0:
+                del self._buckets[bucket]
+        self._completed[priority] += 1
+        return result
+
+    async def _run_interaction(
+        self, priority: WritePriority, factory: Callable[[], Awaitable[T]]
+    ) -> T:
+        # 全体の枠を待たずに実行する (同時実行数は別に数える)
+        self._active_interaction += 1
+        try:
+            return await factory()
+        except Exception:
+            self._failed[priority] += 1
+            raise
+        finally:
+            self._active_interaction -= 1
+
+    def metrics(self) -> dict:
+        """
+        キューの深さなどの統計情報を返す
+        """
+        return {
+            "queue_depth": {p.name: self._queue_depth[p] for p in WritePriority},
+            "in_flight": self._active,
+            "in_flight_background": self._active_background,
+            "in_flight_interaction": self._active_interaction,
+            "buckets": len(self._buckets),
+            "completed": {p.name: self._completed[p] for p in WritePriority},
+            "failed": {p.name: self._failed[p] for p in WritePriority},
+        }
@@ -1,60 +1,94 @@
 # cogs/recruitment_cog.py
 
-from typing import List, Optional
+from typing import List, Optional, Union
+from uuid import UUID
 import discord
 from discord import app_commands
 from discord.ext import commands
 from functools import partial
 
+from api_clients.discord_write_governor import WritePriority, channel_bucket
+
 # 【↓修正点↓】Recruitmentモデルをインポート
 from db.recruitment_repository import Recruitment
-from services.recruitment_service import RecruitmentService
+from services.dm_notifier import DeliveryReport
+from services.recruitment_service import JST, RecruitmentService
 from views.recruitment_modal import RecruitmentModal
-from views.recruitment_view import RecruitmentView
+from views.recruitment_view import RecruitmentView, build_recruitment_embed
 
 
 class RecruitmentCog(commands.Cog):
     """
-    募集関連のコマンド (/joinus, /cancel, /edit) を管理するCog
+    募集関連のコマンド (/joinus, /cancel, /edit, /list) を管理するCog
     """
 
+    # /list の1ページあたりの表示件数
+    LIST_PAGE_SIZE = 10
+
     def __init__(self, bot: commands.Bot, recruitment_service: RecruitmentService):
         self.bot = bot
         self.recruitment_service = recruitment_service
 
-    def _build_recruitment_embed(
-        self, recruitment: dict, participants: List[discord.User]
-    ) -> discord.Embed:
-        participant_mentions = [p.mention for p in participants]
-        remaining_count = recruitment["max_participants"] - len(participants)
+    async def cog_load(self):
+        # 締切タイマーを開始する (募集中の募集は起動時にsetup_hookで登録済み)
+        expiry_scheduler = self.recruitment_service.expiry_scheduler
+        if expiry_scheduler is None:
+            return
+        expiry_scheduler.start(self.on_recruitment_expired)
+        print(f"Scheduled {len(expiry_scheduler)} recruitment deadline(s).")
+
+    async def cog_unload(self):
+        if self.recruitment_service.expiry_scheduler:
+            self.recruitment_service.expiry_scheduler.stop()
+
+    def _recruitment_message(
+        self, recruitment: Recruitment, fallback_channel_id: Optional[int] = None
+    ) -> Optional[discord.PartialMessage]:
+        """
+        募集メッセージを取得せずに編集するためのPartialMessageを返す
+        チャンネルIDを保存する前の募集は fallback_channel_id のチャンネルにあるものとみなす
+        """
+        channel_id = recruitment.channel_id or fallback_channel_id
+        if not channel_id:
+            return None
+        channel = self.bot.get_partial_messageable(int(channel_id))
+        return channel.get_partial_message(int(recruitment.message_id))
+
+    async def on_recruitment_expired(self, recruitment_id: UUID):
+        """
+        締切時刻を迎えた募集を締め切り、メッセージのボタンを無効化する
+        """
+        # 締め切るとキャッシュから外れるため、参加者は先に取得しておく
+        participant_ids = self.recruitment_service.get_participant_ids(recruitment_id)
+        recruitment = self.recruitment_service.expire_recruitment(recruitment_id)
+        if not recruitment:
+            return
+        original_message = self._recruitment_message(recruitment)
+        if original_message is None:
+            print(f"Channel for recruitment {recruitment.id} is unknown.")
+            return
 
-        embed = discord.Embed(
-            title=f"【募集中】VALORANT @{recruitment['max_participants']}",
-            description=f"**{recruitment['party_type']}** で参加者を募集しています！",
-            color=discord.Color.green(),
-        )
-        embed.add_field(
-            name="募集主", value=f"<@{recruitment['creator_id']}>", inline=False
-        )
-        embed.add_field(
-            name="締切",
-            value=f"<t:{int(recruitment['deadline'].timestamp())}:R>",
-            inline=False,
-        )
-        embed.add_field(
-            name="残り人数",
-            value=f"あと {remaining_count}人" if remaining_count > 0 else "満員",
-            inline=False,
-        )
-        embed.add_field(
-            name=f"現在の参加者 ({len(participants)}/{recruitment['max_participants']})",
-            value=", ".join(participant_mentions)
-            if participant_mentions
-            else "まだいません",
-            inline=False,
-        )
-        embed.set_footer(text=f"Recruitment ID | {recruitment['id']}")
-        return embed
+        try:
+            closed_embed = build_recruitment_embed(
+                recruitment.model_dump(), participant_ids
+            )
+            closed_embed.title = f"【募集終了】VALORANT @{recruitment.max_participants}"
+            closed_embed.description = (
+                f"**{recruitment.party_type}** の募集は締め切られました。"
+            )
+            closed_embed.color = discord.Color.dark_grey()
+
+            view = RecruitmentView(recruitment.id, closed=True)
+
+            await self.bot.write_governor.submit(
+                WritePriority.EMBED_EDIT,
+                channel_bucket(original_message.channel.id),
+                lambda: original_message.edit(embed=closed_embed, view=view),
+            )
+        except discord.NotFound:
+            print(f"Original message for recruitment {recruitment.id} not found.")
+        except Exception as e:
+            print(f"Error editing message for expiry: {e}")
 
     async def on_modal_submit(
         self,
@@ -76,12 +110,22 @@ class RecruitmentCog(commands.Cog):
             )
             return
 
+        async def publish(
+            recruitment: Recruitment, participant_ids: List[str]
+        ) -> discord.Message:
+            embed = build_recruitment_embed(
+                recruitment.model_dump(), participant_ids
+            )
+            view = RecruitmentView(recruitment.id)
+            return await interaction.channel.send(embed=embed, view=view)
+
         recruitment, message = await self.recruitment_service.create_recruitment(
             interaction=interaction,
             party_type=party_type,
             needed_count=needed_count,
             deadline_str=deadline_str,
             other_members=other_members,
+            publish=publish,
         )
 
         if not recruitment:
@@ -90,23 +134,6 @@ class RecruitmentCog(commands.Cog):
             )
             return
 
-        recruitment_channel = interaction.channel
-
-        initial_participants = {interaction.user} | set(other_members)
-        if isinstance(interaction.user, discord.Member) and interaction.user.voice:
-            initial_participants.update(interaction.user.voice.channel.members)
-
-        embed = self._build_recruitment_embed(
-            recruitment.model_dump(), list(initial_participants)
-        )
-        view = RecruitmentView(self.recruitment_service)
-
-        sent_message = await recruitment_channel.send(embed=embed, view=view)
-
-        self.recruitment_service.recruitment_repo.update_recruitment(
-            recruitment.id, {"message_id": str(sent_message.id)}
-        )
-
         await interaction.followup.send("募集を開始しました！", ephemeral=True)
 
     async def on_edit_modal_submit(
@@ -114,13 +141,14 @@ class RecruitmentCog(commands.Cog):
         interaction: discord.Interaction,
         recruitment: Recruitment,
         party_type: str,
-        max_participants_str: str,
+        needed_count_str: str,
         deadline_str: str,
     ):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            max_participants = int(max_participants_str)
+            # 編集モーダルでは人数の欄を募集定員(合計人数)として使う
+            max_participants = int(needed_count_str)
             if max_participants <= 0:
                 raise ValueError
         except ValueError:
@@ -134,8 +162,9 @@ class RecruitmentCog(commands.Cog):
             "max_participants": max_participants,
             "deadline_str": deadline_str,
         }
-        updated_recruitment, message = self.recruitment_service.edit_recruitment(
-            recruitment.id, updates
+        ctx = self.recruitment_service.new_context()
+        updated_recruitment, message = await self.recruitment_service.edit_recruitment(
+            recruitment.id, updates, ctx
         )
 
         if not updated_recruitment:
@@ -145,20 +174,26 @@ class RecruitmentCog(commands.Cog):
             return
 
         try:
-            channel = await self.bot.fetch_channel(interaction.channel_id)
-            original_message = await channel.fetch_message(int(recruitment.message_id))
-
-            participants = self.recruitment_service.participant_repo.get_participants_by_recruitment_id(
-                recruitment.id
+            original_message = self._recruitment_message(
+                updated_recruitment, interaction.channel_id
             )
-            participant_users = [
-                await self.bot.fetch_user(int(p.user_id)) for p in participants
-            ]
 
-            new_embed = self._build_recruitment_embed(
-                updated_recruitment.model_dump(), participant_users
+            participant_ids = self.recruitment_service.get_participant_ids(
+                recruitment.id, ctx
+            )
+            new_embed = build_recruitment_embed(
+                updated_recruitment.model_dump(), participant_ids
+            )
+            # 定員の変更で満員になった(なくなった)場合に備えてボタンも更新する
+            view = RecruitmentView(
+                updated_recruitment.id,
+                full=len(participant_ids) >= updated_recruitment.max_participants,
+            )
+            await self.bot.write_governor.submit(
+                WritePriority.EMBED_EDIT,
+                channel_bucket(original_message.channel.id),
+                lambda: original_message.edit(embed=new_embed, view=view),
             )
-            await original_message.edit(embed=new_embed)
         except Exception as e:
             print(f"Error editing message for edit: {e}")
 
@@ -190,7 +225,9 @@ class RecruitmentCog(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         recruitment, participant_ids, message = (
-            self.recruitment_service.cancel_recruitment(str(interaction.user.id))
+            self.recruitment_service.cancel_recruitment(
+                str(interaction.user.id), self.recruitment_service.new_context()
+            )
         )
 
         if not recruitment:
@@ -198,8 +235,9 @@ class RecruitmentCog(commands.Cog):
             return
 
         try:
-            channel = await self.bot.fetch_channel(interaction.channel_id)
-            original_message = await channel.fetch_message(int(recruitment.message_id))
+            original_message = self._recruitment_message(
+                recruitment, interaction.channel_id
+            )
 
             cancelled_embed = discord.Embed(
                 title="【募集キャンセル】",
@@ -208,38 +246,66 @@ class RecruitmentCog(commands.Cog):
             )
             cancelled_embed.set_footer(text=f"Recruitment ID | {recruitment.id}")
 
-            await original_message.edit(embed=cancelled_embed, view=None)
+            await self.bot.write_governor.submit(
+                WritePriority.EMBED_EDIT,
+                channel_bucket(original_message.channel.id),
+                lambda: original_message.edit(embed=cancelled_embed, view=None),
+            )
 
         except discord.NotFound:
             print(f"Original message for recruitment {recruitment.id} not found.")
         except Exception as e:
             print(f"Error editing message for cancellation: {e}")
 
-        if participant_ids:
-            notification_message = f"募集主 <@{recruitment.creator_id}> によって募集がキャンセルされました。"
-            for user_id in participant_ids:
-                if user_id == str(interaction.user.id):
-                    continue
-                try:
-                    member = await self.bot.fetch_user(int(user_id))
-                    await member.send(notification_message)
-                except Exception as e:
-                    print(f"Failed to send DM to {user_id}: {e}")
-
         await interaction.followup.send(message, ephemeral=True)
 
+        # 参加者への通知は応答の後にバックグラウンドで並行して送る
+        notify_ids = [u for u in participant_ids if u != str(interaction.user.id)]
+        if notify_ids:
+            self.bot.dm_notifier.dispatch(
+                notify_ids,
+                f"募集主 <@{recruitment.creator_id}> によって募集がキャンセルされました。",
+                label=f"cancel {recruitment.id}",
+                on_complete=partial(self._report_undelivered, interaction),
+            )
+
+    async def _report_undelivered(
+        self, interaction: discord.Interaction, report: DeliveryReport
+    ):
+        """
+        キャンセルの通知を届けられなかった参加者を募集主に伝える
+        """
+        if not report.undelivered:
+            return
+        mentions = ", ".join(f"<@{user_id}>" for user_id in report.undelivered)
+        await interaction.followup.send(
+            f"次の参加者にはDMでキャンセルを通知できませんでした: {mentions}",
+            ephemeral=True,
+        )
+
     @app_commands.command(
         name="edit", description="自身が開始した募集内容を編集します。"
     )
     async def edit(self, interaction: discord.Interaction):
-        recruitment = self.recruitment_service.recruitment_repo.get_open_recruitment_by_creator_id(
-            str(interaction.user.id)
+        # モーダルは応答そのものなので、募集の取得はキャッシュ優先・時間制限付きで行う
+        # (キャッシュはイベントループ上で参照し、DBへの問い合わせだけをスレッドで行う)
+        creator_id = str(interaction.user.id)
+        recruitment_repo = self.recruitment_service.recruitment_repo
+        await self.bot.interaction_responder.send_modal(
+            interaction,
+            "recruitment_edit",
+            partial(recruitment_repo.query_open_recruitment_by_creator_id, creator_id),
+            self._build_edit_modal,
+            cached=recruitment_repo.get_cached_open_recruitment_by_creator_id(
+                creator_id
+            ),
         )
+
+    def _build_edit_modal(
+        self, recruitment: Optional[Recruitment]
+    ) -> Union[RecruitmentModal, str]:
         if not recruitment:
-            await interaction.response.send_message(
-                "あなたが編集できる募集中(open)の募集はありません。", ephemeral=True
-            )
-            return
+            return "あなたが編集できる募集中(open)の募集はありません。"
 
         callback = partial(self.on_edit_modal_submit, recruitment=recruitment)
 
@@ -248,11 +314,59 @@ class RecruitmentCog(commands.Cog):
         modal.party_type.default = recruitment.party_type
         modal.needed_count.label = "募集定員（合計人数）"
         modal.needed_count.default = str(recruitment.max_participants)
-        modal.deadline_str.default = recruitment.deadline.astimezone(
-            self.recruitment_service.JST
-        ).strftime("%H:%M")
+        modal.deadline_str.default = recruitment.deadline.astimezone(JST).strftime(
+            "%H:%M"
+        )
+        return modal
 
-        await interaction.response.send_modal(modal)
+    @app_commands.command(
+        name="list", description="募集中の募集を締切の近い順に表示します。"
+    )
+    @app_commands.describe(
+        party_type="募集形式で絞り込む (例: フルパ)",
+        page="表示するページ",
+    )
+    async def list_recruitments(
+        self,
+        interaction: discord.Interaction,
+        party_type: Optional[str] = None,
+        page: app_commands.Range[int, 1] = 1,
+    ):
+        recruitments, total = self.recruitment_service.list_open_recruitments(
+            str(interaction.guild_id), party_type, page, self.LIST_PAGE_SIZE
+        )
+        last_page = max(1, -(-total // self.LIST_PAGE_SIZE))
+        if not recruitments:
+            message = (
+                "募集中の募集はありません。"
+                if total == 0
+                else f"ページは1〜{last_page}の範囲で指定してください。"
+            )
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"募集中の募集 ({total}件)"
+            + (f" - {party_type}" if party_type else ""),
+            color=discord.Color.green(),
+        )
+        for recruitment in recruitments:
+            lines = [
+                f"募集主: <@{recruitment.creator_id}>",
+                f"締切: <t:{int(recruitment.deadline.timestamp())}:R>",
+            ]
+            if recruitment.channel_id:
+                lines.append(
+                    f"https://discord.com/channels/{recruitment.guild_id}"
+                    f"/{recruitment.channel_id}/{recruitment.message_id}"
+                )
+            embed.add_field(
+                name=f"{recruitment.party_type} @{recruitment.max_participants}",
+                value="\n".join(lines),
+                inline=False,
+            )
+        embed.set_footer(text=f"{page}/{last_page} ページ")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
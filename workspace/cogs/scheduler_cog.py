@@ -0,0 +1,85 @@
+# cogs/scheduler_cog.py
+
+from datetime import time, timedelta, timezone
+from typing import List
+
+import discord
+from discord.ext import commands, tasks
+
+from config import settings
+from services.scheduled_task_service import ScheduledTaskService
+
+# 日本時間のタイムゾーン
+JST = timezone(timedelta(hours=9), "JST")
+
+# デイリータスクの実行時刻 (仕様書「3.3. 定期実行機能」)
+DAILY_TASK_TIME = time(hour=9, minute=0, tzinfo=JST)
+
+
+class SchedulerCog(commands.Cog):
+    """
+    定期実行タスクをBotプロセス内で実行するCog
+    Gatewayでチャンク済みのメンバーキャッシュや、Bot本体のセッション・Repositoryを再利用する
+    """
+
+    def __init__(
+        self, bot: commands.Bot, scheduled_task_service: ScheduledTaskService
+    ):
+        self.bot = bot
+        self.scheduled_task_service = scheduled_task_service
+        self.daily_tasks.start()
+        self.rank_refresh_tick.start()
+
+    def cog_unload(self):
+        self.daily_tasks.cancel()
+        self.rank_refresh_tick.cancel()
+
+    async def _target_guilds(self) -> List[discord.Guild]:
+        """
+        処理対象のギルドを返す。メンバー一覧が未取得のギルドはここでチャンクする
+        """
+        guilds = self.bot.guilds
+        if settings.DISCORD_GUILD_ID:
+            guilds = [g for g in guilds if str(g.id) == settings.DISCORD_GUILD_ID]
+
+        for guild in guilds:
+            if not guild.chunked:
+                await guild.chunk()
+        return guilds
+
+    # 例外でタスクループが止まらないよう、各ループ内で捕捉して次回の実行に任せる
+
+    @tasks.loop(time=DAILY_TASK_TIME)
+    async def daily_tasks(self):
+        try:
+            guilds = await self._target_guilds()
+            await self.scheduled_task_service.run_daily_tasks(guilds)
+        except Exception as e:
+            print(f"Error in daily tasks: {e!r}")
+        try:
+            await self.scheduled_task_service.run_recruitment_archive()
+        except Exception as e:
+            print(f"Error in recruitment archive: {e!r}")
+
+    @tasks.loop(minutes=settings.RANK_REFRESH_INTERVAL_MINUTES)
+    async def rank_refresh_tick(self):
+        try:
+            guilds = await self._target_guilds()
+            await self.scheduled_task_service.run_rank_refresh_tick(guilds)
+        except Exception as e:
+            print(f"Error in rank refresh tick: {e!r}")
+
+    @daily_tasks.before_loop
+    @rank_refresh_tick.before_loop
+    async def before_tasks(self):
+        # メンバーキャッシュが揃うまで待つ
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    # 単体実行(scheduler/daily_tasks.py)に切り替えている場合は読み込まない
+    if not settings.RUN_SCHEDULED_TASKS_IN_BOT:
+        print("Scheduled tasks are disabled in this process.")
+        return
+    scheduled_task_service = bot.scheduled_task_service
+    await bot.add_cog(SchedulerCog(bot, scheduled_task_service))
@@ -41,6 +41,11 @@ class UtilityCog(commands.Cog):
             value="自身が開始した募集をキャンセルします。参加者にはDMで通知が送られます。",
             inline=False,
         )
+        embed.add_field(
+            name="📋 `/list [party_type] [page]`",
+            value="このサーバーで募集中の募集を締切の近い順に表示します。募集形式で絞り込めます。",
+            inline=False,
+        )
         embed.add_field(
             name="👑 `/rank`",
             value="Riotアカウントと連携し、VALORANTのランクに応じたDiscordロールを自動で付与・更新します。",
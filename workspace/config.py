@@ -1,5 +1,7 @@
 # config.py (修正後の全文)
 
+from typing import Dict, Tuple
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,6 +18,7 @@ class Settings(BaseSettings):
     # Discord Settings
     DISCORD_BOT_TOKEN: str
     # 【修正点】必須から任意項目に変更
+    # 定期実行タスクの対象を1ギルドに限定する場合のみ設定する (未設定時は全ギルド)
     DISCORD_GUILD_ID: str | None = None
 
     # Supabase Settings
@@ -36,6 +39,54 @@ class Settings(BaseSettings):
     # Security Settings
     ENCRYPTION_KEY: bytes
 
+    # Discord Write Governor Settings
+    DISCORD_WRITE_CONCURRENCY: int = 4
+    # インタラクション応答・Embed編集専用に予約する同時実行枠
+    DISCORD_WRITE_RESERVED_FOREGROUND: int = 1
+    # DM通知を同時に送る数の上限
+    DM_NOTIFICATION_CONCURRENCY: int = 5
+
+    # Rate Limit Settings
+    # ユーザーごとのコマンド・ボタンの実行回数の上限 (RATE_LIMIT_WINDOW_SECONDS秒あたり)
+    RATE_LIMIT_COUNT: int = 5
+    RATE_LIMIT_WINDOW_SECONDS: float = 10.0
+    # コマンドごとの上限 (例: {"joinus": [2, 60]})。指定したコマンドは専用の枠で数える
+    RATE_LIMIT_OVERRIDES: Dict[str, Tuple[int, float]] = {}
+
+    # Rank Refresh Settings
+    # ローリング更新の実行間隔 (Heroku Schedulerの実行間隔と合わせる)
+    RANK_REFRESH_INTERVAL_MINUTES: int = 10
+    # 1回の実行で救済する、取りこぼしユーザーの最大数
+    RANK_REFRESH_CATCH_UP_LIMIT: int = 5
+    # ランク更新に使う1日あたりのRiot API呼び出し予算 (未設定の場合は無制限)
+    RANK_REFRESH_DAILY_API_BUDGET: int | None = None
+
+    # Daily Task Settings
+    # 定期実行タスクをBotプロセス内で実行する (Falseの場合はscheduler/daily_tasks.pyを使う)
+    RUN_SCHEDULED_TASKS_IN_BOT: bool = True
+    # デイリータスクで同時に処理するギルド数の上限
+    DAILY_TASK_GUILD_CONCURRENCY: int = 3
+    # 定期実行タスクの多重実行を防ぐリースの有効期限 (保持中はハートビートで延長する)
+    SCHEDULED_JOB_LEASE_TTL_SECONDS: int = 300
+    # 他のプロセスが実行中の場合に待つ秒数 (0の場合は待たずにスキップする)
+    SCHEDULED_JOB_LEASE_WAIT_SECONDS: int = 0
+    # 締切・キャンセルからこの日数が経った募集をアーカイブテーブルへ移す
+    RECRUITMENT_ARCHIVE_AFTER_DAYS: int = 30
+    # アーカイブで1回のRPCで移す募集の件数
+    RECRUITMENT_ARCHIVE_BATCH_SIZE: int = 500
+
+    # Recruitment Settings
+    # 募集中の募集の状態をメモリ上で管理し、DBへは非同期に書き込む (参加・取消の応答を速くする)
+    RECRUITMENT_IN_MEMORY_STATE: bool = False
+    # 非同期書き込みに失敗した場合の再試行回数
+    RECRUITMENT_WRITE_BEHIND_MAX_RETRIES: int = 5
+    # 同じ募集への同時操作を待つ秒数の上限 (超えた場合は混雑している旨を返す)
+    RECRUITMENT_LOCK_TIMEOUT_SECONDS: float = 5.0
+    # 募集メッセージのEmbedを編集する最短間隔 (この間の参加・取消はまとめて反映する)
+    RECRUITMENT_EMBED_UPDATE_INTERVAL_SECONDS: float = 1.0
+    # 同じユーザーが同じ募集のボタンを押し直した場合に、最初の結果を返す秒数
+    RECRUITMENT_DEDUPE_TTL_SECONDS: float = 3.0
+
     # Logging Settings
     LOG_LEVEL: str = "INFO"
 
@@ -0,0 +1,92 @@
+# db/job_lease_repository.py
+from datetime import datetime, timedelta, timezone
+
+from supabase import Client
+
+
+def _timestamp(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class JobLeaseRepository:
+    """
+    job_leasesテーブル(定期実行タスクの排他制御用リース)へのデータアクセスを責務に持つクラス
+
+    リースの取得・延長は条件付きUPDATEで行うため、複数のプロセスが同時に
+    取得を試みても保持者は1つに決まる。
+    """
+
+    def __init__(self, db_client: Client):
+        self.db = db_client
+
+    def try_acquire(self, job_name: str, holder_id: str, ttl_seconds: int) -> bool:
+        """
+        リースの取得を試みる
+        未作成、期限切れ、または自分が保持しているリースの場合のみ取得できる
+
+        Returns:
+            bool: 取得できた場合はTrue
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = _timestamp(now + timedelta(seconds=ttl_seconds))
+
+        # 行が無ければ作成する (既に存在する場合は何もしない)
+        self.db.table("job_leases").upsert(
+            {"job_name": job_name, "holder_id": holder_id, "expires_at": expires_at},
+            on_conflict="job_name",
+            ignore_duplicates=True,
+        ).execute()
+
+        # 期限切れか自分が保持している場合のみ奪取する
+        response = (
+            self.db.table("job_leases")
+            .update(
+                {
+                    "holder_id": holder_id,
+                    "expires_at": expires_at,
+                    "updated_at": "now()",
+                }
+            )
+            .eq("job_name", job_name)
+            .or_(f'expires_at.lt."{_timestamp(now)}",holder_id.eq."{holder_id}"')
+            .execute()
+        )
+        return bool(response.data)
+
+    def is_held(self, job_name: str) -> bool:
+        """
+        いずれかのプロセスが有効期限内のリースを保持しているか
+        """
+        response = (
+            self.db.table("job_leases")
+            .select("job_name")
+            .eq("job_name", job_name)
+            .gt("expires_at", _timestamp(datetime.now(timezone.utc)))
+            .limit(1)
+            .execute()
+        )
+        return bool(response.data)
+
+    def renew(self, job_name: str, holder_id: str, ttl_seconds: int) -> bool:
+        """
+        保持しているリースの有効期限を延長する(ハートビート)
+
+        Returns:
+            bool: 延長できた場合はTrue。他のプロセスに奪われていた場合はFalse
+        """
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+        response = (
+            self.db.table("job_leases")
+            .update({"expires_at": _timestamp(expires_at), "updated_at": "now()"})
+            .match({"job_name": job_name, "holder_id": holder_id})
+            .execute()
+        )
+        return bool(response.data)
+
+    def release(self, job_name: str, holder_id: str) -> None:
+        """
+        保持しているリースを即座に失効させる
+        """
+        self.db.table("job_leases").update(
+            {"expires_at": _timestamp(datetime.now(timezone.utc)), "updated_at": "now()"}
+        ).match({"job_name": job_name, "holder_id": holder_id}).execute()
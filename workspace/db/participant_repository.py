@@ -1,6 +1,7 @@
 # db/participant_repository.py
-from datetime import datetime
-from typing import List
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -22,56 +23,118 @@ class ParticipantRepository:
     participantsテーブルへのデータアクセスを責務に持つクラス
     """
 
-    def __init__(self, db_client: Client):
+    def __init__(self, db_client: Client, max_cached: int = 1024):
         self.db = db_client
+        # recruitment_id -> 参加者リスト。終了した募集はforgetで取り除くが、
+        # 終了済みの募集の参照などでも増えるため、最近使ったものから max_cached 件までに制限する
+        self._by_recruitment: "OrderedDict[str, List[Participant]]" = OrderedDict()
+        self.max_cached = max_cached
 
-    def add_participant(self, recruitment_id: UUID, user_id: str) -> None:
+    def _cached(self, recruitment_id: UUID) -> Optional[List[Participant]]:
+        cached = self._by_recruitment.get(str(recruitment_id))
+        if cached is not None:
+            self._by_recruitment.move_to_end(str(recruitment_id))
+        return cached
+
+    def _store(self, recruitment_id: UUID, participants: List[Participant]):
+        self._by_recruitment[str(recruitment_id)] = participants
+        self._by_recruitment.move_to_end(str(recruitment_id))
+        while len(self._by_recruitment) > self.max_cached:
+            self._by_recruitment.popitem(last=False)
+
+    def prime(self, recruitment_id: UUID, participants: Iterable[Participant]):
+        """
+        起動時に読み込んだ参加者でキャッシュを温める
+        """
+        self._store(recruitment_id, list(participants))
+
+    def forget(self, recruitment_id: UUID):
+        """
+        終了した募集の参加者をキャッシュから取り除く
+        """
+        self._by_recruitment.pop(str(recruitment_id), None)
+
+    def add_participant(
+        self, recruitment_id: UUID, user_id: str, update_cache: bool = True
+    ) -> None:
         """
         募集に参加者を追加する
         仕様書「3.1. 募集Embedメッセージ」の「参加する」ボタンの処理で使用
+        既に参加している場合は何もしないため、非同期書き込みの再試行でも重複しない
+        update_cache=Falseの場合はDBにのみ書き込む (イベントループ外のスレッドから呼ぶ場合)
         """
-        # 既に存在する場合はエラーになるが、Service層で事前チェックするためここでは考慮しない
-        self.db.table("participants").insert(
-            {"recruitment_id": str(recruitment_id), "user_id": user_id}
+        self.db.table("participants").upsert(
+            {"recruitment_id": str(recruitment_id), "user_id": user_id},
+            on_conflict="recruitment_id,user_id",
+            ignore_duplicates=True,
         ).execute()
+        if update_cache:
+            self.cache_participant_added(recruitment_id, user_id)
 
-    def add_initial_participants(
-        self, recruitment_id: UUID, user_ids: List[str]
-    ) -> None:
+    def cache_participant_added(self, recruitment_id: UUID, user_id: str) -> None:
         """
-        募集開始時の初期参加者を一括で追加する
-        仕様書「2.2. /joinus (募集開始)」の内部処理で使用
+        DBに書き込まずに、キャッシュ済みの参加者リストに参加者を追加する
         """
-        if not user_ids:
-            return
-
-        records = [
-            {"recruitment_id": str(recruitment_id), "user_id": user_id}
-            for user_id in user_ids
-        ]
-        self.db.table("participants").insert(records).execute()
+        cached = self._by_recruitment.get(str(recruitment_id))
+        if cached is not None:
+            cached.append(
+                Participant(
+                    recruitment_id=recruitment_id,
+                    user_id=user_id,
+                    joined_at=datetime.now(timezone.utc),
+                )
+            )
 
-    def remove_participant(self, recruitment_id: UUID, user_id: str) -> None:
+    def remove_participant(
+        self, recruitment_id: UUID, user_id: str, update_cache: bool = True
+    ) -> None:
         """
         募集から参加者を取り除く
         仕様書「3.1. 募集Embedメッセージ」の「参加を取り消す」ボタンの処理で使用
+        update_cache=Falseの場合はDBにのみ書き込む (イベントループ外のスレッドから呼ぶ場合)
         """
         self.db.table("participants").delete().match(
             {"recruitment_id": str(recruitment_id), "user_id": user_id}
         ).execute()
+        if update_cache:
+            self.cache_participant_removed(recruitment_id, user_id)
+
+    def cache_participant_removed(self, recruitment_id: UUID, user_id: str) -> None:
+        """
+        DBに書き込まずに、キャッシュ済みの参加者リストから参加者を取り除く
+        """
+        cached = self._by_recruitment.get(str(recruitment_id))
+        if cached is not None:
+            cached[:] = [p for p in cached if p.user_id != user_id]
 
     def get_participants_by_recruitment_id(
-        self, recruitment_id: UUID
+        self, recruitment_id: UUID, include_archived: bool = False
     ) -> List[Participant]:
         """
         指定された募集の参加者リストを取得する
+        include_archived=Trueの場合、アーカイブ済みの募集の参加者も検索する
         """
+        cached = self._cached(recruitment_id)
+        if cached:
+            return list(cached)
+
+        if cached is None:
+            response = (
+                self.db.table("participants")
+                .select("*")
+                .eq("recruitment_id", str(recruitment_id))
+                .execute()
+            )
+            cached = [Participant.model_validate(p) for p in response.data or []]
+            self._store(recruitment_id, cached)
+        if cached or not include_archived:
+            return list(cached)
+
+        # アーカイブ済みの募集は今後変わらないため、キャッシュしない
         response = (
-            self.db.table("participants")
+            self.db.table("participants_archive")
             .select("*")
             .eq("recruitment_id", str(recruitment_id))
             .execute()
         )
-        if response.data:
-            return [Participant.model_validate(p) for p in response.data]
-        return []
+        return [Participant.model_validate(p) for p in response.data or []]
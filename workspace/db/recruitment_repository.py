@@ -1,11 +1,13 @@
 # db/recruitment_repository.py
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from pydantic import BaseModel
 from supabase import Client
 
+from db.participant_repository import Participant
+
 
 # Userリポジトリと同様に、Pydanticモデルでデータの型を定義します
 # これにより、Service層とRepository層でのデータの受け渡しが安全かつ明確になります
@@ -16,6 +18,8 @@ class Recruitment(BaseModel):
 
     id: UUID
     message_id: str
+    # 締切時などBotからメッセージを編集するために保存する (導入前の募集はNone)
+    channel_id: Optional[str] = None
     guild_id: str
     creator_id: str
     party_type: str
@@ -33,48 +37,79 @@ class RecruitmentRepository:
 
     def __init__(self, db_client: Client):
         self.db = db_client
+        # 募集中(open)の募集。ボタン操作のたびにDBを引かないためのキャッシュ
+        self._open_by_id: Dict[str, Recruitment] = {}
+        self._open_by_message_id: Dict[str, Recruitment] = {}
 
-    def create_recruitment(
-        self,
-        message_id: str,
-        guild_id: str,
-        creator_id: str,
-        party_type: str,
-        max_participants: int,
-        deadline: datetime,
+    def _remember(self, recruitment: Recruitment):
+        previous = self._open_by_id.pop(str(recruitment.id), None)
+        if previous:
+            self._open_by_message_id.pop(previous.message_id, None)
+        if recruitment.status == "open":
+            self._open_by_id[str(recruitment.id)] = recruitment
+            self._open_by_message_id[recruitment.message_id] = recruitment
+        else:
+            self._open_by_message_id.pop(recruitment.message_id, None)
+
+    def prime(self, recruitments: Iterable[Recruitment]):
+        """
+        起動時に読み込んだ募集でキャッシュを温める
+        """
+        for recruitment in recruitments:
+            self._remember(recruitment)
+
+    def create_recruitment_with_participants(
+        self, recruitment: Recruitment, participant_ids: List[str]
     ) -> Optional[Recruitment]:
         """
-        新しい募集を作成する
+        募集・初期参加者・参加ログを1回のRPC (1トランザクション) で保存する
+        募集IDはアプリケーション側で採番し、送信済みのメッセージIDと合わせて渡す
         仕様書「2.2. /joinus (募集開始)」の内部処理に対応
         """
+        response = self.db.rpc(
+            "create_recruitment_with_participants",
+            {
+                "p_recruitment": {
+                    "id": str(recruitment.id),
+                    "message_id": recruitment.message_id,
+                    "channel_id": recruitment.channel_id,
+                    "guild_id": recruitment.guild_id,
+                    "creator_id": recruitment.creator_id,
+                    "party_type": recruitment.party_type,
+                    "max_participants": recruitment.max_participants,
+                    "deadline": recruitment.deadline.isoformat(),
+                },
+                "p_participant_ids": participant_ids,
+            },
+        ).execute()
+
+        if response.data:
+            created = Recruitment.model_validate(response.data[0])
+            self._remember(created)
+            return created
+        return None
+
+    def _find_one(
+        self, column: str, value: str, include_archived: bool
+    ) -> Optional[Recruitment]:
         response = (
             self.db.table("recruitments")
-            .insert(
-                {
-                    "message_id": message_id,
-                    "guild_id": guild_id,
-                    "creator_id": creator_id,
-                    "party_type": party_type,
-                    "max_participants": max_participants,
-                    "deadline": deadline.isoformat(),
-                    "status": "open",  # 初期ステータスは'open'
-                }
-            )
+            .select("*")
+            .eq(column, value)
+            .limit(1)
             .execute()
         )
-
         if response.data:
-            return Recruitment.model_validate(response.data[0])
-        return None
+            recruitment = Recruitment.model_validate(response.data[0])
+            self._remember(recruitment)
+            return recruitment
+        if not include_archived:
+            return None
 
-    def get_recruitment_by_message_id(self, message_id: str) -> Optional[Recruitment]:
-        """
-        DiscordのメッセージIDから募集情報を取得する
-        """
         response = (
-            self.db.table("recruitments")
+            self.db.table("recruitments_archive")
             .select("*")
-            .eq("message_id", message_id)
+            .eq(column, value)
             .limit(1)
             .execute()
         )
@@ -82,6 +117,30 @@ class RecruitmentRepository:
             return Recruitment.model_validate(response.data[0])
         return None
 
+    def get_recruitment_by_id(
+        self, recruitment_id: UUID, include_archived: bool = False
+    ) -> Optional[Recruitment]:
+        """
+        募集IDから募集情報を取得する
+        include_archived=Trueの場合、アーカイブ済みの募集も検索する
+        """
+        cached = self._open_by_id.get(str(recruitment_id))
+        if cached:
+            return cached
+        return self._find_one("id", str(recruitment_id), include_archived)
+
+    def get_recruitment_by_message_id(
+        self, message_id: str, include_archived: bool = False
+    ) -> Optional[Recruitment]:
+        """
+        DiscordのメッセージIDから募集情報を取得する
+        include_archived=Trueの場合、アーカイブ済みの募集も検索する
+        """
+        cached = self._open_by_message_id.get(message_id)
+        if cached:
+            return cached
+        return self._find_one("message_id", message_id, include_archived)
+
     def get_open_recruitment_by_creator_id(
         self, creator_id: str
     ) -> Optional[Recruitment]:
@@ -89,6 +148,34 @@ class RecruitmentRepository:
         募集主のDiscord IDから、現在も募集中(open)の募集を取得する
         仕様書「2.3. /cancel」や「2.4. /edit」で、操作対象の募集を特定するために使用
         """
+        cached = self.get_cached_open_recruitment_by_creator_id(creator_id)
+        if cached:
+            return cached
+
+        recruitment = self.query_open_recruitment_by_creator_id(creator_id)
+        if recruitment:
+            self._remember(recruitment)
+        return recruitment
+
+    def get_cached_open_recruitment_by_creator_id(
+        self, creator_id: str
+    ) -> Optional[Recruitment]:
+        """
+        キャッシュだけを参照して、募集主の募集中(open)の募集を取得する
+        キャッシュはイベントループ上で更新されるため、イベントループ上で呼び出す
+        """
+        for cached in self._open_by_id.values():
+            if cached.creator_id == creator_id:
+                return cached
+        return None
+
+    def query_open_recruitment_by_creator_id(
+        self, creator_id: str
+    ) -> Optional[Recruitment]:
+        """
+        DBだけを参照して、募集主の募集中(open)の募集を取得する
+        キャッシュに触れないため、スレッドから呼び出せる
+        """
         response = (
             self.db.table("recruitments")
             .select("*")
@@ -101,21 +188,79 @@ class RecruitmentRepository:
             return Recruitment.model_validate(response.data[0])
         return None
 
+    def get_open_recruitments_with_participants(
+        self,
+    ) -> List[Tuple[Recruitment, List[Participant]]]:
+        """
+        募集中(open)の募集を、参加者と合わせて1回のクエリで全て取得する
+        起動時にキャッシュと締切タイマーを準備するために使用
+        """
+        response = (
+            self.db.table("recruitments")
+            .select("*, participants(*)")
+            .eq("status", "open")
+            .execute()
+        )
+        results = []
+        for row in response.data or []:
+            participants = [
+                Participant.model_validate(p) for p in row.pop("participants", None) or []
+            ]
+            results.append((Recruitment.model_validate(row), participants))
+        return results
+
+    def close_recruitment_if_open(self, recruitment_id: UUID) -> Optional[Recruitment]:
+        """
+        募集中(open)の募集を締切済(closed)にする
+        キャンセル等で既にopenでない場合は更新せずNoneを返す
+        """
+        response = (
+            self.db.table("recruitments")
+            .update({"status": "closed", "updated_at": "now()"})
+            .eq("id", str(recruitment_id))
+            .eq("status", "open")
+            .execute()
+        )
+        if response.data:
+            recruitment = Recruitment.model_validate(response.data[0])
+            self._remember(recruitment)
+            return recruitment
+        return None
+
     def update_recruitment(
-        self, recruitment_id: UUID, updates: dict
+        self, recruitment_id: UUID, updates: dict, only_open: bool = False
     ) -> Optional[Recruitment]:
         """
         募集情報を更新する
         仕様書「2.4. /edit (募集編集)」に対応
+        only_open=Trueの場合は募集中(open)の募集だけを更新し、締切・キャンセル済みならNoneを返す
         """
         updates["updated_at"] = "now()"  # 更新日時をDB側で更新
-        response = (
+        query = (
             self.db.table("recruitments")
             .update(updates)
             .eq("id", str(recruitment_id))
-            .execute()
         )
+        if only_open:
+            query = query.eq("status", "open")
+        response = query.execute()
 
         if response.data:
-            return Recruitment.model_validate(response.data[0])
+            recruitment = Recruitment.model_validate(response.data[0])
+            self._remember(recruitment)
+            return recruitment
         return None
+
+    def archive_finished_recruitments(self, before: datetime, batch_size: int) -> int:
+        """
+        締切済・キャンセル済で、最終更新がbefore より前の募集を参加者と合わせて
+        アーカイブテーブルへ移す (1回のRPCで最大batch_size件)
+
+        Returns:
+            int: 移動した募集の件数
+        """
+        response = self.db.rpc(
+            "archive_finished_recruitments",
+            {"p_before": before.isoformat(), "p_batch_size": batch_size},
+        ).execute()
+        return int(response.data or 0)
@@ -0,0 +1,71 @@
+# db/task_run_repository.py
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+from supabase import Client
+
+TaskRunStatus = Literal["running", "completed"]
+
+
+class TaskRun(BaseModel):
+    """
+    task_runsテーブルのデータを表現するPydanticモデル
+    定期実行タスクの1実行(run_id)における、1フェーズ分の進捗を表す
+    """
+
+    id: UUID
+    run_id: str
+    phase: str
+    cursor: Optional[str] = None
+    status: TaskRunStatus
+    created_at: datetime
+    updated_at: datetime
+
+
+class TaskRunRepository:
+    """
+    task_runsテーブル(定期実行タスクの進捗台帳)へのデータアクセスを責務に持つクラス
+    """
+
+    def __init__(self, db_client: Client):
+        self.db = db_client
+
+    def get_or_create_task_run(self, run_id: str, phase: str) -> Optional[TaskRun]:
+        """
+        実行IDとフェーズに対応する進捗を取得する。存在しない場合は作成する
+        (run_id, phase) にはユニーク制約があるため、既存の進捗は上書きしない
+        """
+        self.db.table("task_runs").upsert(
+            {"run_id": run_id, "phase": phase, "status": "running"},
+            on_conflict="run_id,phase",
+            ignore_duplicates=True,
+        ).execute()
+
+        response = (
+            self.db.table("task_runs")
+            .select("*")
+            .match({"run_id": run_id, "phase": phase})
+            .limit(1)
+            .execute()
+        )
+        if response.data:
+            return TaskRun.model_validate(response.data[0])
+        return None
+
+    def update_cursor(self, run_id: str, phase: str, cursor: str) -> None:
+        """
+        フェーズの処理済みカーソル(最後に処理したユーザーID)を記録する
+        """
+        self.db.table("task_runs").update(
+            {"cursor": cursor, "updated_at": "now()"}
+        ).match({"run_id": run_id, "phase": phase}).execute()
+
+    def mark_completed(self, run_id: str, phase: str) -> None:
+        """
+        フェーズを完了済みにする
+        """
+        self.db.table("task_runs").update(
+            {"status": "completed", "updated_at": "now()"}
+        ).match({"run_id": run_id, "phase": phase}).execute()
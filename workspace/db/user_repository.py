@@ -20,10 +20,21 @@ class User(BaseModel):
     riot_puuid: Optional[str] = None
     riot_access_token: Optional[str] = None
     riot_refresh_token: Optional[str] = None
+    # ランクのローリング更新で使用する
+    rank_tier: Optional[str] = None
+    rank_refreshed_at: Optional[datetime] = None
+    rank_changed_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
 
+# ランク更新に必要な列 (トークンは含めない)
+RANK_REFRESH_COLUMNS = (
+    "discord_id,riot_puuid,rank_tier,rank_refreshed_at,rank_changed_at,"
+    "created_at,updated_at"
+)
+
+
 class UserRepository:
     """
     usersテーブルへのデータアクセスを責務に持つクラス
@@ -124,3 +135,50 @@ class UserRepository:
                     )
                 users.append(User.model_validate(user_data))
         return users
+
+    def get_users_for_rank_refresh(
+        self, refreshed_before: Optional[datetime] = None
+    ) -> List[User]:
+        """
+        ランク更新の対象になり得る連携済みユーザーを取得する
+        refreshed_beforeが指定された場合は、それより後にランクを更新したユーザーを除く
+        ランク更新ではトークンを使わないため、トークンは取得・復号化しない
+        """
+        query = (
+            self.db.table("users")
+            .select(RANK_REFRESH_COLUMNS)
+            .not_.is_("riot_puuid", "null")
+        )
+        if refreshed_before is not None:
+            query = query.or_(
+                "rank_refreshed_at.is.null,"
+                f'rank_refreshed_at.lt."{refreshed_before.isoformat()}"'
+            )
+        response = query.execute()
+        return [User.model_validate(user_data) for user_data in response.data or []]
+
+    def update_user_rank(
+        self, discord_id: str, rank_tier: str, rank_changed: bool
+    ) -> None:
+        """
+        ランクの取得結果を記録する
+        ランクが変わった場合のみ rank_changed_at を更新する
+        """
+        updates = {
+            "rank_tier": rank_tier,
+            "rank_refreshed_at": "now()",
+            "updated_at": "now()",
+        }
+        if rank_changed:
+            updates["rank_changed_at"] = "now()"
+
+        self.db.table("users").update(updates).eq("discord_id", discord_id).execute()
+
+    def mark_rank_refreshed(self, discord_id: str) -> None:
+        """
+        ランクを取得せずに更新日時だけを記録する
+        どのギルドにも所属していないユーザーを、次の更新時期まで対象から外すために使用
+        """
+        self.db.table("users").update(
+            {"rank_refreshed_at": "now()", "updated_at": "now()"}
+        ).eq("discord_id", discord_id).execute()
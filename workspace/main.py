@@ -2,9 +2,11 @@
 
 import asyncio
 import os
+import time
 import aiohttp
 import uvicorn
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 from config import settings
@@ -13,13 +15,52 @@ from db.user_repository import UserRepository
 from db.recruitment_repository import RecruitmentRepository
 from db.participant_repository import ParticipantRepository
 from db.activity_log_repository import ActivityLogRepository
+from db.job_lease_repository import JobLeaseRepository
+from db.task_run_repository import TaskRunRepository
 from api_clients.riot_api_client import RiotApiClient
+from api_clients.discord_write_governor import DiscordWriteGovernor
 from services.user_service import UserService
+from services.dm_notifier import DMNotifier
 from services.recruitment_service import RecruitmentService
-from views.recruitment_view import RecruitmentView
+from services.recruitment_expiry import RecruitmentExpiryScheduler
+from services.recruitment_state import RecruitmentStateStore, WriteBehindQueue
+from services.rank_service import RankService
+from services.activity_service import ActivityService
+from services.scheduled_task_service import ScheduledTaskService
+from services.role_registry import RoleRegistry
+from services.rate_limiter import UserRateLimiter
+from services.interaction_dedupe import InteractionDeduplicator
+from views.embed_update_coalescer import EmbedUpdateCoalescer
+from views.interaction_responder import InteractionResponder, send_rate_limited
+from views.recruitment_view import (
+    JoinRecruitmentButton,
+    LeaveRecruitmentButton,
+    LegacyRecruitmentView,
+    RecruitmentButtonHandler,
+)
 from web.server import app as fastapi_app
 
 
+class RateLimitedCommandTree(app_commands.CommandTree):
+    """
+    スラッシュコマンドの実行前に、ユーザー単位の実行頻度の制限を確認するCommandTree
+    """
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        rate_limiter = getattr(self.client, "rate_limiter", None)
+        if (
+            rate_limiter is None
+            or interaction.type != discord.InteractionType.application_command
+        ):
+            return True
+        command = interaction.command.qualified_name if interaction.command else ""
+        retry_after = rate_limiter.hit(interaction.user.id, command)
+        if retry_after:
+            await send_rate_limited(interaction, retry_after)
+            return False
+        return True
+
+
 class LaValorantBot(commands.Bot):
     """
     Botのメインクラス。
@@ -31,7 +72,9 @@ class LaValorantBot(commands.Bot):
         intents.message_content = True
         intents.voice_states = True
         intents.members = True
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(
+            command_prefix="!", intents=intents, tree_cls=RateLimitedCommandTree
+        )
 
         # 依存関係のインスタンス化 (同期的なもの)
         self.db_client = get_db_client()
@@ -39,12 +82,52 @@ class LaValorantBot(commands.Bot):
         self.recruitment_repo = RecruitmentRepository(self.db_client)
         self.participant_repo = ParticipantRepository(self.db_client)
         self.activity_log_repo = ActivityLogRepository(self.db_client)
+        self.task_run_repo = TaskRunRepository(self.db_client)
+        self.job_lease_repo = JobLeaseRepository(self.db_client)
+
+        # ギルドごとのロール索引 (ロール関連のGatewayイベントで最新化する)
+        self.role_registry = RoleRegistry()
+
+        # Discordへの書き込みを優先度付きで調停する (Embed編集 > ロール変更 > DM)
+        self.write_governor = DiscordWriteGovernor(
+            max_concurrency=settings.DISCORD_WRITE_CONCURRENCY,
+            reserved_foreground=settings.DISCORD_WRITE_RESERVED_FOREGROUND,
+        )
+        # 募集Embedの編集をメッセージごとにまとめる
+        self.embed_coalescer = EmbedUpdateCoalescer(
+            self.write_governor,
+            interval=settings.RECRUITMENT_EMBED_UPDATE_INTERVAL_SECONDS,
+        )
+        # 参加者へのDM通知 (同時実行数を制限して並行に送る)
+        self.dm_notifier = DMNotifier(
+            self,
+            self.write_governor,
+            concurrency=settings.DM_NOTIFICATION_CONCURRENCY,
+        )
+        # ユーザー単位のコマンド・ボタンの実行頻度の制限 (仕様書 7.3)
+        self.rate_limiter = UserRateLimiter(
+            rate=settings.RATE_LIMIT_COUNT,
+            per=settings.RATE_LIMIT_WINDOW_SECONDS,
+            overrides=settings.RATE_LIMIT_OVERRIDES,
+        )
+        # 募集ボタンのダブルクリック・再送をまとめる
+        self.interaction_dedupe = InteractionDeduplicator(
+            ttl=settings.RECRUITMENT_DEDUPE_TTL_SECONDS
+        )
+        # ボタン・コマンドに先に応答し、応答までの時間と完了までの時間を記録する
+        self.interaction_responder = InteractionResponder(self.write_governor)
 
         # プレースホルダー
         self.aiohttp_session = None
         self.riot_api_client = None
         self.user_service = None
         self.recruitment_service = None
+        self.recruitment_state = None
+        self.recruitment_write_behind = None
+        self.recruitment_buttons = None
+        self.rank_service = None
+        self.activity_service = None
+        self.scheduled_task_service = None
 
     async def setup_hook(self):
         print("Initializing components...")
@@ -59,15 +142,82 @@ class LaValorantBot(commands.Bot):
             settings.RIOT_REDIRECT_URI,
         )
         self.user_service = UserService(self.user_repo, self.riot_api_client)
+        self.recruitment_expiry = RecruitmentExpiryScheduler()
+        if settings.RECRUITMENT_IN_MEMORY_STATE:
+            self.recruitment_state = RecruitmentStateStore()
+            self.recruitment_write_behind = WriteBehindQueue(
+                max_retries=settings.RECRUITMENT_WRITE_BEHIND_MAX_RETRIES
+            )
         self.recruitment_service = RecruitmentService(
-            self.recruitment_repo, self.participant_repo, self.activity_log_repo
+            self.recruitment_repo,
+            self.participant_repo,
+            self.activity_log_repo,
+            self.recruitment_expiry,
+            self.recruitment_state,
+            self.recruitment_write_behind,
+            lock_timeout=settings.RECRUITMENT_LOCK_TIMEOUT_SECONDS,
+        )
+
+        # 定期実行タスク用 (SchedulerCogからBotのメンバーキャッシュを使って実行する)
+        self.rank_service = RankService(
+            self.user_repo,
+            self.riot_api_client,
+            self.role_registry,
+            self.write_governor,
+            refresh_interval_minutes=settings.RANK_REFRESH_INTERVAL_MINUTES,
+            catch_up_limit=settings.RANK_REFRESH_CATCH_UP_LIMIT,
+            activity_log_repo=self.activity_log_repo,
+            daily_api_budget=settings.RANK_REFRESH_DAILY_API_BUDGET,
+        )
+        self.activity_service = ActivityService(
+            self.user_repo,
+            self.activity_log_repo,
+            self.role_registry,
+            self.write_governor,
+        )
+        self.scheduled_task_service = ScheduledTaskService(
+            self.rank_service,
+            self.activity_service,
+            guild_concurrency=settings.DAILY_TASK_GUILD_CONCURRENCY,
+            task_run_repo=self.task_run_repo,
+            job_lease_repo=self.job_lease_repo,
+            lease_ttl_seconds=settings.SCHEDULED_JOB_LEASE_TTL_SECONDS,
+            lease_wait_seconds=settings.SCHEDULED_JOB_LEASE_WAIT_SECONDS,
+            recruitment_repo=self.recruitment_repo,
+            archive_after_days=settings.RECRUITMENT_ARCHIVE_AFTER_DAYS,
+            archive_batch_size=settings.RECRUITMENT_ARCHIVE_BATCH_SIZE,
         )
 
         # FastAPIにUserServiceのインスタンスを渡す
         fastapi_app.state.user_service = self.user_service
+        fastapi_app.state.write_governor = self.write_governor
+        fastapi_app.state.recruitment_locks = self.recruitment_service.recruitment_locks
+        fastapi_app.state.interaction_responder = self.interaction_responder
+        fastapi_app.state.dm_notifier = self.dm_notifier
+        fastapi_app.state.rate_limiter = self.rate_limiter
+        fastapi_app.state.interaction_dedupe = self.interaction_dedupe
 
-        # 永続Viewの登録
-        self.add_view(RecruitmentView(self.recruitment_service))
+        # 募集中の募集を読み込み、キャッシュと締切タイマーを準備する (on_ready前に温めておく)
+        started = time.perf_counter()
+        try:
+            count = self.recruitment_service.rehydrate_open_recruitments()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"Rehydrated {count} open recruitment(s) in {elapsed_ms:.0f} ms.")
+        except Exception as e:
+            # 読み込めなくても、各操作時にDBから取得するため起動は続ける
+            print(f"Failed to rehydrate open recruitments: {e!r}")
+
+        # 募集ボタンの登録 (custom_idに募集IDを埋め込んだボタンと、移行前の固定custom_idのボタン)
+        self.recruitment_buttons = RecruitmentButtonHandler(
+            self.recruitment_service,
+            self.write_governor,
+            self.embed_coalescer,
+            self.interaction_responder,
+            self.rate_limiter,
+            self.interaction_dedupe,
+        )
+        self.add_dynamic_items(JoinRecruitmentButton, LeaveRecruitmentButton)
+        self.add_view(LegacyRecruitmentView(self.recruitment_buttons))
 
         print("Loading cogs...")
         for filename in os.listdir("./cogs"):
@@ -93,7 +243,22 @@ class LaValorantBot(commands.Bot):
         print(f"🌐 Web server running on {settings.BASE_URL}")
         print("-" * 30)
 
+    async def on_guild_role_create(self, role: discord.Role):
+        self.role_registry.on_role_create(role)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.role_registry.on_role_delete(role)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self.role_registry.on_role_update(before, after)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.role_registry.invalidate(guild.id)
+
     async def close(self):
+        # 未反映の参加・取消をDBへ書き込んでから終了する
+        if self.recruitment_write_behind:
+            await self.recruitment_write_behind.drain(timeout=10)
         await super().close()
         if self.aiohttp_session:
             await self.aiohttp_session.close()
@@ -1,30 +1,49 @@
 # scheduler/daily_tasks.py (更新後の全文)
+import argparse
 import asyncio
+from typing import List
+
 import discord
 import aiohttp
 
 from config import settings
 from db.database import get_db_client
 from db.user_repository import UserRepository
-from db.activity_log_repository import ActivityLogRepository  # <--- インポート
+from db.activity_log_repository import ActivityLogRepository
+from db.job_lease_repository import JobLeaseRepository
+from db.recruitment_repository import RecruitmentRepository
+from db.task_run_repository import TaskRunRepository  # <--- インポート
 from api_clients.riot_api_client import RiotApiClient
+from api_clients.discord_write_governor import DiscordWriteGovernor
 from services.rank_service import RankService
 from services.activity_service import ActivityService  # <--- インポート
+from services.role_registry import RoleRegistry
+from services.scheduled_task_service import ScheduledTaskService
 
 
 class DailyTaskRunner:
     """
-    定期実行タスクを起動するためのクラス
+    定期実行タスクを単体で起動するためのクラス
+
+    通常はBot本体(cogs/scheduler_cog.py)のタスクループで実行されるため、
+    Botを停止している場合や手動で実行したい場合のフォールバックとして使う。
+    この場合、Gatewayに接続しないためメンバー一覧のキャッシュは利用できない。
     """
 
     def __init__(self):
         # 依存関係をここで解決・インスタンス化
-        self.bot = discord.Client(intents=discord.Intents.default())
+        # fetch_membersでギルドのメンバーを取得するため、members intentを有効にする
+        intents = discord.Intents.default()
+        intents.members = True
+        self.bot = discord.Client(intents=intents)
         self.db_client = get_db_client()
 
         # Repository層
         self.user_repo = UserRepository(self.db_client, settings.ENCRYPTION_KEY)
         self.activity_log_repo = ActivityLogRepository(self.db_client)  # <--- 追記
+        self.task_run_repo = TaskRunRepository(self.db_client)
+        self.job_lease_repo = JobLeaseRepository(self.db_client)
+        self.recruitment_repo = RecruitmentRepository(self.db_client)
 
         # APIクライアント層
         self.aiohttp_session = aiohttp.ClientSession()
@@ -36,11 +55,56 @@ class DailyTaskRunner:
             settings.RIOT_REDIRECT_URI,
         )
 
-        # Service層
-        self.rank_service = RankService(self.user_repo, self.riot_api_client)
+        # Service層 (ロール索引は両サービスで共有し、二重作成を防ぐ)
+        self.role_registry = RoleRegistry()
+        self.write_governor = DiscordWriteGovernor(
+            max_concurrency=settings.DISCORD_WRITE_CONCURRENCY,
+            reserved_foreground=settings.DISCORD_WRITE_RESERVED_FOREGROUND,
+        )
+        self.rank_service = RankService(
+            self.user_repo,
+            self.riot_api_client,
+            self.role_registry,
+            self.write_governor,
+            refresh_interval_minutes=settings.RANK_REFRESH_INTERVAL_MINUTES,
+            catch_up_limit=settings.RANK_REFRESH_CATCH_UP_LIMIT,
+            activity_log_repo=self.activity_log_repo,
+            daily_api_budget=settings.RANK_REFRESH_DAILY_API_BUDGET,
+        )
         self.activity_service = ActivityService(
-            self.user_repo, self.activity_log_repo
+            self.user_repo,
+            self.activity_log_repo,
+            self.role_registry,
+            self.write_governor,
         )  # <--- 追記
+        self.scheduled_task_service = ScheduledTaskService(
+            self.rank_service,
+            self.activity_service,
+            guild_concurrency=settings.DAILY_TASK_GUILD_CONCURRENCY,
+            # Gatewayに接続しないため、メンバーはRESTでまとめて取得する
+            use_gateway=False,
+            task_run_repo=self.task_run_repo,
+            job_lease_repo=self.job_lease_repo,
+            lease_ttl_seconds=settings.SCHEDULED_JOB_LEASE_TTL_SECONDS,
+            lease_wait_seconds=settings.SCHEDULED_JOB_LEASE_WAIT_SECONDS,
+            recruitment_repo=self.recruitment_repo,
+            archive_after_days=settings.RECRUITMENT_ARCHIVE_AFTER_DAYS,
+            archive_batch_size=settings.RECRUITMENT_ARCHIVE_BATCH_SIZE,
+        )
+
+    async def _discover_guilds(self) -> List[discord.Guild]:
+        """
+        Botが参加している全ギルドを取得する
+        DISCORD_GUILD_IDが設定されている場合は、そのギルドのみを対象にする
+        """
+        if settings.DISCORD_GUILD_ID:
+            return [await self.bot.fetch_guild(int(settings.DISCORD_GUILD_ID))]
+
+        guilds = []
+        async for partial_guild in self.bot.fetch_guilds(limit=None):
+            # fetch_guildsの結果にはロール情報が含まれないため、個別に取得し直す
+            guilds.append(await self.bot.fetch_guild(partial_guild.id))
+        return guilds
 
     async def run_all_tasks(self):
         """
@@ -48,18 +112,31 @@ class DailyTaskRunner:
         """
         await self.bot.login(settings.DISCORD_BOT_TOKEN)
         try:
-            guild = await self.bot.fetch_guild(int(settings.DISCORD_GUILD_ID))
-            if not guild:
-                print(f"Error: Guild with ID {settings.DISCORD_GUILD_ID} not found.")
+            guilds = await self._discover_guilds()
+            if not guilds:
+                print("Error: No guilds found for this bot.")
                 return
 
-            print("--- Running Daily Tasks ---")
-            # 1. ランク更新タスクの実行
-            await self.rank_service.update_all_user_ranks(guild)
+            await self.scheduled_task_service.run_daily_tasks(guilds)
+            await self.scheduled_task_service.run_recruitment_archive()
+
+        finally:
+            await self.aiohttp_session.close()
+            await self.bot.close()
+
+    async def run_rank_refresh_tick(self):
+        """
+        現在のスロットに該当するユーザーのランクだけを更新する
+        Heroku Schedulerから RANK_REFRESH_INTERVAL_MINUTES 間隔で実行する想定
+        """
+        await self.bot.login(settings.DISCORD_BOT_TOKEN)
+        try:
+            guilds = await self._discover_guilds()
+            if not guilds:
+                print("Error: No guilds found for this bot.")
+                return
 
-            # 2. 活動評価ロール付与タスクの実行
-            await self.activity_service.update_activity_roles(guild)  # <--- 追記
-            print("--- Daily Tasks Finished ---")
+            await self.scheduled_task_service.run_rank_refresh_tick(guilds)
 
         finally:
             await self.aiohttp_session.close()
@@ -67,8 +144,18 @@ class DailyTaskRunner:
 
 
 if __name__ == "__main__":
-    if not settings.DISCORD_GUILD_ID:
-        raise ValueError("DISCORD_GUILD_ID must be set in your .env file.")
+    parser = argparse.ArgumentParser(description="LaValorant scheduled tasks")
+    parser.add_argument(
+        "task",
+        nargs="?",
+        default="daily",
+        choices=["daily", "rank-tick"],
+        help="daily: 毎日のタスク / rank-tick: ランクのローリング更新 (数分おき)",
+    )
+    args = parser.parse_args()
 
     runner = DailyTaskRunner()
-    asyncio.run(runner.run_all_tasks())
+    if args.task == "rank-tick":
+        asyncio.run(runner.run_rank_refresh_tick())
+    else:
+        asyncio.run(runner.run_all_tasks())
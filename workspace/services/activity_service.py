@@ -1,12 +1,21 @@
 # services/activity_service.py
 
+import asyncio
 from datetime import datetime, timedelta
-from typing import Set
+from typing import Dict, List, Optional, Set
 
 import discord
 
 from db.user_repository import UserRepository
 from db.activity_log_repository import ActivityLogRepository
+from services.member_resolver import MemberResolver
+from services.role_registry import RoleRegistry
+from services.task_checkpoint import PhaseCheckpoint, TaskCheckpointStore
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    member_roles_bucket,
+)
 
 # ロール名を定数化
 REGULAR_MEMBER_ROLE_NAME = "レギュラーメンバー"
@@ -19,10 +28,18 @@ class ActivityService:
     """
 
     def __init__(
-        self, user_repo: UserRepository, activity_log_repo: ActivityLogRepository
+        self,
+        user_repo: UserRepository,
+        activity_log_repo: ActivityLogRepository,
+        role_registry: RoleRegistry,
+        write_governor: DiscordWriteGovernor,
     ):
         self.user_repo = user_repo
         self.activity_log_repo = activity_log_repo
+        # RankServiceと共有するロール索引 (ロールの二重作成を防ぐ)
+        self.role_registry = role_registry
+        # ロール変更はバックグラウンド優先度で、Bot全体で共有する書き込み調停に通す
+        self.write_governor = write_governor
 
     async def _get_or_create_role(
         self, guild: discord.Guild, role_name: str, color: discord.Color
@@ -30,31 +47,81 @@ class ActivityService:
         """
         指定された名前のロールを探し、存在しない場合は作成する
         """
-        existing_role = discord.utils.get(guild.roles, name=role_name)
-        if existing_role:
-            return existing_role
-        return await guild.create_role(
-            name=role_name, color=color, reason="Activity role auto-creation"
+        return await self.role_registry.get_or_create_role(
+            guild, role_name, color=color, reason="Activity role auto-creation"
         )
 
+    async def _add_role(self, member: discord.Member, role: discord.Role, reason: str):
+        await self.write_governor.submit(
+            WritePriority.ROLE_EDIT,
+            member_roles_bucket(member.guild.id),
+            lambda: member.add_roles(role, reason=reason),
+        )
+
+    async def _remove_role(
+        self, member: discord.Member, role: discord.Role, reason: str
+    ):
+        await self.write_governor.submit(
+            WritePriority.ROLE_EDIT,
+            member_roles_bucket(member.guild.id),
+            lambda: member.remove_roles(role, reason=reason),
+        )
+
+    async def _load_join_counts(
+        self, start_date: datetime, end_date: datetime
+    ) -> Dict[str, int]:
+        """
+        期間内の参加回数をユーザーごとにまとめて取得する
+        (メンバーごとにクエリを発行せず、イベントループも止めないようスレッドで実行する)
+        """
+        return await asyncio.to_thread(
+            self.activity_log_repo.get_join_counts_by_user_in_period,
+            start_date,
+            end_date,
+        )
+
+    def _ordered_for_checkpoint(
+        self, members: List[discord.Member], checkpoint: Optional[PhaseCheckpoint]
+    ) -> List[discord.Member]:
+        """
+        進捗を記録する場合はID順に並べ、前回の実行で処理済みのメンバーを除く
+        """
+        if checkpoint is None:
+            return members
+        return [
+            m
+            for m in sorted(members, key=lambda m: m.id)
+            if not checkpoint.should_skip(m.id)
+        ]
+
     async def _update_regular_members_role(
-        self, guild: discord.Guild, start_date: datetime, end_date: datetime
+        self,
+        guild: discord.Guild,
+        start_date: datetime,
+        end_date: datetime,
+        members: Optional[List[discord.Member]] = None,
+        checkpoint: Optional[PhaseCheckpoint] = None,
+        join_counts: Optional[Dict[str, int]] = None,
     ):
         """
         「レギュラーメンバー」ロールを更新する
         """
+        if checkpoint is not None and checkpoint.completed:
+            return
         print("Updating regular member roles...")
         role = await self._get_or_create_role(
             guild, REGULAR_MEMBER_ROLE_NAME, discord.Color.gold()
         )
 
+        members = guild.members if members is None else members
+        if join_counts is None:
+            join_counts = await self._load_join_counts(start_date, end_date)
+
         member_joins = []
-        for member in guild.members:
+        for member in members:
             if member.bot:
                 continue
-            join_count = self.activity_log_repo.get_user_join_count_in_period(
-                str(member.id), start_date, end_date
-            )
+            join_count = join_counts.get(str(member.id), 0)
             member_joins.append({"member": member, "count": join_count})
 
         member_joins.sort(key=lambda x: x["count"], reverse=True)
@@ -63,7 +130,7 @@ class ActivityService:
             item["member"] for item in member_joins[:5] if item["count"] > 0
         }
 
-        for member in guild.members:
+        for member in self._ordered_for_checkpoint(members, checkpoint):
             if member.bot:
                 continue
 
@@ -72,41 +139,59 @@ class ActivityService:
             should_have_role = member in new_regulars
 
             if should_have_role and not has_role:
-                await member.add_roles(role, reason="Top 5 active member")
+                await self._add_role(member, role, reason="Top 5 active member")
                 print(f"Added '{REGULAR_MEMBER_ROLE_NAME}' to {member.name}")
             elif not should_have_role and has_role:
-                await member.remove_roles(
-                    role, reason="No longer a top 5 active member"
+                await self._remove_role(
+                    member, role, reason="No longer a top 5 active member"
                 )
                 print(f"Removed '{REGULAR_MEMBER_ROLE_NAME}' from {member.name}")
 
+            if checkpoint is not None:
+                await checkpoint.advance(member.id)
+
+        if checkpoint is not None:
+            await checkpoint.complete()
+
     async def _update_ghost_members_role(
-        self, guild: discord.Guild, start_date: datetime, end_date: datetime
+        self,
+        guild: discord.Guild,
+        start_date: datetime,
+        end_date: datetime,
+        members: Optional[List[discord.Member]] = None,
+        checkpoint: Optional[PhaseCheckpoint] = None,
+        join_counts: Optional[Dict[str, int]] = None,
     ):
         """
         「幽霊部員」ロールを更新する
         """
+        if checkpoint is not None and checkpoint.completed:
+            return
         print("Updating ghost member roles...")
         role = await self._get_or_create_role(
             guild, GHOST_MEMBER_ROLE_NAME, discord.Color.dark_grey()
         )
 
-        total_recruitments = (
-            self.activity_log_repo.get_guild_total_recruitment_count_in_period(
-                str(guild.id), start_date, end_date
-            )
+        total_recruitments = await asyncio.to_thread(
+            self.activity_log_repo.get_guild_total_recruitment_count_in_period,
+            str(guild.id),
+            start_date,
+            end_date,
         )
         if total_recruitments == 0:
             print("No recruitments in the period. Skipping ghost member update.")
+            if checkpoint is not None:
+                await checkpoint.complete()
             return
 
-        for member in guild.members:
+        members = guild.members if members is None else members
+        if join_counts is None:
+            join_counts = await self._load_join_counts(start_date, end_date)
+        for member in self._ordered_for_checkpoint(members, checkpoint):
             if member.bot:
                 continue
 
-            join_count = self.activity_log_repo.get_user_join_count_in_period(
-                str(member.id), start_date, end_date
-            )
+            join_count = join_counts.get(str(member.id), 0)
             non_participation_rate = (
                 (total_recruitments - join_count) / total_recruitments
                 if total_recruitments > 0
@@ -118,18 +203,52 @@ class ActivityService:
             should_have_role = non_participation_rate > 0.9
 
             if should_have_role and not has_role:
-                await member.add_roles(role, reason="Non-participation rate > 90%")
+                await self._add_role(member, role, reason="Non-participation rate > 90%")
                 print(f"Added '{GHOST_MEMBER_ROLE_NAME}' to {member.name}")
             elif not should_have_role and has_role:
-                await member.remove_roles(role, reason="Participation rate increased")
+                await self._remove_role(
+                    member, role, reason="Participation rate increased"
+                )
                 print(f"Removed '{GHOST_MEMBER_ROLE_NAME}' from {member.name}")
 
-    async def update_activity_roles(self, guild: discord.Guild):
+            if checkpoint is not None:
+                await checkpoint.advance(member.id)
+
+        if checkpoint is not None:
+            await checkpoint.complete()
+
+    async def update_activity_roles(
+        self,
+        guild: discord.Guild,
+        member_resolver: Optional[MemberResolver] = None,
+        checkpoints: Optional[TaskCheckpointStore] = None,
+    ):
         """
         全ての活動評価ロールを更新するエントリーポイント
+        checkpointsが指定された場合は、前回の実行の進捗から再開する
         """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=30)
 
-        await self._update_regular_members_role(guild, start_date, end_date)
-        await self._update_ghost_members_role(guild, start_date, end_date)
+        # Gatewayのキャッシュが無い場合でも全メンバーを対象にできるよう、まとめて解決する
+        if member_resolver is not None:
+            members = await member_resolver.all_members(guild)
+        else:
+            members = list(guild.members)
+
+        regular_checkpoint = ghost_checkpoint = None
+        if checkpoints is not None:
+            regular_checkpoint = await checkpoints.phase(
+                f"activity:{guild.id}:regular"
+            )
+            ghost_checkpoint = await checkpoints.phase(f"activity:{guild.id}:ghost")
+
+        # 参加回数は両方のロールの判定で使うため、ギルドごとに1回だけまとめて取得する
+        join_counts = await self._load_join_counts(start_date, end_date)
+
+        await self._update_regular_members_role(
+            guild, start_date, end_date, members, regular_checkpoint, join_counts
+        )
+        await self._update_ghost_members_role(
+            guild, start_date, end_date, members, ghost_checkpoint, join_counts
+        )
@@ -0,0 +1,159 @@
+# services/dm_notifier.py
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import discord
+
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    dm_bucket,
+)
+
+
+class DeliveryReport:
+    """
+    DM一斉送信の結果 (user_idごとの送信成否)
+    """
+
+    def __init__(self):
+        self.sent: List[str] = []
+        # DMを受け付けていないユーザー (サーバー設定やブロックによるもの)
+        self.forbidden: List[str] = []
+        # user_id -> 失敗理由
+        self.failed: Dict[str, str] = {}
+
+    @property
+    def undelivered(self) -> List[str]:
+        return self.forbidden + list(self.failed)
+
+    def summary(self) -> str:
+        return (
+            f"sent={len(self.sent)} forbidden={len(self.forbidden)} "
+            f"failed={len(self.failed)}"
+        )
+
+
+class DMNotifier:
+    """
+    複数のユーザーへDMを並行して送るクラス
+
+    ユーザーをREST(fetch_user)で取得せず、DMチャンネルはキャッシュ → create_dm の順に解決して
+    使い回す。送信は同時実行数を制限して並行に行い、書き込みはDiscordWriteGovernorの
+    DM優先度(最も低い)で実行するため、募集操作の応答を妨げない。
+    """
+
+    # 保持するDMチャンネル数の上限 (古いものから破棄する)
+    MAX_CHANNELS = 1024
+
+    def __init__(
+        self,
+        client: discord.Client,
+        write_governor: DiscordWriteGovernor,
+        concurrency: int = 5,
+    ):
+        self.client = client
+        self.write_governor = write_governor
+        self.concurrency = concurrency
+        self._channels: "OrderedDict[int, discord.DMChannel]" = OrderedDict()
+        # 実行中のバックグラウンド送信 (GCで破棄されないよう参照を保持する)
+        self._tasks: Set[asyncio.Task] = set()
+
+        # メトリクス
+        self.sent = 0
+        self.forbidden = 0
+        self.failed = 0
+        self.channels_created = 0
+
+    async def _dm_channel(self, user_id: int) -> discord.DMChannel:
+        channel = self._channels.get(user_id)
+        if channel is None:
+            user = self.client.get_user(user_id)
+            channel = user.dm_channel if user else None
+        if channel is None:
+            # create_dmはdiscord.pyのキャッシュにあればリクエストを発行しない
+            channel = await self.client.create_dm(discord.Object(id=user_id))
+            self.channels_created += 1
+        self._channels[user_id] = channel
+        self._channels.move_to_end(user_id)
+        while len(self._channels) > self.MAX_CHANNELS:
+            self._channels.popitem(last=False)
+        return channel
+
+    async def _send_one(
+        self,
+        user_id: str,
+        content: str,
+        semaphore: asyncio.Semaphore,
+        report: DeliveryReport,
+    ):
+        async with semaphore:
+            try:
+                channel = await self._dm_channel(int(user_id))
+                await self.write_governor.submit(
+                    WritePriority.DM,
+                    dm_bucket(user_id),
+                    lambda: channel.send(content),
+                )
+                report.sent.append(user_id)
+                self.sent += 1
+            except discord.Forbidden:
+                report.forbidden.append(user_id)
+                self.forbidden += 1
+            except Exception as e:
+                report.failed[user_id] = repr(e)
+                self.failed += 1
+
+    async def notify(self, user_ids: Iterable[str], content: str) -> DeliveryReport:
+        """
+        ユーザーへDMを送り、全員分の送信が終わるまで待って結果を返す
+        """
+        report = DeliveryReport()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(
+            *(
+                self._send_one(user_id, content, semaphore, report)
+                for user_id in dict.fromkeys(user_ids)
+            )
+        )
+        return report
+
+    def dispatch(
+        self,
+        user_ids: Iterable[str],
+        content: str,
+        label: str,
+        on_complete: Optional[Callable[[DeliveryReport], Awaitable[None]]] = None,
+    ) -> "asyncio.Task[DeliveryReport]":
+        """
+        DMの送信をバックグラウンドで開始する (インタラクションの応答を待たせない)
+        終了時に送信結果をログに出し、on_completeがあれば結果を渡して呼び出す
+        """
+        user_ids = list(user_ids)
+
+        async def run() -> DeliveryReport:
+            report = await self.notify(user_ids, content)
+            print(f"DM notification ({label}): {report.summary()}")
+            for user_id, reason in report.failed.items():
+                print(f"  Failed to send DM to {user_id}: {reason}")
+            if on_complete:
+                try:
+                    await on_complete(report)
+                except Exception as e:
+                    print(f"Failed to report DM notification ({label}): {e!r}")
+            return report
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._tasks),
+            "sent": self.sent,
+            "forbidden": self.forbidden,
+            "failed": self.failed,
+            "channels_created": self.channels_created,
+        }
@@ -0,0 +1,97 @@
+# services/interaction_dedupe.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Entry:
+    def __init__(self, action: str, future: asyncio.Future, expires_at: float):
+        self.action = action
+        self.future = future
+        self.expires_at = expires_at
+
+
+class InteractionDeduplicator:
+    """
+    ダブルクリックや再送で短時間に繰り返された同じ操作をまとめるクラス
+
+    (ユーザー, メッセージ)ごとに直近の操作を ttl 秒間保持し、同じ操作が繰り返された場合は
+    処理を実行せずに最初の操作の結果(実行中なら完了を待った結果)を返す。
+    別の操作(参加→取消など)が来た場合はその操作で置き換えるため、意図した連続操作は妨げない。
+    例外で終わった操作と、keep が False を返した結果(混雑で実行できなかった場合など)は保持しない。
+    """
+
+    def __init__(self, ttl: float = 3.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (user_id, message_id) -> 直近の操作
+        self._entries: "OrderedDict[Tuple[Hashable, Hashable], _Entry]" = OrderedDict()
+
+        # メトリクス
+        self.hits = 0
+        self.misses = 0
+
+    async def run(
+        self,
+        user_id: Hashable,
+        message_id: Hashable,
+        action: str,
+        factory: Callable[[], Awaitable[T]],
+        keep: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """
+        操作を実行する。ttl 秒以内に同じ操作が実行されていれば、その結果を返す
+        keep が False を返した結果は、実行中に待っていた操作にだけ返し、以降の操作では再実行する
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        key = (user_id, message_id)
+        entry = self._entries.get(key)
+        if entry and entry.action == action and entry.expires_at > now:
+            self.hits += 1
+            # 待機中のキャンセルで最初の操作まで止めないようにする
+            return await asyncio.shield(entry.future)
+
+        self.misses += 1
+        future = loop.create_future()
+        entry = _Entry(action, future, now + self.ttl)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict(now)
+
+        try:
+            result = await factory()
+        except BaseException as e:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # 待っている操作が無い場合に「取得されなかった例外」の警告を出さない
+                future.exception()
+            raise
+        if keep is not None and not keep(result):
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        future.set_result(result)
+        return result
+
+    def _evict(self, now: float):
+        # 古い順に並んでいるため、先頭から期限切れのものと上限を超えた分を取り除く
+        # (取り除いた実行中の操作も、既に待っている操作には結果を返す)
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
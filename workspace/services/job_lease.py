@@ -0,0 +1,119 @@
+# services/job_lease.py
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+from db.job_lease_repository import JobLeaseRepository
+
+
+def default_holder_id() -> str:
+    """
+    このプロセスを識別するリース保持者ID (ホスト名:PID:ランダム値)
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class JobLease:
+    """
+    定期実行タスクが多重に実行されないよう、DB上のリースで排他制御するクラス
+
+    保持中はTTLの1/3ごとにハートビートで有効期限を延長する。保持者のプロセスが
+    落ちた場合は延長されなくなるため、TTL経過後に他のプロセスが取得できる。
+    Botプロセス内でも実行するため、DBへのアクセスはスレッドで行う。
+    """
+
+    def __init__(
+        self,
+        lease_repo: JobLeaseRepository,
+        job_name: str,
+        holder_id: str,
+        ttl_seconds: int = 300,
+    ):
+        self.lease_repo = lease_repo
+        self.job_name = job_name
+        self.holder_id = holder_id
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_interval = max(1.0, ttl_seconds / 3)
+        # ハートビートに失敗し、他のプロセスにリースを奪われた場合にTrue
+        self.lost = False
+
+    async def acquire(
+        self, wait_seconds: float = 0, poll_interval: float = 5.0
+    ) -> bool:
+        """
+        リースを取得する。wait_secondsが0の場合は取得できなければすぐに諦める
+        """
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            if await asyncio.to_thread(
+                self.lease_repo.try_acquire,
+                self.job_name,
+                self.holder_id,
+                self.ttl_seconds,
+            ):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(poll_interval, remaining))
+
+    async def release(self):
+        try:
+            await asyncio.to_thread(
+                self.lease_repo.release, self.job_name, self.holder_id
+            )
+        except Exception as e:
+            # 解放に失敗してもTTL経過後には失効する
+            print(f"Failed to release lease '{self.job_name}': {e!r}")
+
+    async def _heartbeat(self, job: asyncio.Future):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                renewed = await asyncio.to_thread(
+                    self.lease_repo.renew,
+                    self.job_name,
+                    self.holder_id,
+                    self.ttl_seconds,
+                )
+            except Exception as e:
+                # 一時的な障害はTTL内であれば次のハートビートで再試行する
+                print(f"Lease heartbeat failed for '{self.job_name}': {e!r}")
+                continue
+            if not renewed:
+                # 他のプロセスが処理を引き継いでいるため、ロールの取り合いを避けて中断する
+                print(f"Lease '{self.job_name}' was lost. Stopping the job.")
+                self.lost = True
+                job.cancel()
+                return
+
+    async def run(
+        self,
+        factory: Callable[[], Awaitable[None]],
+        wait_seconds: float = 0,
+    ) -> bool:
+        """
+        リースを取得して処理を実行する
+
+        Returns:
+            bool: 処理を実行した場合はTrue。他のプロセスが実行中でスキップした場合はFalse
+        """
+        if not await self.acquire(wait_seconds):
+            print(f"Job '{self.job_name}' is already running elsewhere. Skipping.")
+            return False
+
+        job = asyncio.ensure_future(factory())
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await job
+        except asyncio.CancelledError:
+            if not self.lost:
+                raise
+        finally:
+            heartbeat.cancel()
+            if not self.lost:
+                await self.release()
+        return True
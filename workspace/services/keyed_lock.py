@@ -0,0 +1,71 @@
+# services/keyed_lock.py
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+
+class KeyedLock:
+    """
+    キー(募集IDなど)ごとの非同期ロック
+
+    同じキーへの操作は到着順に1つずつ実行される。待機中の操作が無くなったキーの
+    ロックは破棄するため、キーの数だけメモリが増え続けることはない。
+    """
+
+    def __init__(self, timeout: Optional[float] = 5.0):
+        # 取得を待つ時間の上限 (Noneの場合は無制限)
+        self.timeout = timeout
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+        # メトリクス
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def hold(self, key: object) -> AsyncIterator[None]:
+        """
+        キーのロックを取得する。上限までに取得できなければasyncio.TimeoutErrorを送出する
+        """
+        key = str(key)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            started = time.perf_counter()
+            if lock.locked():
+                self.contended += 1
+            try:
+                await asyncio.wait_for(lock.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise
+
+            waited = time.perf_counter() - started
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._users[key] -= 1
+            if self._users[key] == 0:
+                del self._users[key]
+                del self._locks[key]
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "active_keys": len(self._locks),
+            "acquired": self.acquired,
+            "contended": self.contended,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": (self.total_wait / self.acquired * 1000)
+            if self.acquired
+            else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
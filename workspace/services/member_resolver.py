@@ -0,0 +1,177 @@
+# services/member_resolver.py
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+
+import discord
+
+
+class MemberResolver:
+    """
+    バッチ処理で必要なメンバーをまとめて解決し、1回の実行の間キャッシュするクラス
+
+    解決の順序:
+        1. Gatewayのメンバーキャッシュ (guild.get_member)
+        2. Gatewayの query_members(user_ids=...) で100件ずつ (Gateway接続時のみ)
+        3. REST の fetch_members でギルドのメンバーをページングして取得
+           (members intentが無いなどで失敗した場合は fetch_member で1人ずつ取得)
+    ギルドのチャンクが完了している場合、キャッシュにいないユーザーは未参加とみなす。
+    1つのインスタンスを複数の処理で並行に使っても、ギルドの全メンバー取得は1回にまとめる。
+    """
+
+    # Gatewayの query_members で一度に指定できるユーザーIDの上限
+    QUERY_CHUNK_SIZE = 100
+
+    def __init__(self, use_gateway: bool = True):
+        # Gatewayに接続していない(REST専用の)クライアントではFalseにする
+        self.use_gateway = use_gateway
+        # guild_id -> {user_id: Member}
+        self._members: Dict[int, Dict[int, discord.Member]] = {}
+        # guild_id -> 解決を試みたuser_id (未参加ユーザーを再検索しないため)
+        self._attempted: Dict[int, Set[int]] = {}
+        # guild_id -> 全メンバー取得済みかどうか
+        self._fully_loaded: Set[int] = set()
+        # guild_id -> 実行中の全メンバー取得 (シングルフライト用)
+        self._loading: Dict[int, asyncio.Task] = {}
+        # 全メンバーを取得できなかったguild_id (この実行の間は再試行しない)
+        self._fetch_failed: Set[int] = set()
+        # 発行したリクエスト数 (ログ用)
+        self.request_count = 0
+
+    def _cache(self, guild: discord.Guild) -> Dict[int, discord.Member]:
+        return self._members.setdefault(guild.id, {})
+
+    async def prefetch(
+        self, guild: discord.Guild, user_ids: Iterable[int]
+    ) -> Dict[int, discord.Member]:
+        """
+        指定ユーザーのメンバー情報をまとめて取得する
+
+        Returns:
+            Dict[int, discord.Member]: 解決できたメンバー (user_id -> Member)
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        cache = self._cache(guild)
+        attempted = self._attempted.setdefault(guild.id, set())
+
+        # 1. Gatewayのメンバーキャッシュ
+        missing = []
+        for user_id in user_ids:
+            if user_id in cache or user_id in attempted:
+                continue
+            member = guild.get_member(user_id)
+            if member:
+                cache[user_id] = member
+            else:
+                missing.append(user_id)
+
+        if missing and not guild.chunked and guild.id not in self._fully_loaded:
+            # 2. Gatewayでまとめて問い合わせ
+            if self.use_gateway:
+                missing = await self._query_gateway(guild, missing)
+            # 3. RESTでページング取得 (できない場合は1人ずつ取得)
+            if missing and not await self._fetch_all(guild):
+                await self._fetch_each(guild, missing)
+
+        attempted.update(user_ids)
+        return {uid: cache[uid] for uid in user_ids if uid in cache}
+
+    async def _query_gateway(
+        self, guild: discord.Guild, user_ids: List[int]
+    ) -> List[int]:
+        """
+        query_membersで解決し、解決できなかったuser_idを返す
+        """
+        cache = self._cache(guild)
+        for i in range(0, len(user_ids), self.QUERY_CHUNK_SIZE):
+            chunk = user_ids[i : i + self.QUERY_CHUNK_SIZE]
+            try:
+                self.request_count += 1
+                members = await guild.query_members(
+                    user_ids=chunk, limit=len(chunk), cache=True
+                )
+            except Exception as e:
+                # タイムアウト等の場合は残りをRESTでの取得に任せる
+                print(f"query_members failed for guild {guild.id}: {e!r}")
+                break
+            for member in members:
+                cache[member.id] = member
+        return [uid for uid in user_ids if uid not in cache]
+
+    async def _fetch_all(self, guild: discord.Guild) -> bool:
+        """
+        RESTでギルドの全メンバーを取得する。同じギルドの取得が実行中であればその完了を待つ
+
+        Returns:
+            bool: 全メンバーを取得できた場合はTrue
+        """
+        if guild.id in self._fully_loaded:
+            return True
+        if guild.id in self._fetch_failed:
+            return False
+        task = self._loading.get(guild.id)
+        if task is None:
+            task = asyncio.create_task(self._load_all(guild))
+            self._loading[guild.id] = task
+            task.add_done_callback(lambda _: self._loading.pop(guild.id, None))
+        # 待機中のキャンセルで、他の処理が待っている取得まで止めないようにする
+        return await asyncio.shield(task)
+
+    async def _load_all(self, guild: discord.Guild) -> bool:
+        cache = self._cache(guild)
+        count = 0
+        try:
+            # 1リクエストあたり1000件
+            async for member in guild.fetch_members(limit=None):
+                cache[member.id] = member
+                count += 1
+        except (discord.ClientException, discord.HTTPException) as e:
+            # members intentが無効なクライアントなど
+            print(f"fetch_members failed for guild {guild.id}: {e!r}")
+            self._fetch_failed.add(guild.id)
+            return False
+        self.request_count += max(1, -(-count // 1000))
+        self._fully_loaded.add(guild.id)
+        return True
+
+    async def _fetch_each(self, guild: discord.Guild, user_ids: List[int]):
+        """
+        fetch_memberで1人ずつ取得する (全メンバーを取得できない場合の代替)
+        """
+        cache = self._cache(guild)
+        for user_id in user_ids:
+            if user_id in cache:
+                continue
+            self.request_count += 1
+            try:
+                cache[user_id] = await guild.fetch_member(user_id)
+            except discord.NotFound:
+                continue
+            except discord.HTTPException as e:
+                print(f"fetch_member failed for {user_id} in guild {guild.id}: {e!r}")
+
+    def get_member(
+        self, guild: discord.Guild, user_id: int
+    ) -> Optional[discord.Member]:
+        """
+        解決済みのメンバーを返す。prefetch済みでなければGatewayのキャッシュのみを参照する
+        """
+        member = self._members.get(guild.id, {}).get(user_id)
+        return member or guild.get_member(user_id)
+
+    async def all_members(self, guild: discord.Guild) -> List[discord.Member]:
+        """
+        ギルドの全メンバーを返す (活動評価ロールのように全員を対象にする処理用)
+        """
+        if guild.chunked:
+            return list(guild.members)
+        if guild.id not in self._fully_loaded:
+            if self.use_gateway:
+                self.request_count += 1
+                await guild.chunk()
+                return list(guild.members)
+            if not await self._fetch_all(guild):
+                # 全メンバーを取得できない場合は、解決済みのメンバーだけを対象にする
+                members = {member.id: member for member in guild.members}
+                members.update(self._cache(guild))
+                return list(members.values())
+        return list(self._cache(guild).values())
@@ -1,9 +1,22 @@
 # services/rank_service.py
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
+
 import discord
-from typing import List, Dict
 
 from db.user_repository import UserRepository, User
+from db.activity_log_repository import ActivityLogRepository
 from api_clients.riot_api_client import RiotApiClient
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    member_roles_bucket,
+)
+from services.member_resolver import MemberResolver
+from services.role_registry import RoleRegistry, RoleSpec
+from services.task_checkpoint import PhaseCheckpoint
 
 # VALORANTのランク階層を定義
 # ロール名や順序の基準となる
@@ -20,33 +33,119 @@ RANK_TIERS = [
     "Radiant",
 ]
 
+# 各ランクのロール色 (VALORANTのランクアイコンの色を基準にしている)
+RANK_TIER_COLORS: Dict[str, discord.Color] = {
+    "Unrated": discord.Color.default(),
+    "Iron": discord.Color(0x5A5A5A),
+    "Bronze": discord.Color(0xA5855D),
+    "Silver": discord.Color(0xC0C6C6),
+    "Gold": discord.Color(0xE6B64C),
+    "Platinum": discord.Color(0x59A9B6),
+    "Diamond": discord.Color(0xB489C6),
+    "Ascendant": discord.Color(0x2E9E5B),
+    "Immortal": discord.Color(0xB5344A),
+    "Radiant": discord.Color(0xFFF3AA),
+}
+
+RANK_ROLE_PREFIX = "Valorant - "
+
+
+def rank_role_name(rank_tier: str) -> str:
+    """
+    ランクのティア名から "Valorant - Gold" のようなロール名を生成する
+    """
+    return f"{RANK_ROLE_PREFIX}{rank_tier}"
+
+
+RANK_ROLE_SPECS = [
+    RoleSpec(rank_role_name(tier), RANK_TIER_COLORS[tier], hoist=True)
+    for tier in RANK_TIERS
+]
+
+# 更新間隔の判定に使う許容幅
+# スロット到来時は (間隔 - 許容幅) 以上、スロット外では (間隔 + 許容幅) 以上経過で更新対象にする
+REFRESH_TOLERANCE = timedelta(hours=1)
+
+# --- 更新優先度 ---
+# 直近の参加回数を数える期間
+PRIORITY_ACTIVITY_WINDOW = timedelta(days=14)
+# この期間内にランクが変わったユーザーは、今後も変わりやすいとみなして加点する
+RECENT_RANK_CHANGE_WINDOW = timedelta(days=7)
+RECENT_RANK_CHANGE_BONUS = 3.0
+# 優先度スコアの下限と、それに対応する更新間隔 (スコアの高い順)
+PRIORITY_REFRESH_INTERVALS = [
+    (5.0, timedelta(days=1)),
+    (1.0, timedelta(days=3)),
+    (0.0, timedelta(days=7)),
+]
+DEFAULT_REFRESH_INTERVAL = timedelta(days=1)
+# 最も短い更新間隔 (これより最近に更新したユーザーは、どの優先度でも更新対象にならない)
+MIN_REFRESH_INTERVAL = min(
+    DEFAULT_REFRESH_INTERVAL, *(interval for _, interval in PRIORITY_REFRESH_INTERVALS)
+)
+# 1日のAPI呼び出し予算のうち、ローリング更新に割り当てる割合 (残りは取りこぼし救済用)
+ROLLING_BUDGET_SHARE = 0.9
+
+
+def compute_refresh_slot(discord_id: str, slot_count: int) -> int:
+    """
+    discord_idのハッシュから、ユーザーのランク更新スロットを決定する
+    プロセスをまたいでも同じ値になるよう、組み込みのhash()ではなくSHA-256を使う
+    """
+    digest = hashlib.sha256(discord_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % slot_count
+
 
 class RankService:
     """
     ランク情報の取得と、それに応じたDiscordロールの管理を責務に持つ
     """
 
-    def __init__(self, user_repo: UserRepository, riot_client: RiotApiClient):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        riot_client: RiotApiClient,
+        role_registry: RoleRegistry,
+        write_governor: DiscordWriteGovernor,
+        refresh_interval_minutes: int = 10,
+        catch_up_limit: int = 5,
+        activity_log_repo: Optional[ActivityLogRepository] = None,
+        daily_api_budget: Optional[int] = None,
+    ):
         self.user_repo = user_repo
         self.riot_client = riot_client
+        # ローリング更新の間隔と、1回あたりに救済する取りこぼしユーザー数
+        self.refresh_interval_minutes = refresh_interval_minutes
+        self.catch_up_limit = catch_up_limit
+        # 指定された場合のみ、活動状況に応じて更新頻度を変える
+        self.activity_log_repo = activity_log_repo
+        # 1日あたりのRiot API呼び出し予算 (Noneの場合は無制限)
+        self.daily_api_budget = daily_api_budget
+        # ActivityServiceと共有するロール索引 (ロールの二重作成を防ぐ)
+        self.role_registry = role_registry
+        # ロール変更はバックグラウンド優先度で、Bot全体で共有する書き込み調停に通す
+        self.write_governor = write_governor
 
-    async def _get_or_create_role(
-        self, guild: discord.Guild, role_name: str, color: discord.Color
-    ) -> discord.Role:
+    async def ensure_rank_roles(self, guild: discord.Guild) -> Dict[str, discord.Role]:
         """
-        指定された名前のロールを探し、存在しない場合は作成する
+        全ランクのロールを色付きで事前に作成しておく
         """
-        existing_role = discord.utils.get(guild.roles, name=role_name)
-        if existing_role:
-            return existing_role
+        return await self.role_registry.ensure_roles(
+            guild, RANK_ROLE_SPECS, reason="Valorant rank role auto-creation"
+        )
 
-        # ロールが存在しない場合は作成
-        return await guild.create_role(
-            name=role_name,
-            color=color,
-            hoist=True,
-            reason="Valorant rank role auto-creation",
+    async def _ensure_rank_roles_in_guilds(self, guilds: List[discord.Guild]):
+        """
+        各ギルドのランクロールを並行に用意する
+        権限不足などで失敗したギルドはログに残し、他のギルドの処理は続ける
+        """
+        results = await asyncio.gather(
+            *(self.ensure_rank_roles(guild) for guild in guilds),
+            return_exceptions=True,
         )
+        for guild, result in zip(guilds, results):
+            if isinstance(result, Exception):
+                print(f"[{guild.name}] Failed to prepare rank roles: {result!r}")
 
     async def _update_discord_role(
         self, guild: discord.Guild, member: discord.Member, new_rank_tier: str
@@ -57,27 +156,38 @@ class RankService:
         if not member:
             return
 
-        # "Valorant - Gold" のようなロール名を生成
-        target_role_name = f"Valorant - {new_rank_tier}"
+        target_role_name = rank_role_name(new_rank_tier)
 
         # 既存のランク関連ロールを特定
         roles_to_remove = [
             role
             for role in member.roles
-            if role.name.startswith("Valorant - ") and role.name != target_role_name
+            if role.name.startswith(RANK_ROLE_PREFIX) and role.name != target_role_name
         ]
 
         # 新しいランクのロールを取得または作成
-        # TODO: 各ランクの色を定義しておくと良い
-        target_role = await self._get_or_create_role(
-            guild, target_role_name, discord.Color.default()
+        target_role = await self.role_registry.get_or_create_role(
+            guild,
+            target_role_name,
+            color=RANK_TIER_COLORS.get(new_rank_tier, discord.Color.default()),
+            hoist=True,
+            reason="Valorant rank role auto-creation",
         )
 
         # ロールを更新
+        bucket = member_roles_bucket(guild.id)
         if roles_to_remove:
-            await member.remove_roles(*roles_to_remove, reason="Rank update")
+            await self.write_governor.submit(
+                WritePriority.ROLE_EDIT,
+                bucket,
+                lambda: member.remove_roles(*roles_to_remove, reason="Rank update"),
+            )
         if target_role not in member.roles:
-            await member.add_roles(target_role, reason="Rank update")
+            await self.write_governor.submit(
+                WritePriority.ROLE_EDIT,
+                bucket,
+                lambda: member.add_roles(target_role, reason="Rank update"),
+            )
 
     def _parse_rank_tier(self, rank_data: Dict) -> str:
         """
@@ -90,17 +200,46 @@ class RankService:
         except (TypeError, KeyError):
             return "Unrated"
 
-    async def update_all_user_ranks(self, guild: discord.Guild):
+    async def _refresh_users(
+        self,
+        guilds: List[discord.Guild],
+        users: List[User],
+        member_resolver: Optional[MemberResolver] = None,
+        checkpoint: Optional[PhaseCheckpoint] = None,
+    ) -> int:
         """
-        全連携ユーザーのランク情報を更新し、ロールを再付与する
+        指定ユーザーのランクを取得し、各ギルドのロールとDBを更新する
+        ランク取得は1ユーザーにつき1回で、所属している全ギルドに反映する
+        checkpointが指定された場合はユーザーIDの昇順に処理し、処理済みのユーザーを飛ばす
+
+        Returns:
+            int: ランク取得に成功したユーザー数
         """
-        print("Starting daily rank update process...")
-        linked_users: List[User] = self.user_repo.get_all_linked_users()
+        if checkpoint is not None:
+            users = sorted(users, key=lambda u: int(u.discord_id))
+            users = [u for u in users if not checkpoint.should_skip(int(u.discord_id))]
 
-        for user in linked_users:
-            member = guild.get_member(int(user.discord_id))
-            if not member:
+        # 必要なメンバーを先にまとめて解決しておく (ユーザーごとのREST呼び出しを避ける)
+        member_resolver = member_resolver or MemberResolver(use_gateway=False)
+        user_ids = [int(user.discord_id) for user in users]
+        for guild in guilds:
+            await member_resolver.prefetch(guild, user_ids)
+
+        refreshed = 0
+        for user in users:
+            members = []
+            for guild in guilds:
+                member = member_resolver.get_member(guild, int(user.discord_id))
+                if member:
+                    members.append((guild, member))
+            if not members:
                 print(f"User {user.discord_id} not found in this guild. Skipping.")
+                # 更新日時を記録しないと、取りこぼし救済の枠を毎回占有し続けるため
+                await asyncio.to_thread(
+                    self.user_repo.mark_rank_refreshed, user.discord_id
+                )
+                if checkpoint is not None:
+                    await checkpoint.advance(int(user.discord_id))
                 continue
 
             # 1. Riot APIから最新ランク情報を取得
@@ -109,21 +248,279 @@ class RankService:
             if rank_data:
                 # 2a. ランク取得成功
                 new_rank_tier = self._parse_rank_tier(rank_data)
-                await self._update_discord_role(guild, member, new_rank_tier)
+                # ギルドごとにレート制限のバケットが異なるため並行に更新する
+                # 1つのギルドの失敗(権限不足など)で他のギルドやユーザーの処理を止めない
+                results = await asyncio.gather(
+                    *(
+                        self._update_discord_role(guild, member, new_rank_tier)
+                        for guild, member in members
+                    ),
+                    return_exceptions=True,
+                )
+                for (guild, _), result in zip(members, results):
+                    if isinstance(result, Exception):
+                        print(
+                            f"[{guild.name}] Failed to update rank role for "
+                            f"{user.discord_id}: {result!r}"
+                        )
 
-                # TODO: DBを更新 (成功時)
-                # self.user_repo.update_user_rank(user.discord_id, new_rank_tier, 0)
-                print(f"Successfully updated rank for {member.name} to {new_rank_tier}")
+                await asyncio.to_thread(
+                    self.user_repo.update_user_rank,
+                    user.discord_id,
+                    new_rank_tier,
+                    rank_changed=new_rank_tier != user.rank_tier,
+                )
+                refreshed += 1
+                print(f"Successfully updated rank for {user.discord_id} to {new_rank_tier}")
 
             else:
                 # 2b. ランク取得失敗
-                # TODO: DBを更新 (失敗時)
-                # fail_count = user.rank_fetch_fail_count + 1
-                # self.user_repo.update_user_fail_count(user.discord_id, fail_count)
-                # print(f"Failed to fetch rank for {member.name}. Fail count: {fail_count}")
-
-                # if fail_count >= 3:
-                #     await self._update_discord_role(guild, member, "Unrated") # ロールを未設定状態にする
-                #     print(f"Removed rank roles for {member.name} due to 3 consecutive failures.")
-                pass
+                # rank_refreshed_atを更新しないため、次回の取りこぼし救済の対象になる
+                print(f"Failed to fetch rank for {user.discord_id}.")
+
+            if checkpoint is not None:
+                await checkpoint.advance(int(user.discord_id))
+
+        if checkpoint is not None:
+            await checkpoint.complete()
+        return refreshed
+
+    async def update_all_user_ranks(
+        self,
+        guild: discord.Guild,
+        member_resolver: Optional[MemberResolver] = None,
+    ):
+        """
+        全連携ユーザーのランク情報を更新し、ロールを再付与する
+        """
+        print("Starting daily rank update process...")
+        await self.ensure_rank_roles(guild)
+        linked_users: List[User] = await asyncio.to_thread(
+            self.user_repo.get_all_linked_users
+        )
+
+        await self._refresh_users([guild], linked_users, member_resolver)
         print("Daily rank update process finished.")
+
+    # --- ローリング更新 (1日を複数のスロットに分割して少しずつ更新する) ---
+
+    @property
+    def slot_count(self) -> int:
+        """1日あたりのスロット数"""
+        return max(1, (24 * 60) // self.refresh_interval_minutes)
+
+    def current_slot(self, now: Optional[datetime] = None) -> int:
+        """
+        現在時刻が属するスロット番号を返す
+        """
+        now = now or datetime.now(timezone.utc)
+        now = now.astimezone(timezone.utc)
+        minutes = now.hour * 60 + now.minute
+        return (minutes // self.refresh_interval_minutes) % self.slot_count
+
+    @property
+    def rolling_budget(self) -> Optional[int]:
+        """ローリング更新に割り当てる1日あたりの更新人数"""
+        if self.daily_api_budget is None:
+            return None
+        return int(self.daily_api_budget * ROLLING_BUDGET_SHARE)
+
+    def tick_budget(self, slot: int) -> Optional[int]:
+        """
+        スロットのローリング更新1回あたりの更新人数の上限
+
+        1スロットあたりの端数は次のスロットに持ち越すため、予算がスロット数より少なくても
+        1日の合計はrolling_budgetを超えない (一部のスロットは0人になる)
+        """
+        if self.rolling_budget is None:
+            return None
+        budget = self.rolling_budget
+        return (budget * (slot + 1)) // self.slot_count - (
+            budget * slot
+        ) // self.slot_count
+
+    @property
+    def catch_up_budget(self) -> Optional[int]:
+        """デイリータスクでの取りこぼし救済の上限"""
+        if self.daily_api_budget is None:
+            return None
+        return self.daily_api_budget - self.rolling_budget
+
+    async def _load_refresh_candidates(
+        self, now: datetime, min_age: timedelta
+    ) -> List[User]:
+        """
+        最終更新からmin_age以上経ったユーザーだけをDBから取得する
+        (スロットの判定はハッシュで行うためDB側では絞り込めないが、最近更新したユーザーは除ける)
+        """
+        return await asyncio.to_thread(
+            self.user_repo.get_users_for_rank_refresh, now - min_age
+        )
+
+    async def _load_join_counts(self, now: datetime) -> Dict[str, int]:
+        """
+        直近の参加回数をユーザーごとにまとめて取得する
+        """
+        if self.activity_log_repo is None:
+            return {}
+        return await asyncio.to_thread(
+            self.activity_log_repo.get_join_counts_by_user_in_period,
+            now - PRIORITY_ACTIVITY_WINDOW,
+            now,
+        )
+
+    def priority_score(self, user: User, join_count: int, now: datetime) -> float:
+        """
+        ランク更新の優先度スコアを計算する
+        直近の参加回数が多いほど、またランクが最近変わったほど高くなる
+        """
+        score = float(join_count)
+        if (
+            user.rank_changed_at is not None
+            and now - user.rank_changed_at <= RECENT_RANK_CHANGE_WINDOW
+        ):
+            score += RECENT_RANK_CHANGE_BONUS
+        return score
+
+    def refresh_interval(self, score: float) -> timedelta:
+        """
+        優先度スコアに応じた更新間隔を返す
+        """
+        if self.activity_log_repo is None:
+            return DEFAULT_REFRESH_INTERVAL
+        for min_score, interval in PRIORITY_REFRESH_INTERVALS:
+            if score >= min_score:
+                return interval
+        return PRIORITY_REFRESH_INTERVALS[-1][1]
+
+    def is_due(self, user: User, now: datetime, interval: timedelta) -> bool:
+        """
+        スロット到来時に、更新間隔に達しているか
+        """
+        if user.rank_refreshed_at is None:
+            return True
+        return now - user.rank_refreshed_at >= interval - REFRESH_TOLERANCE
+
+    def is_overdue(
+        self, user: User, now: datetime, interval: timedelta = DEFAULT_REFRESH_INTERVAL
+    ) -> bool:
+        """
+        一度も更新されていないか、更新間隔を過ぎても更新されていないか
+        """
+        if user.rank_refreshed_at is None:
+            return True
+        return now - user.rank_refreshed_at >= interval + REFRESH_TOLERANCE
+
+    def _rank_candidates(
+        self, candidates: List[Tuple[User, float]], limit: Optional[int]
+    ) -> List[User]:
+        """
+        優先度スコアの高い順に並べ、上限件数までに絞り込む
+        """
+        candidates.sort(key=lambda c: c[1], reverse=True)
+        users = [user for user, _ in candidates]
+        return users if limit is None else users[:limit]
+
+    def select_users_for_slot(
+        self,
+        users: List[User],
+        slot: int,
+        now: datetime,
+        join_counts: Optional[Dict[str, int]] = None,
+    ) -> List[User]:
+        """
+        スロットに割り当てられた更新時期のユーザーと、取りこぼされたユーザーの一部を
+        優先度順に選択する。取りこぼし分は最終更新が古い順に catch_up_limit 件までとする
+        """
+        join_counts = join_counts or {}
+        in_slot = []
+        overdue = []
+        for user in users:
+            score = self.priority_score(
+                user, join_counts.get(user.discord_id, 0), now
+            )
+            interval = self.refresh_interval(score)
+            if compute_refresh_slot(user.discord_id, self.slot_count) == slot:
+                if self.is_due(user, now, interval):
+                    in_slot.append((user, score))
+            elif self.is_overdue(user, now, interval):
+                overdue.append((user, score))
+
+        overdue.sort(
+            key=lambda c: c[0].rank_refreshed_at
+            or datetime.min.replace(tzinfo=timezone.utc)
+        )
+        return self._rank_candidates(
+            in_slot + overdue[: self.catch_up_limit], self.tick_budget(slot)
+        )
+
+    async def refresh_rank_slice(
+        self,
+        guilds: List[discord.Guild],
+        now: Optional[datetime] = None,
+        member_resolver: Optional[MemberResolver] = None,
+    ) -> int:
+        """
+        現在のスロットに該当するユーザーだけランクを更新する
+        数分おきに呼び出すことで、1日かけて全ユーザーを一巡する
+        """
+        now = now or datetime.now(timezone.utc)
+        slot = self.current_slot(now)
+        # is_dueを満たすには、最短の更新間隔から許容幅を引いた時間以上が経っている必要がある
+        linked_users = await self._load_refresh_candidates(
+            now, MIN_REFRESH_INTERVAL - REFRESH_TOLERANCE
+        )
+        targets = self.select_users_for_slot(
+            linked_users, slot, now, await self._load_join_counts(now)
+        )
+        if not targets:
+            print(f"Rank refresh slot {slot}/{self.slot_count}: no users.")
+            return 0
+
+        await self._ensure_rank_roles_in_guilds(guilds)
+        refreshed = await self._refresh_users(guilds, targets, member_resolver)
+        print(
+            f"Rank refresh slot {slot}/{self.slot_count}: "
+            f"{refreshed}/{len(targets)} users refreshed."
+        )
+        return refreshed
+
+    async def refresh_overdue_users(
+        self,
+        guilds: List[discord.Guild],
+        now: Optional[datetime] = None,
+        member_resolver: Optional[MemberResolver] = None,
+        checkpoint: Optional[PhaseCheckpoint] = None,
+    ) -> int:
+        """
+        ローリング更新で取りこぼされたユーザーをまとめて更新する (デイリータスク用)
+        """
+        if checkpoint is not None and checkpoint.completed:
+            print("Rank catch-up already completed in this run. Skipping.")
+            return 0
+
+        now = now or datetime.now(timezone.utc)
+        linked_users = await self._load_refresh_candidates(
+            now, MIN_REFRESH_INTERVAL + REFRESH_TOLERANCE
+        )
+        join_counts = await self._load_join_counts(now)
+        candidates = []
+        for user in linked_users:
+            score = self.priority_score(
+                user, join_counts.get(user.discord_id, 0), now
+            )
+            if self.is_overdue(user, now, self.refresh_interval(score)):
+                candidates.append((user, score))
+        targets = self._rank_candidates(candidates, self.catch_up_budget)
+        if not targets:
+            print("No overdue users for rank refresh.")
+            if checkpoint is not None:
+                await checkpoint.complete()
+            return 0
+
+        await self._ensure_rank_roles_in_guilds(guilds)
+        refreshed = await self._refresh_users(
+            guilds, targets, member_resolver, checkpoint
+        )
+        print(f"Rank catch-up finished: {refreshed}/{len(targets)} users refreshed.")
+        return refreshed
@@ -0,0 +1,92 @@
+# services/rate_limiter.py
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+# 個別の上限を設定していないコマンドが共有するバケット名
+DEFAULT_BUCKET = "default"
+
+
+class UserRateLimiter:
+    """
+    ユーザー単位のコマンド実行頻度の制限 (GCRA: Generic Cell Rate Algorithm)
+
+    「per秒間にrate回まで」を、(ユーザー, バケット)ごとに次に許可される理論上の時刻(TAT)
+    1つだけで表す。スライディングウィンドウと同じく、ウィンドウの境界で2倍の実行を許すことはない。
+    個別の上限を設定したコマンドは専用のバケットを持ち、それ以外のコマンドとボタンは
+    ユーザーごとに1つのバケットを共有する (仕様書 7.3: 10秒間に5回まで)。
+    """
+
+    # 掃除を行う間隔 (判定の回数)
+    SWEEP_INTERVAL = 1000
+
+    def __init__(
+        self,
+        rate: int = 5,
+        per: float = 10.0,
+        overrides: Optional[Dict[str, Tuple[int, float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default_limit = (rate, per)
+        # コマンド名 -> (回数, 秒数)
+        self.overrides = dict(overrides or {})
+        self._clock = clock
+        # (user_id, バケット) -> TAT
+        self._tat: Dict[Tuple[int, str], float] = {}
+        self._hits_since_sweep = 0
+
+        # メトリクス
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def _bucket(self, command: str) -> Tuple[str, int, float]:
+        if command in self.overrides:
+            rate, per = self.overrides[command]
+            return command, rate, per
+        rate, per = self.default_limit
+        return DEFAULT_BUCKET, rate, per
+
+    def hit(self, user_id: int, command: str) -> float:
+        """
+        実行を1回記録する
+
+        Returns:
+            float: 許可した場合は0。制限した場合は次に実行できるまでの秒数
+        """
+        now = self._clock()
+        self._hits_since_sweep += 1
+        if self._hits_since_sweep >= self.SWEEP_INTERVAL:
+            self.sweep(now)
+
+        bucket, rate, per = self._bucket(command)
+        key = (user_id, bucket)
+        interval = per / rate
+        tat = max(self._tat.get(key, now), now)
+        # 許容するバースト (rate回分) を超える場合は制限する
+        retry_after = tat + interval - per - now
+        if retry_after > 0:
+            self.limited += 1
+            return retry_after
+
+        self._tat[key] = tat + interval
+        self.allowed += 1
+        return 0.0
+
+    def sweep(self, now: Optional[float] = None):
+        """
+        上限まで回復した(新規と同じ状態の)エントリを取り除く
+        """
+        now = self._clock() if now is None else now
+        idle = [key for key, tat in self._tat.items() if tat <= now]
+        for key in idle:
+            del self._tat[key]
+        self.evicted += len(idle)
+        self._hits_since_sweep = 0
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "tracked": len(self._tat),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,84 @@
+# services/recruitment_context.py
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from db.participant_repository import Participant, ParticipantRepository
+from db.recruitment_repository import Recruitment, RecruitmentRepository
+
+
+class RecruitmentReadContext:
+    """
+    1回のインタラクションの間、募集と参加者の読み取り結果を使い回すクラス
+
+    View → Service → Embedの組み立てまで同じインスタンスを渡すことで、
+    同じ募集や参加者を何度もRepositoryから読み直さないようにする。
+    自分で行った書き込みは記録済みの読み取り結果にも反映する。
+    """
+
+    def __init__(
+        self,
+        recruitment_repo: RecruitmentRepository,
+        participant_repo: ParticipantRepository,
+    ):
+        self.recruitment_repo = recruitment_repo
+        self.participant_repo = participant_repo
+        self._recruitments: Dict[str, Optional[Recruitment]] = {}
+        self._by_message_id: Dict[str, Optional[Recruitment]] = {}
+        self._participants: Dict[str, List[Participant]] = {}
+
+    def remember(self, recruitment: Recruitment):
+        """
+        読み取り・更新した募集を記録する
+        """
+        self._recruitments[str(recruitment.id)] = recruitment
+        self._by_message_id[recruitment.message_id] = recruitment
+
+    def get_recruitment(self, recruitment_id: UUID) -> Optional[Recruitment]:
+        key = str(recruitment_id)
+        if key not in self._recruitments:
+            recruitment = self.recruitment_repo.get_recruitment_by_id(recruitment_id)
+            self._recruitments[key] = recruitment
+            if recruitment:
+                self.remember(recruitment)
+        return self._recruitments[key]
+
+    def get_recruitment_by_message_id(self, message_id: str) -> Optional[Recruitment]:
+        if message_id not in self._by_message_id:
+            recruitment = self.recruitment_repo.get_recruitment_by_message_id(
+                message_id
+            )
+            self._by_message_id[message_id] = recruitment
+            if recruitment:
+                self.remember(recruitment)
+        return self._by_message_id[message_id]
+
+    def get_open_recruitment_by_creator_id(
+        self, creator_id: str
+    ) -> Optional[Recruitment]:
+        # 募集主からの検索は1回のインタラクションで1度しか行わないため記録しない
+        recruitment = self.recruitment_repo.get_open_recruitment_by_creator_id(
+            creator_id
+        )
+        if recruitment:
+            self.remember(recruitment)
+        return recruitment
+
+    def get_participants(self, recruitment_id: UUID) -> List[Participant]:
+        key = str(recruitment_id)
+        if key not in self._participants:
+            self._participants[key] = (
+                self.participant_repo.get_participants_by_recruitment_id(
+                    recruitment_id
+                )
+            )
+        return list(self._participants[key])
+
+    def participant_added(self, participant: Participant):
+        cached = self._participants.get(str(participant.recruitment_id))
+        if cached is not None:
+            cached.append(participant)
+
+    def participant_removed(self, recruitment_id: UUID, user_id: str):
+        cached = self._participants.get(str(recruitment_id))
+        if cached is not None:
+            cached[:] = [p for p in cached if p.user_id != user_id]
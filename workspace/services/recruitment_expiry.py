@@ -0,0 +1,104 @@
+# services/recruitment_expiry.py
+import asyncio
+import heapq
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from db.recruitment_repository import Recruitment
+
+ExpireCallback = Callable[[UUID], Awaitable[None]]
+
+
+class RecruitmentExpiryScheduler:
+    """
+    募集の締切時刻に締切処理を呼び出すタイマー
+
+    締切時刻の最小ヒープを持ち、1つのタスクが直近の締切まで待機する。
+    締切の変更・取り消しは辞書側だけを更新し、古いヒープ要素は取り出した時点で捨てる。
+    DBへのポーリングは行わない。
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+        # recruitment_id -> 現在有効な締切時刻
+        self._deadlines: Dict[str, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._on_expire: Optional[ExpireCallback] = None
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, recruitment_id: UUID, deadline: datetime):
+        """
+        締切を登録する。登録済みの場合は締切時刻を置き換える
+        """
+        key = str(recruitment_id)
+        self._deadlines[key] = deadline
+        heapq.heappush(self._heap, (deadline, key))
+        # より早い締切が追加された場合に備えて待機し直す
+        self._wakeup.set()
+
+    def unschedule(self, recruitment_id: UUID):
+        """
+        締切を取り消す (キャンセル済みの募集など)
+        """
+        self._deadlines.pop(str(recruitment_id), None)
+
+    def load(self, recruitments: Iterable[Recruitment]):
+        """
+        募集中(open)の募集をまとめて登録する (起動時用)
+        """
+        for recruitment in recruitments:
+            if recruitment.status == "open":
+                self.schedule(recruitment.id, recruitment.deadline)
+
+    def start(self, on_expire: ExpireCallback):
+        """
+        締切処理のタスクを開始する。締切を過ぎた募集はすぐに処理される
+        """
+        self._on_expire = on_expire
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def _pop_due(self, now: datetime) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, key = heapq.heappop(self._heap)
+            # 変更・取り消し済みの古い要素は捨てる
+            if self._deadlines.get(key) != deadline:
+                continue
+            del self._deadlines[key]
+            due.append(key)
+        return due
+
+    def _next_delay(self, now: datetime) -> Optional[float]:
+        # 先頭の古い要素を捨ててから、直近の締切までの秒数を返す
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc)
+            for key in self._pop_due(now):
+                try:
+                    await self._on_expire(UUID(key))
+                except Exception as e:
+                    # 1件の失敗で他の募集の締切処理を止めない
+                    print(f"Failed to expire recruitment {key}: {e!r}")
+
+            delay = self._next_delay(datetime.now(timezone.utc))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
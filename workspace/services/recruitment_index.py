@@ -0,0 +1,97 @@
+# services/recruitment_index.py
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from db.recruitment_repository import Recruitment
+
+# ソート済みリストの要素 (締切, 募集ID)。同じ締切の募集は募集IDで順序を決める
+_Entry = Tuple[datetime, str]
+
+
+class OpenRecruitmentIndex:
+    """
+    募集中(open)の募集をギルド・募集形式・締切で引ける索引
+
+    ギルドごと、(ギルド, 募集形式)ごとに締切順のソート済みリストを持ち、
+    一覧表示ではDBを参照せずに締切の近い順でページングする。
+    作成・編集・キャンセル・締切の各処理でRecruitmentServiceが更新する。
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, Recruitment] = {}
+        # guild_id -> 締切順の募集
+        self._by_guild: Dict[str, List[_Entry]] = {}
+        # (guild_id, party_type) -> 締切順の募集
+        self._by_party_type: Dict[Tuple[str, str], List[_Entry]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    @staticmethod
+    def _entry(recruitment: Recruitment) -> _Entry:
+        return recruitment.deadline, str(recruitment.id)
+
+    def _lists(self, recruitment: Recruitment) -> List[List[_Entry]]:
+        return [
+            self._by_guild.setdefault(recruitment.guild_id, []),
+            self._by_party_type.setdefault(
+                (recruitment.guild_id, recruitment.party_type), []
+            ),
+        ]
+
+    def load(self, recruitments: Iterable[Recruitment]):
+        for recruitment in recruitments:
+            self.upsert(recruitment)
+
+    def upsert(self, recruitment: Recruitment):
+        """
+        募集を登録・更新する。募集中でない場合は索引から取り除く
+        """
+        self.remove(recruitment.id)
+        if recruitment.status != "open":
+            return
+        self._by_id[str(recruitment.id)] = recruitment
+        entry = self._entry(recruitment)
+        for entries in self._lists(recruitment):
+            insort(entries, entry)
+
+    def remove(self, recruitment_id: UUID):
+        recruitment = self._by_id.pop(str(recruitment_id), None)
+        if recruitment is None:
+            return
+        entry = self._entry(recruitment)
+        for key, index in [
+            (recruitment.guild_id, self._by_guild),
+            ((recruitment.guild_id, recruitment.party_type), self._by_party_type),
+        ]:
+            entries = index[key]
+            position = bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+            if not entries:
+                del index[key]
+
+    def page(
+        self,
+        guild_id: str,
+        party_type: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> Tuple[List[Recruitment], int]:
+        """
+        ギルドの募集中の募集を締切の近い順に1ページ分返す
+
+        Returns:
+            Tuple[List[Recruitment], int]: (ページ内の募集, 条件に合う募集の総数)
+        """
+        if party_type:
+            entries = self._by_party_type.get((guild_id, party_type), [])
+        else:
+            entries = self._by_guild.get(guild_id, [])
+        start = (page - 1) * page_size
+        return (
+            [self._by_id[rid] for _, rid in entries[start : start + page_size]],
+            len(entries),
+        )
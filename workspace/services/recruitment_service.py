@@ -1,18 +1,38 @@
 # services/recruitment_service.py
+import asyncio
 import re
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Tuple
-from uuid import UUID
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
 
 import discord
 
 from db.recruitment_repository import RecruitmentRepository, Recruitment
-from db.participant_repository import ParticipantRepository
+from db.participant_repository import ParticipantRepository, Participant
 from db.activity_log_repository import ActivityLogRepository
+from services.keyed_lock import KeyedLock
+from services.recruitment_context import RecruitmentReadContext
+from services.recruitment_expiry import RecruitmentExpiryScheduler
+from services.recruitment_index import OpenRecruitmentIndex
+from services.recruitment_state import (
+    RecruitmentState,
+    RecruitmentStateStore,
+    WriteBehindQueue,
+)
 
 # 日本時間のタイムゾーン
 JST = timezone(timedelta(hours=9), "JST")
 
+# 同じ募集への操作が混み合い、待機時間の上限までにロックを取得できなかった場合の応答
+BUSY_MESSAGE = "操作が混み合っています。少し待ってからもう一度お試しください。"
+# 締切・キャンセル済みの募集を操作しようとした場合の応答
+CLOSED_MESSAGE = "この募集は既に終了しているようです。"
+# 保存が終わる前の募集のボタンが押された場合の応答
+CREATING_MESSAGE = "募集を作成中です。少し待ってからもう一度お試しください。"
+
+# 採番済みの募集と初期参加者IDから募集メッセージを送信し、送信したメッセージを返す関数
+PublishFunc = Callable[[Recruitment, List[str]], Awaitable[discord.Message]]
+
 
 class RecruitmentService:
     """
@@ -24,10 +44,27 @@ class RecruitmentService:
         recruitment_repo: RecruitmentRepository,
         participant_repo: ParticipantRepository,
         activity_log_repo: ActivityLogRepository,
+        expiry_scheduler: Optional[RecruitmentExpiryScheduler] = None,
+        state_store: Optional[RecruitmentStateStore] = None,
+        write_behind: Optional[WriteBehindQueue] = None,
+        lock_timeout: Optional[float] = 5.0,
     ):
         self.recruitment_repo = recruitment_repo
         self.participant_repo = participant_repo
         self.activity_log_repo = activity_log_repo
+        # 締切時刻に募集を締め切るタイマー (作成・編集・キャンセル時に更新する)
+        self.expiry_scheduler = expiry_scheduler
+        # 指定された場合、参加・取消はメモリ上の状態で判定し、DBへは非同期に書き込む
+        self.state_store = state_store
+        self.write_behind = write_behind
+        if self.state_store is not None and self.write_behind is None:
+            self.write_behind = WriteBehindQueue()
+        # 同じ募集への参加・取消・編集を到着順に1つずつ処理する (同時クリックでの定員超過を防ぐ)
+        self.recruitment_locks = KeyedLock(timeout=lock_timeout)
+        # 募集中の募集の一覧 (/list はDBを参照せずにこの索引から返す)
+        self.open_index = OpenRecruitmentIndex()
+        # メッセージを送信済みで、DBへの保存が終わっていない募集のID
+        self._creating: Set[UUID] = set()
 
     def _parse_deadline(self, time_str: str) -> Optional[datetime]:
         """
@@ -90,10 +127,13 @@ class RecruitmentService:
         needed_count: int,
         deadline_str: str,
         other_members: List[discord.Member],
+        publish: PublishFunc,
     ) -> Tuple[Optional[Recruitment], str]:
         """
         新しい募集を作成するフロー全体を管理する
 
+        募集IDをこちらで採番してから publish で募集メッセージを送信し、
+        メッセージIDが確定した状態で募集・初期参加者・参加ログを1回で保存する。
         """
         # 1. 締切時間をパース
         deadline = self._parse_deadline(deadline_str)
@@ -103,10 +143,9 @@ class RecruitmentService:
                 "募集締め切り時間の形式が正しくないか、過去の時間を指定しています。",
             )
 
-        # 2. 初期参加者をリストアップ
+        # 2. 初期参加者をリストアップ (募集主 → 確定メンバー → VC参加者の順、重複は除く)
         creator = interaction.user
-        initial_participants = {creator}  # 重複を避けるためセットを使用
-        initial_participants.update(other_members)
+        initial_participants = [creator, *other_members]
 
         # VC参加者を追加
         if (
@@ -114,69 +153,305 @@ class RecruitmentService:
             and creator.voice
             and creator.voice.channel
         ):
-            initial_participants.update(creator.voice.channel.members)
+            initial_participants.extend(creator.voice.channel.members)
+        participant_ids = list(dict.fromkeys(str(p.id) for p in initial_participants))
 
         # 3. 募集定員を計算
-        max_participants = len(initial_participants) + needed_count
+        max_participants = len(participant_ids) + needed_count
 
-        # 4. DBに募集情報を保存 (Repositoryを呼び出し)
-        recruitment = self.recruitment_repo.create_recruitment(
-            message_id="dummy",  # この後メッセージを送信してから更新する
+        # 4. 募集IDを採番し、募集メッセージを送信してからDBに保存する
+        now = datetime.now(timezone.utc)
+        draft = Recruitment(
+            id=uuid4(),
+            message_id="",
             guild_id=str(interaction.guild_id),
             creator_id=str(creator.id),
             party_type=party_type,
             max_participants=max_participants,
+            status="open",
             deadline=deadline,
+            created_at=now,
+            updated_at=now,
         )
+        # メッセージの送信から保存までの間に押されたボタンには、作成中である旨を返す
+        self._creating.add(draft.id)
+        try:
+            recruitment, message = await self._publish_and_save(
+                draft, participant_ids, publish
+            )
+            if recruitment:
+                self._register_created(recruitment, participant_ids, now)
+        finally:
+            self._creating.discard(draft.id)
+        return recruitment, message
+
+    async def _publish_and_save(
+        self, draft: Recruitment, participant_ids: List[str], publish: PublishFunc
+    ) -> Tuple[Optional[Recruitment], str]:
+        try:
+            sent_message = await publish(draft, participant_ids)
+        except Exception as e:
+            print(f"Failed to send recruitment message: {e!r}")
+            return None, "募集メッセージの送信に失敗しました。"
+
+        # 5. 募集・初期参加者・参加ログをまとめてDBに保存 (Repositoryを呼び出し)
+        try:
+            recruitment = await asyncio.to_thread(
+                self.recruitment_repo.create_recruitment_with_participants,
+                draft.model_copy(
+                    update={
+                        "message_id": str(sent_message.id),
+                        "channel_id": str(sent_message.channel.id),
+                    }
+                ),
+                participant_ids,
+            )
+        except Exception as e:
+            print(f"Failed to save recruitment: {e!r}")
+            recruitment = None
         if not recruitment:
+            # 保存できなかった募集のメッセージは残さない
+            try:
+                await sent_message.delete()
+            except Exception as e:
+                print(f"Failed to delete orphaned recruitment message: {e!r}")
             return None, "データベースへの募集情報登録に失敗しました。"
+        return recruitment, "募集の作成に成功しました。"
 
-        # 5. 初期参加者をDBに保存 & 活動ログを記録
-        participant_ids = [str(p.id) for p in initial_participants]
-        self.participant_repo.add_initial_participants(recruitment.id, participant_ids)
-        for user_id in participant_ids:
-            self.activity_log_repo.create_log(
-                user_id, recruitment.id, str(interaction.guild_id), "join"
-            )
+    def _register_created(
+        self, recruitment: Recruitment, participant_ids: List[str], now: datetime
+    ):
+        """
+        作成した募集をキャッシュ・締切タイマー・索引に登録する
+        """
+        self.participant_repo.prime(
+            recruitment.id,
+            [
+                Participant(
+                    recruitment_id=recruitment.id, user_id=user_id, joined_at=now
+                )
+                for user_id in participant_ids
+            ],
+        )
+        if self.expiry_scheduler:
+            self.expiry_scheduler.schedule(recruitment.id, recruitment.deadline)
+        if self.state_store is not None:
+            self.state_store.load(recruitment, participant_ids)
+        self.open_index.upsert(recruitment)
 
-        return recruitment, "募集の作成に成功しました。"
+    def is_being_created(self, recruitment_id: UUID) -> bool:
+        """
+        募集メッセージを送信済みで、DBへの保存が終わっていない募集かどうか
+        """
+        return recruitment_id in self._creating
+
+    def new_context(self) -> RecruitmentReadContext:
+        """
+        1回のインタラクション用の読み取りコンテキストを作成する
+        """
+        return RecruitmentReadContext(self.recruitment_repo, self.participant_repo)
 
-    def join_recruitment(
-        self, recruitment: Recruitment, user: discord.Member
+    def get_recruitment(
+        self, recruitment_id: UUID, ctx: Optional[RecruitmentReadContext] = None
+    ) -> Optional[Recruitment]:
+        """
+        募集IDから募集情報を取得する (メモリ上の状態があればDBを参照しない)
+        """
+        if self.state_store is not None:
+            state = self.state_store.get(recruitment_id)
+            if state:
+                return state.recruitment
+        return (ctx or self.new_context()).get_recruitment(recruitment_id)
+
+    def get_recruitment_by_message_id(
+        self, message_id: str, ctx: Optional[RecruitmentReadContext] = None
+    ) -> Optional[Recruitment]:
+        """
+        メッセージIDから募集情報を取得する (メモリ上の状態があればDBを参照しない)
+        """
+        if self.state_store is not None:
+            state = self.state_store.get_by_message_id(message_id)
+            if state:
+                return state.recruitment
+        return (ctx or self.new_context()).get_recruitment_by_message_id(message_id)
+
+    def get_participant_ids(
+        self, recruitment_id: UUID, ctx: Optional[RecruitmentReadContext] = None
+    ) -> List[str]:
+        """
+        参加順の参加者IDを取得する (メモリ上の状態があればDBを参照しない)
+        """
+        if self.state_store is not None:
+            state = self.state_store.get(recruitment_id)
+            if state:
+                return list(state.participant_ids)
+        participants = (ctx or self.new_context()).get_participants(recruitment_id)
+        return [p.user_id for p in participants]
+
+    def _state_for(
+        self, recruitment: Recruitment, ctx: RecruitmentReadContext
+    ) -> RecruitmentState:
+        state = self.state_store.get(recruitment.id)
+        if state is None:
+            # 起動時に読み込めなかった募集は初回の操作時にDBから読み込む
+            participants = ctx.get_participants(recruitment.id)
+            state = self.state_store.load(
+                recruitment, [p.user_id for p in participants]
+            )
+        return state
+
+    async def join_recruitment(
+        self,
+        recruitment: Recruitment,
+        user: discord.Member,
+        ctx: Optional[RecruitmentReadContext] = None,
     ) -> Tuple[bool, str]:
         """
         ユーザーが募集に参加する処理
         """
-        participants = self.participant_repo.get_participants_by_recruitment_id(
-            recruitment.id
-        )
+        ctx = ctx or self.new_context()
+        try:
+            # 定員の確認から書き込みの完了まで(書き込み中の/editも含めて)他の操作を待たせる
+            async with self.recruitment_locks.hold(recruitment.id):
+                if self.state_store is not None:
+                    return self._join_in_memory(recruitment, str(user.id), ctx)
+                return await self._join_in_db(recruitment, user, ctx)
+        except asyncio.TimeoutError:
+            return False, BUSY_MESSAGE
+
+    async def _join_in_db(
+        self,
+        recruitment: Recruitment,
+        user: discord.Member,
+        ctx: RecruitmentReadContext,
+    ) -> Tuple[bool, str]:
+        participants = ctx.get_participants(recruitment.id)
         if len(participants) >= recruitment.max_participants:
             return False, "募集は既に満員です。"
         if any(p.user_id == str(user.id) for p in participants):
             return False, "既に参加しています。"
 
-        # 参加者を追加し、ログを記録
-        self.participant_repo.add_participant(recruitment.id, str(user.id))
-        self.activity_log_repo.create_log(
-            str(user.id), recruitment.id, recruitment.guild_id, "join"
+        # 参加者を追加し、ログを記録 (DBへの書き込みはイベントループを止めないようスレッドで行う)
+        await asyncio.to_thread(
+            self.participant_repo.add_participant,
+            recruitment.id,
+            str(user.id),
+            update_cache=False,
+        )
+        await asyncio.to_thread(
+            self.activity_log_repo.create_log,
+            str(user.id),
+            recruitment.id,
+            recruitment.guild_id,
+            "join",
+        )
+        self.participant_repo.cache_participant_added(recruitment.id, str(user.id))
+        ctx.participant_added(
+            Participant(
+                recruitment_id=recruitment.id,
+                user_id=str(user.id),
+                joined_at=datetime.now(timezone.utc),
+            )
         )
         return True, "参加しました。"
 
-    def leave_recruitment(
-        self, recruitment: Recruitment, user: discord.Member
+    async def leave_recruitment(
+        self,
+        recruitment: Recruitment,
+        user: discord.Member,
+        ctx: Optional[RecruitmentReadContext] = None,
     ) -> Tuple[bool, str]:
         """
         ユーザーが募集への参加を取り消す処理
         """
+        ctx = ctx or self.new_context()
+        try:
+            async with self.recruitment_locks.hold(recruitment.id):
+                if self.state_store is not None:
+                    return self._leave_in_memory(recruitment, str(user.id), ctx)
+                return await self._leave_in_db(recruitment, user, ctx)
+        except asyncio.TimeoutError:
+            return False, BUSY_MESSAGE
+
+    async def _leave_in_db(
+        self,
+        recruitment: Recruitment,
+        user: discord.Member,
+        ctx: RecruitmentReadContext,
+    ) -> Tuple[bool, str]:
         # 参加者から削除し、ログを記録
-        self.participant_repo.remove_participant(recruitment.id, str(user.id))
-        self.activity_log_repo.create_log(
-            str(user.id), recruitment.id, recruitment.guild_id, "leave"
+        await asyncio.to_thread(
+            self.participant_repo.remove_participant,
+            recruitment.id,
+            str(user.id),
+            update_cache=False,
+        )
+        await asyncio.to_thread(
+            self.activity_log_repo.create_log,
+            str(user.id),
+            recruitment.id,
+            recruitment.guild_id,
+            "leave",
+        )
+        self.participant_repo.cache_participant_removed(recruitment.id, str(user.id))
+        ctx.participant_removed(recruitment.id, str(user.id))
+        return True, "参加を取り消しました。"
+
+    def _join_in_memory(
+        self, recruitment: Recruitment, user_id: str, ctx: RecruitmentReadContext
+    ) -> Tuple[bool, str]:
+        state = self._state_for(recruitment, ctx)
+        if not state.is_open:
+            return False, CLOSED_MESSAGE
+        if state.is_full:
+            return False, "募集は既に満員です。"
+        if state.has_participant(user_id):
+            return False, "既に参加しています。"
+        state.participant_ids.append(user_id)
+
+        recruitment_id, guild_id = state.recruitment.id, state.recruitment.guild_id
+        self.participant_repo.cache_participant_added(recruitment_id, user_id)
+        # 参加者とログは別々に再試行する (参加者の書き込みは再試行しても重複しない)
+        self.write_behind.enqueue(
+            f"join {recruitment_id} {user_id}",
+            lambda: self.participant_repo.add_participant(
+                recruitment_id, user_id, update_cache=False
+            ),
+        )
+        self.write_behind.enqueue(
+            f"join log {recruitment_id} {user_id}",
+            lambda: self.activity_log_repo.create_log(
+                user_id, recruitment_id, guild_id, "join"
+            ),
+        )
+        return True, "参加しました。"
+
+    def _leave_in_memory(
+        self, recruitment: Recruitment, user_id: str, ctx: RecruitmentReadContext
+    ) -> Tuple[bool, str]:
+        state = self._state_for(recruitment, ctx)
+        if not state.has_participant(user_id):
+            return False, "この募集に参加していません。"
+        state.participant_ids.remove(user_id)
+
+        recruitment_id, guild_id = state.recruitment.id, state.recruitment.guild_id
+        self.participant_repo.cache_participant_removed(recruitment_id, user_id)
+        self.write_behind.enqueue(
+            f"leave {recruitment_id} {user_id}",
+            lambda: self.participant_repo.remove_participant(
+                recruitment_id, user_id, update_cache=False
+            ),
+        )
+        self.write_behind.enqueue(
+            f"leave log {recruitment_id} {user_id}",
+            lambda: self.activity_log_repo.create_log(
+                user_id, recruitment_id, guild_id, "leave"
+            ),
         )
         return True, "参加を取り消しました。"
 
     def cancel_recruitment(
-        self, creator_id: str
+        self, creator_id: str, ctx: Optional[RecruitmentReadContext] = None
     ) -> Tuple[Optional[Recruitment], List[str], str]:
         """
         募集主のIDから募集中(open)の募集をキャンセル済(cancelled)にする
@@ -184,18 +459,15 @@ class RecruitmentService:
         Returns:
             Tuple[Optional[Recruitment], List[str], str]: (募集情報, 参加者IDリスト, メッセージ)
         """
+        ctx = ctx or self.new_context()
+
         # 1. ユーザーが作成したオープンな募集を探す
-        recruitment = self.recruitment_repo.get_open_recruitment_by_creator_id(
-            creator_id
-        )
+        recruitment = ctx.get_open_recruitment_by_creator_id(creator_id)
         if not recruitment:
             return None, [], "あなたが開始した募集中(open)の募集が見つかりません。"
 
         # 2. 参加者リストを取得
-        participants = self.participant_repo.get_participants_by_recruitment_id(
-            recruitment.id
-        )
-        participant_ids = [p.user_id for p in participants]
+        participant_ids = self.get_participant_ids(recruitment.id, ctx)
 
         # 3. 募集のステータスを'cancelled'に更新
         updated_recruitment = self.recruitment_repo.update_recruitment(
@@ -208,10 +480,21 @@ class RecruitmentService:
                 "募集のキャンセル処理中にデータベースエラーが発生しました。",
             )
 
+        ctx.remember(updated_recruitment)
+        if self.expiry_scheduler:
+            self.expiry_scheduler.unschedule(recruitment.id)
+        if self.state_store is not None:
+            self.state_store.remove(recruitment.id)
+        self.participant_repo.forget(recruitment.id)
+        self.open_index.remove(recruitment.id)
+
         return updated_recruitment, participant_ids, "募集をキャンセルしました。"
 
-    def edit_recruitment(
-        self, recruitment_id: UUID, updates: dict
+    async def edit_recruitment(
+        self,
+        recruitment_id: UUID,
+        updates: dict,
+        ctx: Optional[RecruitmentReadContext] = None,
     ) -> Tuple[Optional[Recruitment], str]:
         """
         募集情報を更新する
@@ -226,11 +509,85 @@ class RecruitmentService:
             updates["deadline"] = deadline
             del updates["deadline_str"]
 
-        updated_recruitment = self.recruitment_repo.update_recruitment(
-            recruitment_id, updates
-        )
+        try:
+            # 更新中に参加・取消が古い定員で判定されないよう、書き込みの完了まで待たせる
+            async with self.recruitment_locks.hold(recruitment_id):
+                # モーダルを開いた後に締切・キャンセルされた募集は更新しない
+                # (状態の確認と更新をDB側で1回で行い、確認後の締切と競合しないようにする)
+                updated_recruitment = await asyncio.to_thread(
+                    self.recruitment_repo.update_recruitment,
+                    recruitment_id,
+                    updates,
+                    only_open=True,
+                )
+                if updated_recruitment and self.state_store is not None:
+                    self.state_store.update_recruitment(updated_recruitment)
+        except asyncio.TimeoutError:
+            return None, BUSY_MESSAGE
+        except Exception as e:
+            print(f"Failed to update recruitment {recruitment_id}: {e!r}")
+            return None, "募集情報の更新に失敗しました。"
 
         if not updated_recruitment:
-            return None, "募集情報の更新に失敗しました。"
+            return None, CLOSED_MESSAGE
+        if ctx:
+            ctx.remember(updated_recruitment)
+        self.open_index.upsert(updated_recruitment)
+
+        # 締切が変わった場合に備えてタイマーを登録し直す
+        if self.expiry_scheduler and updated_recruitment.status == "open":
+            self.expiry_scheduler.schedule(
+                updated_recruitment.id, updated_recruitment.deadline
+            )
 
         return updated_recruitment, "募集情報を更新しました。"
+
+    def expire_recruitment(self, recruitment_id: UUID) -> Optional[Recruitment]:
+        """
+        締切時刻を過ぎた募集を締切済(closed)にする
+
+        Returns:
+            Optional[Recruitment]: 締め切った募集。既にキャンセル等で終了していた場合はNone
+        """
+        recruitment = self.recruitment_repo.close_recruitment_if_open(recruitment_id)
+        if recruitment:
+            if self.state_store is not None:
+                self.state_store.remove(recruitment_id)
+            self.participant_repo.forget(recruitment_id)
+            self.open_index.remove(recruitment_id)
+        return recruitment
+
+    def list_open_recruitments(
+        self,
+        guild_id: str,
+        party_type: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> Tuple[List[Recruitment], int]:
+        """
+        ギルドの募集中の募集を締切の近い順に1ページ分返す (DBは参照しない)
+
+        Returns:
+            Tuple[List[Recruitment], int]: (ページ内の募集, 条件に合う募集の総数)
+        """
+        return self.open_index.page(guild_id, party_type, page, page_size)
+
+    def rehydrate_open_recruitments(self) -> int:
+        """
+        募集中(open)の募集と参加者をまとめて読み込み、キャッシュと締切タイマーを準備する
+        再起動直後のボタン操作でDBへの問い合わせが発生しないよう、起動時に呼び出す
+
+        Returns:
+            int: 読み込んだ募集の数
+        """
+        rows = self.recruitment_repo.get_open_recruitments_with_participants()
+        recruitments = [recruitment for recruitment, _ in rows]
+        self.recruitment_repo.prime(recruitments)
+        for recruitment, participants in rows:
+            self.participant_repo.prime(recruitment.id, participants)
+            if self.state_store is not None:
+                self.state_store.load(recruitment, [p.user_id for p in participants])
+        if self.expiry_scheduler:
+            self.expiry_scheduler.load(recruitments)
+        self.open_index.load(recruitments)
+        return len(recruitments)
@@ -0,0 +1,172 @@
+# services/recruitment_state.py
+import asyncio
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from db.recruitment_repository import Recruitment
+
+
+class RecruitmentState:
+    """
+    募集中の募集1件分のメモリ上の状態 (募集情報・参加者・定員・ステータス)
+
+    参加・取消の判定はこの状態だけで行う (募集ごとの直列化はRecruitmentServiceのロックで行う)。
+    """
+
+    def __init__(self, recruitment: Recruitment, participant_ids: Iterable[str]):
+        self.recruitment = recruitment
+        # 参加順の参加者ID
+        self.participant_ids: List[str] = list(dict.fromkeys(participant_ids))
+
+    @property
+    def is_open(self) -> bool:
+        return self.recruitment.status == "open"
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.participant_ids) >= self.recruitment.max_participants
+
+    def has_participant(self, user_id: str) -> bool:
+        return user_id in self.participant_ids
+
+
+class RecruitmentStateStore:
+    """
+    募集中の募集の状態をメモリ上で管理するクラス
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, RecruitmentState] = {}
+        # message_id -> recruitment_id
+        self._by_message_id: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(
+        self, recruitment: Recruitment, participant_ids: Iterable[str]
+    ) -> RecruitmentState:
+        state = RecruitmentState(recruitment, participant_ids)
+        self._by_id[str(recruitment.id)] = state
+        self._by_message_id[recruitment.message_id] = str(recruitment.id)
+        return state
+
+    def get(self, recruitment_id: UUID) -> Optional[RecruitmentState]:
+        return self._by_id.get(str(recruitment_id))
+
+    def get_by_message_id(self, message_id: str) -> Optional[RecruitmentState]:
+        recruitment_id = self._by_message_id.get(message_id)
+        return self._by_id.get(recruitment_id) if recruitment_id else None
+
+    def update_recruitment(self, recruitment: Recruitment):
+        """
+        編集などで変わった募集情報を反映する。募集中でなくなった場合は取り除く
+        """
+        state = self.get(recruitment.id)
+        if state is None:
+            return
+        if recruitment.status != "open":
+            self.remove(recruitment.id)
+            return
+        if state.recruitment.message_id != recruitment.message_id:
+            self._by_message_id.pop(state.recruitment.message_id, None)
+            self._by_message_id[recruitment.message_id] = str(recruitment.id)
+        state.recruitment = recruitment
+
+    def remove(self, recruitment_id: UUID):
+        state = self._by_id.pop(str(recruitment_id), None)
+        if state:
+            self._by_message_id.pop(state.recruitment.message_id, None)
+
+
+class WriteBehindQueue:
+    """
+    メモリ上の状態変更をDBへ非同期に反映する順序付きキュー
+
+    1つのワーカーが登録順に書き込みを実行するため、同じ募集への参加・取消の順序は
+    DB上でも保たれる。失敗した書き込みは順序を保ったまま指数バックオフで再試行し、
+    max_retries回失敗した場合はログを出して破棄する。
+    同期的なDBクライアントの呼び出しはスレッドで実行し、イベントループを止めない。
+    """
+
+    def __init__(self, max_retries: int = 5, retry_base_delay: float = 0.5):
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._queue: Deque[Tuple[str, Callable[[], object]]] = deque()
+        self._has_items = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._worker: Optional[asyncio.Task] = None
+
+        # メトリクス
+        self.completed = 0
+        self.retried = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, description: str, write: Callable[[], object]):
+        """
+        DBへの書き込みを登録する (呼び出し元は書き込みの完了を待たない)
+        """
+        self._queue.append((description, write))
+        self._idle.clear()
+        self._has_items.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        登録済みの書き込みが全て完了するまで待つ (終了時用)
+
+        Returns:
+            bool: 全て完了した場合はTrue
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            print(f"Write-behind queue still has {self.pending} pending write(s).")
+            return False
+
+    def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            if not self._queue:
+                self._has_items.clear()
+                self._idle.set()
+                await self._has_items.wait()
+                continue
+
+            description, write = self._queue[0]
+            await self._execute(description, write)
+            self._queue.popleft()
+
+    async def _execute(self, description: str, write: Callable[[], object]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(write)
+                self.completed += 1
+                return
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    print(f"Dropped write '{description}' after retries: {e!r}")
+                    self.dropped += 1
+                    return
+                self.retried += 1
+                await asyncio.sleep(self.retry_base_delay * (2**attempt))
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,136 @@
+# services/role_registry.py
+import asyncio
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+import discord
+
+
+class RoleSpec(NamedTuple):
+    """
+    事前作成するロールの定義 (名前・色・メンバー一覧での分離表示)
+    """
+
+    name: str
+    color: discord.Color
+    hoist: bool = False
+
+
+class RoleRegistry:
+    """
+    ギルドごとのロールを名前で索引し、ロールの取得・作成を一元管理するクラス
+    RankServiceとActivityServiceで共有し、同名ロールの二重作成を防ぐ
+    """
+
+    def __init__(self):
+        # guild_id -> {ロール名: Role}
+        self._roles: Dict[int, Dict[str, discord.Role]] = {}
+        # (guild_id, ロール名) -> 作成中ロールのFuture (シングルフライト用)
+        self._pending: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    def _get_index(self, guild: discord.Guild) -> Dict[str, discord.Role]:
+        """
+        ギルドのロール索引を取得する。未作成の場合はguild.rolesから一度だけ構築する
+        """
+        index = self._roles.get(guild.id)
+        if index is None:
+            index = {}
+            for role in guild.roles:
+                # 同名ロールが複数ある場合は discord.utils.get と同じく先頭を優先
+                index.setdefault(role.name, role)
+            self._roles[guild.id] = index
+        return index
+
+    def get_role(self, guild: discord.Guild, role_name: str) -> Optional[discord.Role]:
+        """
+        名前からロールを取得する (作成はしない)
+        """
+        return self._get_index(guild).get(role_name)
+
+    async def get_or_create_role(
+        self,
+        guild: discord.Guild,
+        role_name: str,
+        *,
+        color: discord.Color = discord.Color.default(),
+        hoist: bool = False,
+        reason: Optional[str] = None,
+    ) -> discord.Role:
+        """
+        指定された名前のロールを探し、存在しない場合は作成する
+        同じロールの作成が進行中であれば、新たに作成せずその結果を待つ
+        """
+        index = self._get_index(guild)
+        existing_role = index.get(role_name)
+        if existing_role:
+            return existing_role
+
+        key = (guild.id, role_name)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await pending
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            role = await guild.create_role(
+                name=role_name, color=color, hoist=hoist, reason=reason
+            )
+        except Exception as e:
+            future.set_exception(e)
+            # 待機者がいない場合に "exception was never retrieved" を出さないため
+            future.exception()
+            raise
+        else:
+            index[role_name] = role
+            future.set_result(role)
+            return role
+        finally:
+            del self._pending[key]
+
+    async def ensure_roles(
+        self, guild: discord.Guild, specs: Iterable[RoleSpec], reason: str
+    ) -> Dict[str, discord.Role]:
+        """
+        定義されたロールをまとめて用意する。存在しないものだけを作成する
+        """
+        roles = {}
+        for spec in specs:
+            roles[spec.name] = await self.get_or_create_role(
+                guild, spec.name, color=spec.color, hoist=spec.hoist, reason=reason
+            )
+        return roles
+
+    # --- Gatewayイベントによる索引の更新 ---
+
+    def on_role_create(self, role: discord.Role):
+        index = self._roles.get(role.guild.id)
+        if index is not None:
+            index.setdefault(role.name, role)
+
+    def on_role_delete(self, role: discord.Role):
+        index = self._roles.get(role.guild.id)
+        if index is None:
+            return
+        indexed = index.get(role.name)
+        if indexed is not None and indexed.id == role.id:
+            # 同名の別ロールが残っていれば、そちらで索引し直す
+            del index[role.name]
+            for other in role.guild.roles:
+                if other.name == role.name and other.id != role.id:
+                    index[role.name] = other
+                    break
+
+    def on_role_update(self, before: discord.Role, after: discord.Role):
+        if before.name != after.name:
+            self.on_role_delete(before)
+        index = self._roles.get(after.guild.id)
+        if index is not None:
+            indexed = index.get(after.name)
+            if indexed is None or indexed.id == after.id:
+                index[after.name] = after
+
+    def invalidate(self, guild_id: int):
+        """
+        ギルドの索引を破棄する (Botがギルドから退出した場合など)
+        """
+        self._roles.pop(guild_id, None)
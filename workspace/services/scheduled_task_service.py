@@ -0,0 +1,179 @@
+# services/scheduled_task_service.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+import discord
+
+from db.job_lease_repository import JobLeaseRepository
+from db.recruitment_repository import RecruitmentRepository
+from db.task_run_repository import TaskRunRepository
+from services.job_lease import JobLease, default_holder_id
+from services.member_resolver import MemberResolver
+from services.rank_service import RankService
+from services.activity_service import ActivityService
+from services.task_checkpoint import TaskCheckpointStore
+
+# 日本時間のタイムゾーン (デイリータスクの実行IDは日本時間の日付で決める)
+JST = timezone(timedelta(hours=9), "JST")
+
+
+class ScheduledTaskService:
+    """
+    定期実行タスク(ランク更新・活動評価・募集のアーカイブ)の実行手順を管理する
+    Bot本体のタスクループと、単体実行用のDailyTaskRunnerの両方から利用する
+    """
+
+    def __init__(
+        self,
+        rank_service: RankService,
+        activity_service: ActivityService,
+        guild_concurrency: int = 3,
+        use_gateway: bool = True,
+        task_run_repo: Optional[TaskRunRepository] = None,
+        checkpoint_batch_size: int = 20,
+        job_lease_repo: Optional[JobLeaseRepository] = None,
+        lease_ttl_seconds: int = 300,
+        lease_wait_seconds: float = 0,
+        recruitment_repo: Optional[RecruitmentRepository] = None,
+        archive_after_days: int = 30,
+        archive_batch_size: int = 500,
+    ):
+        self.rank_service = rank_service
+        self.activity_service = activity_service
+        self.guild_concurrency = guild_concurrency
+        # Gatewayに接続していない単体実行ではFalseにし、メンバー解決をRESTで行う
+        self.use_gateway = use_gateway
+        # 指定された場合、進捗をDBに記録して中断後の再実行で再開できるようにする
+        self.task_run_repo = task_run_repo
+        self.checkpoint_batch_size = checkpoint_batch_size
+        # 指定された場合、Bot本体と単体実行などが同じタスクを同時に実行しないよう排他制御する
+        self.job_lease_repo = job_lease_repo
+        self.lease_ttl_seconds = lease_ttl_seconds
+        # 0の場合、他のプロセスが実行中であれば待たずにスキップする
+        self.lease_wait_seconds = lease_wait_seconds
+        self.holder_id = default_holder_id()
+        # 指定された場合、終了からarchive_after_days日以上経った募集をアーカイブへ移す
+        self.recruitment_repo = recruitment_repo
+        self.archive_after_days = archive_after_days
+        self.archive_batch_size = archive_batch_size
+
+    async def _run_exclusive(
+        self, job_name: str, factory: Callable[[], Awaitable[None]]
+    ) -> bool:
+        if self.job_lease_repo is None:
+            await factory()
+            return True
+        lease = JobLease(
+            self.job_lease_repo, job_name, self.holder_id, self.lease_ttl_seconds
+        )
+        return await lease.run(factory, wait_seconds=self.lease_wait_seconds)
+
+    def _checkpoint_store(self, now: datetime) -> Optional[TaskCheckpointStore]:
+        if self.task_run_repo is None:
+            return None
+        run_id = f"daily:{now.astimezone(JST).date().isoformat()}"
+        return TaskCheckpointStore(
+            self.task_run_repo, run_id, batch_size=self.checkpoint_batch_size
+        )
+
+    async def run_daily_tasks(
+        self, guilds: List[discord.Guild], now: Optional[datetime] = None
+    ) -> bool:
+        """
+        ランク更新と各ギルドの活動評価ロール更新を並行して実行する
+        他のプロセスが実行中の場合はスキップし、Falseを返す
+
+        ランク更新はユーザー単位で全ギルドにまとめて反映する(Riot APIの呼び出しを
+        ギルド数に比例させないため)。活動評価は触るロールがランクと重ならないため、
+        ギルドごとに同時実行数の上限付きで並行に処理する。
+        """
+        return await self._run_exclusive(
+            "daily", lambda: self._run_daily_tasks(guilds, now)
+        )
+
+    async def _run_daily_tasks(
+        self, guilds: List[discord.Guild], now: Optional[datetime]
+    ):
+        print(f"--- Running Daily Tasks for {len(guilds)} guild(s) ---")
+        semaphore = asyncio.Semaphore(self.guild_concurrency)
+        # メンバーの解決結果はこの実行の間だけ共有する
+        member_resolver = MemberResolver(use_gateway=self.use_gateway)
+        # 同じ日の再実行では、前回の進捗から再開する
+        checkpoints = self._checkpoint_store(now or datetime.now(timezone.utc))
+
+        async def run_activity_tasks(guild: discord.Guild):
+            async with semaphore:
+                print(f"[{guild.name}] Updating activity roles...")
+                await self.activity_service.update_activity_roles(
+                    guild, member_resolver, checkpoints
+                )
+
+        # 1. ランク更新タスク: 通常はローリング更新で1日かけて更新されるため、取りこぼし分のみ
+        # 2. 活動評価ロール付与タスク
+        phases = [
+            self.rank_service.refresh_overdue_users(
+                guilds,
+                member_resolver=member_resolver,
+                checkpoint=await checkpoints.phase("rank") if checkpoints else None,
+            )
+        ]
+        phases.extend(run_activity_tasks(guild) for guild in guilds)
+        results = await asyncio.gather(*phases, return_exceptions=True)
+
+        # 1つのギルドの失敗で他のギルドの処理を止めない
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Error during daily tasks: {result!r}")
+        print(
+            f"--- Daily Tasks Finished "
+            f"(member resolution requests: {member_resolver.request_count}) ---"
+        )
+
+    async def run_rank_refresh_tick(self, guilds: List[discord.Guild]) -> bool:
+        """
+        現在のスロットに該当するユーザーのランクだけを更新する
+        デイリータスクの実行中はスキップし、Falseを返す
+        """
+        # デイリータスクの取りこぼし救済と同じユーザーを二重に更新し、
+        # 1日のAPI呼び出し予算を超えないようにする
+        if self.job_lease_repo is not None and await asyncio.to_thread(
+            self.job_lease_repo.is_held, "daily"
+        ):
+            print("Daily tasks are running. Skipping rank refresh tick.")
+            return False
+        member_resolver = MemberResolver(use_gateway=self.use_gateway)
+        return await self._run_exclusive(
+            "rank-tick",
+            lambda: self.rank_service.refresh_rank_slice(
+                guilds, member_resolver=member_resolver
+            ),
+        )
+
+    async def run_recruitment_archive(self, now: Optional[datetime] = None) -> bool:
+        """
+        終了(締切・キャンセル)からarchive_after_days日以上経った募集をアーカイブへ移す
+        他のプロセスが実行中の場合はスキップし、Falseを返す
+        """
+        if self.recruitment_repo is None:
+            return False
+        return await self._run_exclusive(
+            "recruitment-archive", lambda: self._run_recruitment_archive(now)
+        )
+
+    async def _run_recruitment_archive(self, now: Optional[datetime]):
+        before = (now or datetime.now(timezone.utc)) - timedelta(
+            days=self.archive_after_days
+        )
+        total = 0
+        # 1回の移動を小さく保ち、ボタン操作のクエリとロックを長く競合させない
+        while True:
+            moved = await asyncio.to_thread(
+                self.recruitment_repo.archive_finished_recruitments,
+                before,
+                self.archive_batch_size,
+            )
+            total += moved
+            if moved < self.archive_batch_size:
+                break
+        print(f"Archived {total} recruitment(s) finished before {before.isoformat()}.")
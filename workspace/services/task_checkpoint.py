@@ -0,0 +1,101 @@
+# services/task_checkpoint.py
+import asyncio
+from typing import Optional
+
+from db.task_run_repository import TaskRunRepository
+
+
+class PhaseCheckpoint:
+    """
+    定期実行タスクの1フェーズ分の進捗を管理するクラス
+
+    ユーザーIDの昇順に処理することを前提に、最後に処理したユーザーIDをカーソルとして
+    batch_size件ごとにDBへ記録する。再実行時はカーソル以下のユーザーをスキップする。
+    DBへの書き込みはイベントループを止めないようスレッドで実行する。
+    """
+
+    def __init__(
+        self,
+        task_run_repo: TaskRunRepository,
+        run_id: str,
+        phase: str,
+        cursor: Optional[int] = None,
+        completed: bool = False,
+        batch_size: int = 20,
+    ):
+        self.task_run_repo = task_run_repo
+        self.run_id = run_id
+        self.phase = phase
+        self.cursor = cursor
+        self.completed = completed
+        self.batch_size = batch_size
+        self._unsaved = 0
+
+    def should_skip(self, user_id: int) -> bool:
+        """
+        前回の実行で処理済みのユーザーかどうか
+        """
+        if self.completed:
+            return True
+        return self.cursor is not None and user_id <= self.cursor
+
+    async def advance(self, user_id: int):
+        """
+        ユーザーの処理完了を記録する。batch_size件ごとにDBへ反映する
+        """
+        self.cursor = user_id
+        self._unsaved += 1
+        if self._unsaved >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if self._unsaved == 0 or self.cursor is None:
+            return
+        await asyncio.to_thread(
+            self.task_run_repo.update_cursor, self.run_id, self.phase, str(self.cursor)
+        )
+        self._unsaved = 0
+
+    async def complete(self):
+        """
+        フェーズを完了済みにする
+        """
+        await self.flush()
+        await asyncio.to_thread(
+            self.task_run_repo.mark_completed, self.run_id, self.phase
+        )
+        self.completed = True
+
+
+class TaskCheckpointStore:
+    """
+    1回の定期実行(run_id)に属するフェーズの進捗を払い出すクラス
+    同じrun_idで再実行すると、前回の進捗から再開する
+    """
+
+    def __init__(
+        self, task_run_repo: TaskRunRepository, run_id: str, batch_size: int = 20
+    ):
+        self.task_run_repo = task_run_repo
+        self.run_id = run_id
+        self.batch_size = batch_size
+
+    async def phase(self, name: str) -> PhaseCheckpoint:
+        task_run = await asyncio.to_thread(
+            self.task_run_repo.get_or_create_task_run, self.run_id, name
+        )
+        cursor = None
+        completed = False
+        if task_run:
+            cursor = int(task_run.cursor) if task_run.cursor else None
+            completed = task_run.status == "completed"
+            if cursor is not None or completed:
+                print(f"Resuming {self.run_id}/{name} from cursor {cursor}.")
+        return PhaseCheckpoint(
+            self.task_run_repo,
+            self.run_id,
+            name,
+            cursor=cursor,
+            completed=completed,
+            batch_size=self.batch_size,
+        )
@@ -0,0 +1,174 @@
+# tests/api_clients/test_discord_write_governor.py
+
+import asyncio
+
+import pytest
+
+# テスト対象のクラスをインポート
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    channel_bucket,
+    dm_bucket,
+    interaction_bucket,
+    member_roles_bucket,
+)
+
+
+@pytest.mark.asyncio
+class TestDiscordWriteGovernor:
+    """DiscordWriteGovernorのテストクラス"""
+
+    async def test_submit_returns_result(self):
+        """書き込み処理の戻り値がそのまま返されるか"""
+        governor = DiscordWriteGovernor()
+
+        async def write():
+            return "ok"
+
+        result = await governor.submit(
+            WritePriority.EMBED_EDIT, channel_bucket(1), write
+        )
+
+        assert result == "ok"
+        assert governor.metrics()["completed"]["EMBED_EDIT"] == 1
+
+    async def test_foreground_is_not_blocked_by_background(self):
+        """バックグラウンドの書き込みで枠が埋まっても、Embed編集は予約枠で実行されるか"""
+        governor = DiscordWriteGovernor(max_concurrency=2, reserved_foreground=1)
+        release = asyncio.Event()
+
+        async def slow_role_edit():
+            await release.wait()
+
+        # 別々のギルドへのロール変更を3件投入 (バックグラウンド枠は1つだけ)
+        background = [
+            asyncio.create_task(
+                governor.submit(
+                    WritePriority.ROLE_EDIT, member_roles_bucket(g), slow_role_edit
+                )
+            )
+            for g in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        metrics = governor.metrics()
+        assert metrics["in_flight_background"] == 1
+        assert metrics["queue_depth"]["ROLE_EDIT"] == 2
+
+        async def edit_embed():
+            return "edited"
+
+        result = await asyncio.wait_for(
+            governor.submit(WritePriority.EMBED_EDIT, channel_bucket(1), edit_embed),
+            timeout=1,
+        )
+        assert result == "edited"
+
+        release.set()
+        await asyncio.gather(*background)
+        assert governor.metrics()["queue_depth"]["ROLE_EDIT"] == 0
+
+    async def test_higher_priority_waiter_runs_first(self):
+        """枠が空いたとき、優先度の高い待機者から実行されるか"""
+        governor = DiscordWriteGovernor(max_concurrency=2, reserved_foreground=1)
+        release = asyncio.Event()
+        order = []
+
+        async def blocker():
+            await release.wait()
+
+        def record(name):
+            async def write():
+                order.append(name)
+
+            return write
+
+        # 2枠を埋める (バックグラウンド1 + フォアグラウンド1)
+        blockers = [
+            asyncio.create_task(
+                governor.submit(WritePriority.ROLE_EDIT, "a", blocker)
+            ),
+            asyncio.create_task(
+                governor.submit(WritePriority.EMBED_EDIT, "b", blocker)
+            ),
+        ]
+        await asyncio.sleep(0)
+
+        waiting = [
+            asyncio.create_task(governor.submit(WritePriority.DM, "c", record("dm"))),
+            asyncio.create_task(
+                governor.submit(WritePriority.EMBED_EDIT, "d", record("embed"))
+            ),
+        ]
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(*blockers, *waiting)
+        assert order == ["embed", "dm"]
+
+    async def test_interaction_is_not_blocked_by_embed_edits(self):
+        """Embed編集(429で待機中など)で全ての枠が埋まっても、インタラクション応答は実行されるか"""
+        governor = DiscordWriteGovernor(max_concurrency=2, reserved_foreground=1)
+        release = asyncio.Event()
+
+        async def rate_limited_edit():
+            await release.wait()
+
+        edits = [
+            asyncio.create_task(
+                governor.submit(
+                    WritePriority.EMBED_EDIT, channel_bucket(c), rate_limited_edit
+                )
+            )
+            for c in range(3)
+        ]
+        await asyncio.sleep(0)
+        metrics = governor.metrics()
+        assert metrics["in_flight"] == 2
+        assert metrics["queue_depth"]["EMBED_EDIT"] == 1
+
+        async def defer():
+            return "deferred"
+
+        result = await asyncio.wait_for(
+            governor.submit(WritePriority.INTERACTION, interaction_bucket(1), defer),
+            timeout=1,
+        )
+        assert result == "deferred"
+        assert governor.metrics()["completed"]["INTERACTION"] == 1
+
+        release.set()
+        await asyncio.gather(*edits)
+        assert governor.metrics()["in_flight"] == 0
+
+    async def test_failure_releases_slot(self):
+        """書き込みが失敗しても枠が返却されるか"""
+        governor = DiscordWriteGovernor(max_concurrency=2, reserved_foreground=1)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await governor.submit(WritePriority.DM, "dm", failing)
+
+        metrics = governor.metrics()
+        assert metrics["in_flight"] == 0
+        assert metrics["failed"]["DM"] == 1
+        assert metrics["buckets"] == 0
+
+    async def test_idle_buckets_are_discarded(self):
+        """書き込みが終わったバケットは保持し続けないか"""
+        governor = DiscordWriteGovernor()
+
+        async def send():
+            return None
+
+        await asyncio.gather(
+            *(
+                governor.submit(WritePriority.DM, dm_bucket(user_id), send)
+                for user_id in range(100)
+            )
+        )
+
+        assert governor.metrics()["buckets"] == 0
@@ -0,0 +1,121 @@
+# tests/cogs/test_recruitment_cog.py
+
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+# テスト対象のクラスをインポート
+from cogs.recruitment_cog import RecruitmentCog
+from db.recruitment_repository import Recruitment
+from views.interaction_responder import InteractionResponder
+from views.recruitment_modal import RecruitmentModal
+
+RECRUITMENT_ID = uuid4()
+
+
+def make_recruitment(**updates):
+    recruitment = Recruitment(
+        id=RECRUITMENT_ID,
+        message_id="456",
+        channel_id="123",
+        guild_id="guild_123",
+        creator_id="789",
+        party_type="フルパ",
+        max_participants=5,
+        status="open",
+        # JSTでは22:30
+        deadline=datetime(2025, 7, 7, 13, 30, tzinfo=timezone.utc),
+        created_at=datetime.now(timezone.utc),
+        updated_at=datetime.now(timezone.utc),
+    )
+    return recruitment.model_copy(update=updates)
+
+
+@pytest.mark.asyncio
+class TestEditCommand:
+    """/edit コマンドのテストクラス"""
+
+    @pytest.fixture
+    def cog(self, mocker) -> RecruitmentCog:
+        bot = mocker.Mock()
+        bot.interaction_responder = InteractionResponder()
+        bot.write_governor.submit = AsyncMock()
+        service = mocker.Mock()
+        service.edit_recruitment = AsyncMock()
+        return RecruitmentCog(bot, service)
+
+    @pytest.fixture
+    def interaction(self, mocker):
+        interaction = mocker.Mock()
+        interaction.user.id = 789
+        interaction.response.send_modal = AsyncMock()
+        interaction.response.send_message = AsyncMock()
+        interaction.response.defer = AsyncMock()
+        interaction.followup.send = AsyncMock()
+        return interaction
+
+    async def test_edit_opens_modal_with_current_values(self, cog, interaction):
+        """募集中の募集がある場合、現在の内容を入力済みのモーダルを開くか"""
+        repo = cog.recruitment_service.recruitment_repo
+        repo.get_cached_open_recruitment_by_creator_id.return_value = (
+            make_recruitment()
+        )
+
+        await cog.edit.callback(cog, interaction)
+
+        interaction.response.send_message.assert_not_awaited()
+        modal = interaction.response.send_modal.await_args.args[0]
+        assert isinstance(modal, RecruitmentModal)
+        assert modal.party_type.default == "フルパ"
+        assert modal.needed_count.default == "5"
+        assert modal.deadline_str.default == "22:30"
+        repo.query_open_recruitment_by_creator_id.assert_not_called()
+
+    async def test_edit_modal_submit_updates_recruitment(self, cog, interaction):
+        """編集モーダルの送信内容で募集が更新されるか"""
+        repo = cog.recruitment_service.recruitment_repo
+        repo.get_cached_open_recruitment_by_creator_id.return_value = (
+            make_recruitment()
+        )
+        cog.recruitment_service.edit_recruitment.return_value = (
+            make_recruitment(max_participants=3),
+            "募集情報を更新しました。",
+        )
+        cog.recruitment_service.get_participant_ids.return_value = ["789"]
+        await cog.edit.callback(cog, interaction)
+        modal = interaction.response.send_modal.await_args.args[0]
+
+        # モーダルのon_submitと同じ引数でコールバックを呼び出す
+        await modal.on_submit_callback(
+            interaction,
+            party_type="トリオ",
+            needed_count_str="3",
+            deadline_str="23:00",
+        )
+
+        recruitment_id, updates, _ = (
+            cog.recruitment_service.edit_recruitment.await_args.args
+        )
+        assert recruitment_id == RECRUITMENT_ID
+        assert updates == {
+            "party_type": "トリオ",
+            "max_participants": 3,
+            "deadline_str": "23:00",
+        }
+        interaction.followup.send.assert_awaited_once_with(
+            "募集情報を更新しました。", ephemeral=True
+        )
+
+    async def test_edit_without_open_recruitment(self, cog, interaction):
+        """募集中の募集が無い場合、モーダルを開かずにその旨を返すか"""
+        repo = cog.recruitment_service.recruitment_repo
+        repo.get_cached_open_recruitment_by_creator_id.return_value = None
+        repo.query_open_recruitment_by_creator_id.return_value = None
+
+        await cog.edit.callback(cog, interaction)
+
+        interaction.response.send_modal.assert_not_awaited()
+        interaction.response.send_message.assert_awaited_once_with(
+            "あなたが編集できる募集中(open)の募集はありません。", ephemeral=True
+        )
@@ -12,7 +12,7 @@ load_dotenv()
 
 from config import settings
 from supabase import create_client
-from db.recruitment_repository import RecruitmentRepository
+from db.recruitment_repository import Recruitment, RecruitmentRepository
 from db.participant_repository import ParticipantRepository
 
 
@@ -50,13 +50,21 @@ class TestRecruitmentRepositoriesIntegration:
         db_client.table("users").insert({"discord_id": creator_id}).execute()
 
         # 2. テスト用の募集を作成
-        recruitment = recruitment_repo.create_recruitment(
-            message_id="integration_test_msg_123",
-            guild_id="integration_test_guild_123",
-            creator_id=creator_id,
-            party_type="テストパーティ",
-            max_participants=5,
-            deadline=datetime.now() + timedelta(hours=1),
+        now = datetime.now()
+        recruitment = recruitment_repo.create_recruitment_with_participants(
+            Recruitment(
+                id=uuid4(),
+                message_id="integration_test_msg_123",
+                guild_id="integration_test_guild_123",
+                creator_id=creator_id,
+                party_type="テストパーティ",
+                max_participants=5,
+                status="open",
+                deadline=now + timedelta(hours=1),
+                created_at=now,
+                updated_at=now,
+            ),
+            [],
         )
 
         # yieldでテストに必要なデータを渡す
@@ -105,3 +113,24 @@ class TestRecruitmentRepositoriesIntegration:
         assert len(participants) == 1
         assert participants[0].recruitment_id == sample_recruitment.id
         assert participants[0].user_id == participant_user_id
+
+    def test_get_open_recruitments_with_participants(
+        self,
+        recruitment_repo: RecruitmentRepository,
+        participant_repo: ParticipantRepository,
+        sample_recruitment,
+    ):
+        """募集中の募集と参加者が1回のクエリでまとめて取得できるか"""
+        # --- 準備 (Arrange) ---
+        participant_user_id = f"participant_{uuid4()}"
+        participant_repo.add_participant(sample_recruitment.id, participant_user_id)
+
+        # --- 実行 (Act) ---
+        rows = recruitment_repo.get_open_recruitments_with_participants()
+
+        # --- 検証 (Assert) ---
+        participants_by_id = {r.id: ps for r, ps in rows}
+        assert sample_recruitment.id in participants_by_id
+        assert [p.user_id for p in participants_by_id[sample_recruitment.id]] == [
+            participant_user_id
+        ]
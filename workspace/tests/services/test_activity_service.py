@@ -5,6 +5,8 @@ from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock
 
 # テスト対象のクラスをインポート
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from services.role_registry import RoleRegistry
 from services.activity_service import (
     ActivityService,
     REGULAR_MEMBER_ROLE_NAME,
@@ -31,7 +33,10 @@ class TestActivityService:
     def service(self, mock_user_repo, mock_activity_log_repo) -> ActivityService:
         """テスト対象のActivityServiceインスタンス"""
         return ActivityService(
-            user_repo=mock_user_repo, activity_log_repo=mock_activity_log_repo
+            user_repo=mock_user_repo,
+            activity_log_repo=mock_activity_log_repo,
+            role_registry=RoleRegistry(),
+            write_governor=DiscordWriteGovernor(),
         )
 
     # 【修正点】idを引数で受け取るように変更
@@ -73,21 +78,15 @@ class TestActivityService:
         mock_guild.roles = [mock_role]
         mock_guild.create_role = AsyncMock(return_value=mock_role)
 
-        # DBからの戻り値をIDベースで設定
-        def get_join_count_side_effect(user_id, start_date, end_date):
-            counts = {
-                "user_a": 10,
-                "user_b": 15,
-                "user_c": 1,
-                "user_d": 8,
-                "user_e": 7,
-                "user_f": 6,
-            }
-            return counts.get(user_id, 0)
-
-        mock_activity_log_repo.get_user_join_count_in_period.side_effect = (
-            get_join_count_side_effect
-        )
+        # DBからの戻り値をIDベースで設定 (参加回数はまとめて1回で取得する)
+        mock_activity_log_repo.get_join_counts_by_user_in_period.return_value = {
+            "user_a": 10,
+            "user_b": 15,
+            "user_c": 1,
+            "user_d": 8,
+            "user_e": 7,
+            "user_f": 6,
+        }
 
         # --- 実行 (Act) ---
         await service._update_regular_members_role(
@@ -95,6 +94,9 @@ class TestActivityService:
         )
 
         # --- 検証 (Assert) ---
+        mock_activity_log_repo.get_join_counts_by_user_in_period.assert_called_once()
+        mock_activity_log_repo.get_user_join_count_in_period.assert_not_called()
+
         member_a.add_roles.assert_not_called()
         member_a.remove_roles.assert_not_called()
 
@@ -138,13 +140,10 @@ class TestActivityService:
 
         mock_activity_log_repo.get_guild_total_recruitment_count_in_period.return_value = 10
 
-        def get_join_count_side_effect(user_id, start_date, end_date):
-            counts = {"user_a": 0, "user_b": 5, "user_c": 8}
-            return counts.get(user_id, 0)
-
-        mock_activity_log_repo.get_user_join_count_in_period.side_effect = (
-            get_join_count_side_effect
-        )
+        mock_activity_log_repo.get_join_counts_by_user_in_period.return_value = {
+            "user_b": 5,
+            "user_c": 8,
+        }
 
         # --- 実行 (Act) ---
         await service._update_ghost_members_role(
@@ -164,3 +163,35 @@ class TestActivityService:
 
         member_c.add_roles.assert_not_called()
         member_c.remove_roles.assert_not_called()
+
+    async def test_update_activity_roles_loads_join_counts_once(
+        self, service: ActivityService, mock_activity_log_repo, mocker
+    ):
+        """参加回数はギルドごとに1回だけまとめて取得し、両方のロールの判定で使うか"""
+        regular_role = MagicMock()
+        regular_role.name = REGULAR_MEMBER_ROLE_NAME
+        ghost_role = MagicMock()
+        ghost_role.name = GHOST_MEMBER_ROLE_NAME
+        member_a = self._create_mock_member(mocker, id="user_a")
+        member_b = self._create_mock_member(mocker, id="user_b")
+
+        mock_guild = mocker.Mock()
+        mock_guild.id = 1
+        mock_guild.members = [member_a, member_b]
+        mock_guild.roles = [regular_role, ghost_role]
+        mock_guild.create_role = AsyncMock()
+        mock_activity_log_repo.get_guild_total_recruitment_count_in_period.return_value = 10
+        mock_activity_log_repo.get_join_counts_by_user_in_period.return_value = {
+            "user_a": 3
+        }
+
+        await service.update_activity_roles(mock_guild)
+
+        mock_activity_log_repo.get_join_counts_by_user_in_period.assert_called_once()
+        mock_activity_log_repo.get_user_join_count_in_period.assert_not_called()
+        member_a.add_roles.assert_called_once_with(
+            regular_role, reason="Top 5 active member"
+        )
+        member_b.add_roles.assert_called_once_with(
+            ghost_role, reason="Non-participation rate > 90%"
+        )
@@ -0,0 +1,95 @@
+# tests/services/test_dm_notifier.py
+
+import asyncio
+import discord
+import pytest
+from unittest.mock import AsyncMock
+
+# テスト対象のクラスをインポート
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from services.dm_notifier import DMNotifier
+
+
+def make_channel(mocker, delay=0.0, error=None, stats=None):
+    """DMチャンネルのモック (statsに送信中の同時実行数を記録する)"""
+    channel = mocker.Mock()
+    stats = stats if stats is not None else {"active": 0, "peak": 0}
+
+    async def send(content):
+        stats["active"] += 1
+        stats["peak"] = max(stats["peak"], stats["active"])
+        await asyncio.sleep(delay)
+        stats["active"] -= 1
+        if error:
+            raise error
+
+    channel.send = AsyncMock(side_effect=send)
+    return channel
+
+
+@pytest.fixture
+def client(mocker):
+    """discord.Clientのモック (ユーザーキャッシュは空)"""
+    client = mocker.Mock()
+    client.get_user.return_value = None
+    client.create_dm = AsyncMock()
+    return client
+
+
+@pytest.mark.asyncio
+class TestDMNotifier:
+    """DM一斉送信のテストクラス"""
+
+    async def test_sends_concurrently_within_limit(self, client, mocker):
+        """上限の範囲で並行に送り、DMチャンネルを使い回すか"""
+        channels = {}
+        stats = {"active": 0, "peak": 0}
+
+        async def create_dm(user):
+            channels[user.id] = make_channel(mocker, delay=0.02, stats=stats)
+            return channels[user.id]
+
+        client.create_dm.side_effect = create_dm
+        notifier = DMNotifier(
+            client, DiscordWriteGovernor(max_concurrency=8), concurrency=3
+        )
+        user_ids = [str(i) for i in range(1, 7)]
+
+        report = await notifier.notify(user_ids, "キャンセルされました")
+        await notifier.notify(user_ids[:2], "2回目")
+
+        assert sorted(report.sent) == sorted(user_ids)
+        assert stats["peak"] == 3
+        assert client.create_dm.await_count == 6
+        assert channels[1].send.await_count == 2
+
+    async def test_uses_cached_user_dm_channel(self, client, mocker):
+        """キャッシュにあるユーザーのDMチャンネルはリクエストせずに使うか"""
+        channel = make_channel(mocker)
+        client.get_user.return_value = mocker.Mock(dm_channel=channel)
+        notifier = DMNotifier(client, DiscordWriteGovernor())
+
+        report = await notifier.notify(["1"], "通知")
+
+        assert report.sent == ["1"]
+        client.create_dm.assert_not_awaited()
+        client.fetch_user.assert_not_called()
+
+    async def test_dispatch_reports_failures(self, client, mocker):
+        """バックグラウンドで送り、届かなかったユーザーを結果に含めるか"""
+        forbidden = discord.Forbidden(mocker.Mock(status=403, reason="Forbidden"), "")
+        client.create_dm.side_effect = [
+            make_channel(mocker),
+            make_channel(mocker, error=forbidden),
+            make_channel(mocker, error=RuntimeError("boom")),
+        ]
+        notifier = DMNotifier(client, DiscordWriteGovernor(), concurrency=1)
+        on_complete = AsyncMock()
+
+        task = notifier.dispatch(["1", "2", "3"], "通知", "test", on_complete)
+        report = await task
+
+        assert report.sent == ["1"]
+        assert report.undelivered == ["2", "3"]
+        on_complete.assert_awaited_once_with(report)
+        assert notifier.metrics()["in_flight"] == 0
@@ -0,0 +1,91 @@
+# tests/services/test_interaction_dedupe.py
+
+import asyncio
+import pytest
+
+# テスト対象のクラスをインポート
+from services.interaction_dedupe import InteractionDeduplicator
+
+
+@pytest.mark.asyncio
+class TestInteractionDeduplicator:
+    """ボタン操作の重複排除のテストクラス"""
+
+    async def test_double_click_returns_first_result(self):
+        """実行中・実行直後に繰り返された同じ操作は、最初の結果を返すか"""
+        dedupe = InteractionDeduplicator(ttl=3.0)
+        calls = []
+
+        async def join():
+            calls.append("join")
+            await asyncio.sleep(0.01)
+            return f"参加しました。({len(calls)})"
+
+        results = await asyncio.gather(
+            dedupe.run(1, 10, "join", join), dedupe.run(1, 10, "join", join)
+        )
+        again = await dedupe.run(1, 10, "join", join)
+
+        assert calls == ["join"]
+        assert results == ["参加しました。(1)"] * 2
+        assert again == "参加しました。(1)"
+        assert dedupe.metrics()["hits"] == 2
+
+    async def test_different_action_is_not_deduplicated(self):
+        """参加→取消→参加のような別の操作を挟んだ場合は実行するか"""
+        dedupe = InteractionDeduplicator(ttl=3.0)
+        calls = []
+
+        async def record(action):
+            calls.append(action)
+            return action
+
+        for action in ["join", "leave", "join"]:
+            await dedupe.run(1, 10, action, lambda a=action: record(a))
+        # 別のユーザー・別のメッセージは別の操作として扱う
+        await dedupe.run(2, 10, "join", lambda: record("join"))
+        await dedupe.run(1, 11, "join", lambda: record("join"))
+
+        assert calls == ["join", "leave", "join", "join", "join"]
+        assert dedupe.metrics()["hits"] == 0
+
+    async def test_errors_are_not_cached_and_memory_is_bounded(self):
+        """失敗した操作は保持せず、保持数が上限を超えないか"""
+        dedupe = InteractionDeduplicator(ttl=3.0, max_entries=2)
+
+        async def fail():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            await dedupe.run(1, 10, "join", fail)
+        assert await dedupe.run(1, 10, "join", lambda: asyncio.sleep(0, "ok")) == "ok"
+
+        for user_id in range(5):
+            await dedupe.run(user_id, 20, "join", lambda: asyncio.sleep(0, "ok"))
+        assert dedupe.metrics()["entries"] == 2
+
+    async def test_results_rejected_by_keep_are_not_cached(self):
+        """keepがFalseを返した結果(混雑など)は保持せず、再試行で実行し直すか"""
+        dedupe = InteractionDeduplicator(ttl=3.0)
+        results = iter(["busy", "参加しました。"])
+        calls = []
+
+        async def join():
+            calls.append("join")
+            await asyncio.sleep(0.01)
+            return next(results)
+
+        def keep(message):
+            return message != "busy"
+
+        # 実行中に待っていた操作には同じ結果を返す
+        first = await asyncio.gather(
+            dedupe.run(1, 10, "join", join, keep=keep),
+            dedupe.run(1, 10, "join", join, keep=keep),
+        )
+        retried = await dedupe.run(1, 10, "join", join, keep=keep)
+        again = await dedupe.run(1, 10, "join", join, keep=keep)
+
+        assert first == ["busy", "busy"]
+        assert retried == again == "参加しました。"
+        assert calls == ["join", "join"]
@@ -0,0 +1,66 @@
+# tests/services/test_job_lease.py
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+# テスト対象のクラスをインポート
+from services.job_lease import JobLease
+
+
+@pytest.mark.asyncio
+class TestJobLease:
+    """JobLeaseのテストクラス"""
+
+    @pytest.fixture
+    def mock_repo(self, mocker):
+        repo = mocker.Mock()
+        repo.try_acquire.return_value = True
+        repo.renew.return_value = True
+        return repo
+
+    async def test_run_acquires_and_releases(self, mock_repo):
+        """リースを取得して処理を実行し、終了後に解放するか"""
+        lease = JobLease(mock_repo, "daily", "holder-1")
+        job = AsyncMock()
+
+        assert await lease.run(job) is True
+
+        job.assert_awaited_once()
+        mock_repo.try_acquire.assert_called_once_with("daily", "holder-1", 300)
+        mock_repo.release.assert_called_once_with("daily", "holder-1")
+
+    async def test_second_runner_skips_when_lease_is_held(self, mock_repo):
+        """他のプロセスが保持している場合、処理を実行せずにスキップするか"""
+        mock_repo.try_acquire.return_value = False
+        lease = JobLease(mock_repo, "daily", "holder-2")
+        job = AsyncMock()
+
+        assert await lease.run(job) is False
+
+        job.assert_not_awaited()
+        mock_repo.release.assert_not_called()
+
+    async def test_waits_until_lease_expires(self, mock_repo):
+        """wait_seconds内にリースが失効すれば取得できるか"""
+        mock_repo.try_acquire.side_effect = [False, True]
+        lease = JobLease(mock_repo, "daily", "holder-2")
+
+        acquired = await lease.acquire(wait_seconds=1, poll_interval=0.01)
+
+        assert acquired is True
+        assert mock_repo.try_acquire.call_count == 2
+
+    async def test_lost_lease_stops_the_job(self, mock_repo):
+        """ハートビートでリースを奪われたことが分かった場合、処理を中断するか"""
+        mock_repo.renew.return_value = False
+        lease = JobLease(mock_repo, "daily", "holder-1", ttl_seconds=3)
+        lease.heartbeat_interval = 0.01
+
+        async def long_job():
+            await asyncio.sleep(10)
+
+        assert await lease.run(long_job) is True
+
+        assert lease.lost is True
+        mock_repo.release.assert_not_called()
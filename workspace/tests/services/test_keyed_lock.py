@@ -0,0 +1,47 @@
+# tests/services/test_keyed_lock.py
+
+import asyncio
+import pytest
+
+# テスト対象のクラスをインポート
+from services.keyed_lock import KeyedLock
+
+
+@pytest.mark.asyncio
+class TestKeyedLock:
+    """KeyedLockのテストクラス"""
+
+    async def test_same_key_runs_in_arrival_order(self):
+        """同じキーの処理が到着順に1つずつ実行されるか"""
+        locks = KeyedLock()
+        order = []
+
+        async def worker(i):
+            async with locks.hold("recruitment"):
+                order.append(("start", i))
+                await asyncio.sleep(0)
+                order.append(("end", i))
+
+        await asyncio.gather(*(worker(i) for i in range(3)))
+
+        assert order == [
+            ("start", 0),
+            ("end", 0),
+            ("start", 1),
+            ("end", 1),
+            ("start", 2),
+            ("end", 2),
+        ]
+        metrics = locks.metrics()
+        assert metrics["contended"] == 2
+        assert metrics["active_keys"] == 0
+
+    async def test_different_keys_do_not_block(self):
+        """異なるキーの処理は互いに待たないか"""
+        locks = KeyedLock(timeout=0.05)
+
+        async with locks.hold("a"):
+            async with locks.hold("b"):
+                pass
+
+        assert locks.metrics()["contended"] == 0
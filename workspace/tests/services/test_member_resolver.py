@@ -0,0 +1,133 @@
+# tests/services/test_member_resolver.py
+
+import asyncio
+
+import discord
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+# テスト対象のクラスをインポート
+from services.member_resolver import MemberResolver
+
+
+def _create_mock_member(id: int):
+    member = MagicMock()
+    member.id = id
+    return member
+
+
+def _async_iter(items):
+    async def gen():
+        for item in items:
+            yield item
+
+    return gen()
+
+
+@pytest.mark.asyncio
+class TestMemberResolver:
+    """MemberResolverのテストクラス"""
+
+    @pytest.fixture
+    def mock_guild(self, mocker):
+        guild = mocker.Mock()
+        guild.id = 1
+        guild.chunked = False
+        guild.get_member.return_value = None
+        guild.query_members = AsyncMock(return_value=[])
+        return guild
+
+    async def test_cache_hits_skip_network(self, mock_guild):
+        """Gatewayのキャッシュにいるメンバーはリクエストせずに解決されるか"""
+        cached = _create_mock_member(1)
+        mock_guild.get_member.side_effect = lambda id: cached if id == 1 else None
+        mock_guild.chunked = True
+
+        resolver = MemberResolver()
+        resolved = await resolver.prefetch(mock_guild, [1, 2])
+
+        assert resolved == {1: cached}
+        mock_guild.query_members.assert_not_called()
+        assert resolver.request_count == 0
+
+    async def test_query_members_in_chunks(self, mock_guild):
+        """キャッシュに無いメンバーは100件ずつまとめて問い合わせるか"""
+        mock_guild.query_members.side_effect = lambda user_ids, limit, cache: [
+            _create_mock_member(uid) for uid in user_ids
+        ]
+
+        resolver = MemberResolver(use_gateway=True)
+        resolved = await resolver.prefetch(mock_guild, list(range(250)))
+
+        assert len(resolved) == 250
+        assert mock_guild.query_members.await_count == 3
+        # 2回目以降はキャッシュから返される
+        await resolver.prefetch(mock_guild, list(range(250)))
+        assert mock_guild.query_members.await_count == 3
+        assert resolver.get_member(mock_guild, 42).id == 42
+
+    async def test_rest_fallback_fetches_members_once(self, mock_guild):
+        """Gatewayが使えない場合はfetch_membersで一度だけ取得するか"""
+        mock_guild.fetch_members = MagicMock(
+            return_value=_async_iter([_create_mock_member(1), _create_mock_member(2)])
+        )
+
+        resolver = MemberResolver(use_gateway=False)
+        resolved = await resolver.prefetch(mock_guild, [1, 3])
+        resolved_again = await resolver.prefetch(mock_guild, [2, 3])
+
+        assert set(resolved) == {1}
+        assert set(resolved_again) == {2}
+        mock_guild.fetch_members.assert_called_once_with(limit=None)
+        mock_guild.query_members.assert_not_called()
+
+    async def test_falls_back_to_single_fetch_when_listing_is_not_allowed(
+        self, mock_guild, mocker
+    ):
+        """fetch_membersが使えない(members intentが無い)場合、1人ずつ取得して解決するか"""
+        mock_guild.fetch_members = MagicMock(
+            side_effect=discord.ClientException("Intents.members must be enabled")
+        )
+
+        async def fetch_member(user_id):
+            if user_id == 1:
+                return _create_mock_member(user_id)
+            raise discord.NotFound(MagicMock(status=404, reason="Not Found"), "")
+
+        mock_guild.fetch_member = AsyncMock(side_effect=fetch_member)
+        mock_guild.members = []
+
+        resolver = MemberResolver(use_gateway=False)
+        resolved = await resolver.prefetch(mock_guild, [1, 2])
+        await resolver.prefetch(mock_guild, [3])
+        members = await resolver.all_members(mock_guild)
+
+        assert set(resolved) == {1}
+        assert [m.id for m in members] == [1]
+        # 一覧の取得は1回だけ試し、以降は1人ずつの取得に切り替える
+        mock_guild.fetch_members.assert_called_once()
+        assert mock_guild.fetch_member.await_count == 3
+
+    async def test_concurrent_callers_share_one_listing(self, mock_guild):
+        """並行に呼び出しても、同じギルドの全メンバー取得は1回にまとめられるか"""
+        release = asyncio.Event()
+
+        async def slow_members():
+            await release.wait()
+            for uid in (1, 2):
+                yield _create_mock_member(uid)
+
+        mock_guild.fetch_members = MagicMock(side_effect=lambda limit: slow_members())
+
+        resolver = MemberResolver(use_gateway=False)
+        tasks = [
+            asyncio.create_task(resolver.prefetch(mock_guild, [1])),
+            asyncio.create_task(resolver.all_members(mock_guild)),
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        resolved, members = await asyncio.gather(*tasks)
+
+        assert set(resolved) == {1}
+        assert len(members) == 2
+        mock_guild.fetch_members.assert_called_once_with(limit=None)
@@ -1,11 +1,14 @@
 # tests/services/test_rank_service.py
 
+import discord
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # テスト対象のクラスをインポート
-from services.rank_service import RankService
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from services.role_registry import RoleRegistry
+from services.rank_service import RankService, compute_refresh_slot
 from db.user_repository import User
 
 
@@ -29,7 +32,12 @@ class TestRankService:
     @pytest.fixture
     def service(self, mock_user_repo, mock_riot_client) -> RankService:
         """テスト対象のRankServiceインスタンス"""
-        return RankService(user_repo=mock_user_repo, riot_client=mock_riot_client)
+        return RankService(
+            user_repo=mock_user_repo,
+            riot_client=mock_riot_client,
+            role_registry=RoleRegistry(),
+            write_governor=DiscordWriteGovernor(),
+        )
 
     def _create_mock_member(self, mocker, id: str, roles=None):
         """メンバーのモックを作成するヘルパー関数"""
@@ -125,3 +133,273 @@ class TestRankService:
         # member_c (失敗): ロールの追加・削除は行われない
         member_c.add_roles.assert_not_called()
         member_c.remove_roles.assert_not_called()
+
+
+class TestRollingRankRefresh:
+    """ランクのローリング更新のテストクラス"""
+
+    NOW = datetime(2025, 7, 7, 3, 0, tzinfo=timezone.utc)
+
+    @pytest.fixture
+    def service(self, mocker) -> RankService:
+        riot_client = mocker.Mock()
+        riot_client.get_rank_info_by_puuid = AsyncMock(return_value={"tier": "Gold"})
+        return RankService(
+            user_repo=mocker.Mock(),
+            riot_client=riot_client,
+            role_registry=RoleRegistry(),
+            write_governor=DiscordWriteGovernor(),
+            refresh_interval_minutes=10,
+            catch_up_limit=1,
+        )
+
+    def _create_user(self, discord_id: str, refreshed_at=None) -> User:
+        return User(
+            discord_id=discord_id,
+            riot_puuid=f"puuid_{discord_id}",
+            rank_refreshed_at=refreshed_at,
+            created_at=self.NOW,
+            updated_at=self.NOW,
+        )
+
+    def test_slot_is_stable_and_in_range(self):
+        """同じdiscord_idには常に同じスロットが割り当てられるか"""
+        slots = {compute_refresh_slot(str(i), 144) for i in range(1000)}
+
+        assert compute_refresh_slot("12345", 144) == compute_refresh_slot(
+            "12345", 144
+        )
+        assert all(0 <= slot < 144 for slot in slots)
+        # 1000人が144スロットに概ね分散していること
+        assert len(slots) > 100
+
+    def test_current_slot(self, service: RankService):
+        """現在時刻から正しいスロット番号が計算されるか"""
+        assert service.slot_count == 144
+        assert service.current_slot(self.NOW) == 18  # 03:00 UTC = 180分 / 10分
+
+    def test_select_users_for_slot(self, service: RankService):
+        """スロットのユーザーと、古い順に上限件数までの取りこぼしユーザーが選ばれるか"""
+        users = [self._create_user(str(i)) for i in range(200)]
+        slot = compute_refresh_slot("0", service.slot_count)
+        fresh = self.NOW - timedelta(days=1)
+        stale = self.NOW - timedelta(days=2)
+        for user in users:
+            user.rank_refreshed_at = fresh
+        other_slot_users = [
+            u for u in users if compute_refresh_slot(u.discord_id, 144) != slot
+        ]
+        other_slot_users[0].rank_refreshed_at = stale
+        other_slot_users[1].rank_refreshed_at = stale - timedelta(days=1)
+
+        selected = service.select_users_for_slot(users, slot, self.NOW)
+
+        in_slot = [
+            u for u in users if compute_refresh_slot(u.discord_id, 144) == slot
+        ]
+        assert selected[: len(in_slot)] == in_slot
+        # catch_up_limit=1 のため、最も古いユーザーだけが救済される
+        assert selected[len(in_slot) :] == [other_slot_users[1]]
+
+    @pytest.mark.asyncio
+    async def test_refresh_rank_slice_records_progress(
+        self, service: RankService, mocker
+    ):
+        """スロットのユーザーだけが更新され、DBに結果が記録されるか"""
+        users = [
+            self._create_user(str(i), self.NOW - timedelta(days=1))
+            for i in range(1000)
+        ]
+        service.user_repo.get_users_for_rank_refresh.return_value = users
+        slot = service.current_slot(self.NOW)
+        expected = [
+            u for u in users if compute_refresh_slot(u.discord_id, 144) == slot
+        ]
+        assert expected
+
+        mock_guild = mocker.Mock()
+        mock_guild.roles = []
+        mock_guild.create_role = AsyncMock(return_value=MagicMock())
+        mock_guild.get_member.side_effect = lambda id: MagicMock(
+            roles=[], add_roles=AsyncMock(), remove_roles=AsyncMock()
+        )
+
+        refreshed = await service.refresh_rank_slice([mock_guild], now=self.NOW)
+
+        # 最近更新したユーザーはDB側で除き、トークンを含む全件取得はしない
+        service.user_repo.get_users_for_rank_refresh.assert_called_once_with(
+            self.NOW - timedelta(hours=23)
+        )
+        service.user_repo.get_all_linked_users.assert_not_called()
+        assert refreshed == len(expected)
+        assert service.riot_client.get_rank_info_by_puuid.call_count == len(expected)
+        service.user_repo.update_user_rank.assert_has_calls(
+            [mocker.call(u.discord_id, "Gold", rank_changed=True) for u in expected]
+        )
+
+    @pytest.mark.asyncio
+    async def test_users_not_in_guild_are_stamped(self, service: RankService, mocker):
+        """どのギルドにもいないユーザーは、ランクを取得せずに更新日時だけ記録されるか"""
+        user = self._create_user("1")
+        mock_guild = mocker.Mock()
+        mock_guild.chunked = True
+        mock_guild.get_member.return_value = None
+
+        refreshed = await service._refresh_users([mock_guild], [user])
+
+        assert refreshed == 0
+        service.riot_client.get_rank_info_by_puuid.assert_not_called()
+        service.user_repo.mark_rank_refreshed.assert_called_once_with("1")
+
+    def _create_guild(self, mocker, guild_id: int, members: dict, create_role):
+        guild = mocker.Mock()
+        guild.id = guild_id
+        guild.name = f"guild_{guild_id}"
+        guild.chunked = True
+        guild.roles = []
+        guild.create_role = create_role
+        guild.get_member.side_effect = members.get
+        return guild
+
+    def _create_member(self):
+        return MagicMock(roles=[], add_roles=AsyncMock(), remove_roles=AsyncMock())
+
+    @pytest.mark.asyncio
+    async def test_failure_in_one_guild_does_not_stop_others(
+        self, service: RankService, mocker
+    ):
+        """1つのギルドでロール操作が失敗しても、他のギルドと残りのユーザーは更新されるか"""
+        users = [self._create_user("1"), self._create_user("2")]
+        service.user_repo.get_users_for_rank_refresh.return_value = users
+        forbidden = discord.Forbidden(MagicMock(status=403, reason="Forbidden"), "")
+        bad_members = {1: self._create_member(), 2: self._create_member()}
+        good_members = {1: self._create_member(), 2: self._create_member()}
+        bad_guild = self._create_guild(
+            mocker, 10, bad_members, AsyncMock(side_effect=forbidden)
+        )
+        good_guild = self._create_guild(
+            mocker, 20, good_members, AsyncMock(return_value=MagicMock())
+        )
+
+        refreshed = await service.refresh_overdue_users(
+            [bad_guild, good_guild], now=self.NOW
+        )
+
+        assert refreshed == 2
+        assert service.user_repo.update_user_rank.call_count == 2
+        for member in good_members.values():
+            member.add_roles.assert_awaited_once()
+        for member in bad_members.values():
+            member.add_roles.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_role_edit_failure_is_isolated_per_guild(
+        self, service: RankService, mocker
+    ):
+        """ロールの付与が1つのギルドで失敗しても、同じユーザーの他のギルドには付与されるか"""
+        failing_member = self._create_member()
+        failing_member.add_roles.side_effect = discord.HTTPException(
+            MagicMock(status=500, reason="Server Error"), ""
+        )
+        member = self._create_member()
+        guilds = [
+            self._create_guild(
+                mocker, 10, {1: failing_member}, AsyncMock(return_value=MagicMock())
+            ),
+            self._create_guild(
+                mocker, 20, {1: member}, AsyncMock(return_value=MagicMock())
+            ),
+        ]
+
+        refreshed = await service._refresh_users(guilds, [self._create_user("1")])
+
+        assert refreshed == 1
+        member.add_roles.assert_awaited_once()
+        service.user_repo.update_user_rank.assert_called_once()
+
+
+class TestAdaptiveRefreshPriority:
+    """活動状況に応じたランク更新優先度のテストクラス"""
+
+    NOW = datetime(2025, 7, 7, 3, 0, tzinfo=timezone.utc)
+
+    @pytest.fixture
+    def service(self, mocker) -> RankService:
+        return RankService(
+            user_repo=mocker.Mock(),
+            riot_client=mocker.Mock(),
+            role_registry=RoleRegistry(),
+            write_governor=DiscordWriteGovernor(),
+            refresh_interval_minutes=60,
+            catch_up_limit=10,
+            activity_log_repo=mocker.Mock(),
+        )
+
+    def _create_user(self, discord_id: str, refreshed_ago, changed_ago=None) -> User:
+        return User(
+            discord_id=discord_id,
+            riot_puuid=f"puuid_{discord_id}",
+            rank_refreshed_at=self.NOW - refreshed_ago,
+            rank_changed_at=self.NOW - changed_ago if changed_ago else None,
+            created_at=self.NOW,
+            updated_at=self.NOW,
+        )
+
+    def _ids_in_slot(self, slot: int, count: int) -> list:
+        ids = []
+        i = 0
+        while len(ids) < count:
+            if compute_refresh_slot(str(i), 24) == slot:
+                ids.append(str(i))
+            i += 1
+        return ids
+
+    def test_priority_score(self, service: RankService):
+        """参加回数と最近のランク変動がスコアに反映されるか"""
+        stable = self._create_user("1", timedelta(days=1))
+        climbing = self._create_user("2", timedelta(days=1), timedelta(days=2))
+
+        assert service.priority_score(stable, 0, self.NOW) == 0
+        assert service.priority_score(stable, 4, self.NOW) == 4
+        assert service.priority_score(climbing, 4, self.NOW) == 7
+
+    def test_dormant_users_are_refreshed_rarely(self, service: RankService):
+        """休眠ユーザーはスロットが来ても更新間隔に達するまで選ばれないか"""
+        slot = 5
+        active_id, dormant_id, stale_dormant_id = self._ids_in_slot(slot, 3)
+        users = [
+            self._create_user(active_id, timedelta(days=1)),
+            self._create_user(dormant_id, timedelta(days=1)),
+            self._create_user(stale_dormant_id, timedelta(days=7)),
+        ]
+        join_counts = {active_id: 10}
+
+        selected = service.select_users_for_slot(users, slot, self.NOW, join_counts)
+
+        assert [u.discord_id for u in selected] == [active_id, stale_dormant_id]
+
+    def test_budget_keeps_highest_priority_users(self, service: RankService):
+        """API予算を超える場合、優先度の高いユーザーから選ばれるか"""
+        service.daily_api_budget = 60  # 24スロット x 2人 + 救済分
+        slot = 3
+        ids = self._ids_in_slot(slot, 4)
+        users = [self._create_user(i, timedelta(days=7)) for i in ids]
+        join_counts = {ids[0]: 1, ids[1]: 8, ids[2]: 3, ids[3]: 0}
+
+        selected = service.select_users_for_slot(users, slot, self.NOW, join_counts)
+
+        # ローリング分は54人/日 (24スロットで2.25人ずつ、端数は持ち越し)
+        assert service.tick_budget(slot) == 3
+        assert service.catch_up_budget == 6
+        assert [u.discord_id for u in selected] == [ids[1], ids[2], ids[0]]
+
+    def test_small_budget_is_never_exceeded(self, service: RankService):
+        """予算がスロット数より少なくても、1日の合計が予算を超えないか"""
+        service.refresh_interval_minutes = 10  # 144スロット
+        service.daily_api_budget = 100
+
+        per_slot = [service.tick_budget(slot) for slot in range(service.slot_count)]
+
+        assert sum(per_slot) == 90
+        assert set(per_slot) == {0, 1}
+        assert sum(per_slot) + service.catch_up_budget == 100
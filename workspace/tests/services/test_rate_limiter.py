@@ -0,0 +1,61 @@
+# tests/services/test_rate_limiter.py
+
+import pytest
+
+# テスト対象のクラスをインポート
+from services.rate_limiter import UserRateLimiter
+
+
+class FakeClock:
+    """時刻を手動で進めるための時計"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+USER_ID = 123
+
+
+class TestUserRateLimiter:
+    """ユーザー単位の実行頻度の制限のテストクラス"""
+
+    def test_allows_five_per_ten_seconds(self):
+        """10秒間に5回まで許可し、6回目は次に実行できるまでの秒数を返すか"""
+        clock = FakeClock()
+        limiter = UserRateLimiter(rate=5, per=10.0, clock=clock)
+
+        assert [limiter.hit(USER_ID, "joinus") for _ in range(5)] == [0.0] * 5
+        assert limiter.hit(USER_ID, "recruitment_join") == pytest.approx(2.0)
+        # 他のユーザーには影響しない
+        assert limiter.hit(456, "joinus") == 0.0
+
+        clock.now += 2.0
+        assert limiter.hit(USER_ID, "joinus") == 0.0
+        assert limiter.hit(USER_ID, "joinus") > 0
+        assert limiter.metrics()["limited"] == 2
+
+    def test_override_uses_separate_bucket(self):
+        """個別の上限を設定したコマンドは専用の枠で数えるか"""
+        limiter = UserRateLimiter(
+            rate=5, per=10.0, overrides={"joinus": (1, 60.0)}, clock=FakeClock()
+        )
+
+        assert limiter.hit(USER_ID, "joinus") == 0.0
+        assert limiter.hit(USER_ID, "joinus") == pytest.approx(60.0)
+        assert limiter.hit(USER_ID, "recruitment_join") == 0.0
+
+    def test_sweep_evicts_idle_entries(self):
+        """上限まで回復したユーザーのエントリを取り除くか"""
+        clock = FakeClock()
+        limiter = UserRateLimiter(rate=5, per=10.0, clock=clock)
+        limiter.hit(1, "cancel")
+        clock.now += 5.0
+        limiter.hit(2, "cancel")
+
+        limiter.sweep()
+
+        assert limiter.metrics()["tracked"] == 1
+        assert limiter.metrics()["evicted"] == 1
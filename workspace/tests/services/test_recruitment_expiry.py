@@ -0,0 +1,89 @@
+# tests/services/test_recruitment_expiry.py
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+# テスト対象のクラスをインポート
+from services.recruitment_expiry import RecruitmentExpiryScheduler
+
+
+@pytest.mark.asyncio
+class TestRecruitmentExpiryScheduler:
+    """RecruitmentExpirySchedulerのテストクラス"""
+
+    @pytest.fixture
+    async def scheduler(self):
+        scheduler = RecruitmentExpiryScheduler()
+        yield scheduler
+        scheduler.stop()
+
+    async def test_fires_in_deadline_order(self, scheduler):
+        """締切時刻の早い順に締切処理が呼ばれるか"""
+        now = datetime.now(timezone.utc)
+        first, second = uuid4(), uuid4()
+        scheduler.schedule(second, now + timedelta(milliseconds=60))
+        scheduler.schedule(first, now + timedelta(milliseconds=20))
+        expired = []
+
+        async def on_expire(recruitment_id):
+            expired.append(recruitment_id)
+
+        scheduler.start(on_expire)
+        await asyncio.sleep(0.2)
+
+        assert expired == [first, second]
+        assert len(scheduler) == 0
+
+    async def test_past_deadline_fires_immediately(self, scheduler):
+        """起動時点で締切を過ぎている募集はすぐに処理されるか"""
+        recruitment_id = uuid4()
+        scheduler.schedule(recruitment_id, datetime.now(timezone.utc) - timedelta(hours=1))
+        expired = []
+
+        async def on_expire(rid):
+            expired.append(rid)
+
+        scheduler.start(on_expire)
+        await asyncio.sleep(0.05)
+
+        assert expired == [recruitment_id]
+
+    async def test_reschedule_and_unschedule(self, scheduler):
+        """締切の延長・取り消しが反映され、古い締切では発火しないか"""
+        now = datetime.now(timezone.utc)
+        extended, cancelled = uuid4(), uuid4()
+        scheduler.schedule(extended, now + timedelta(milliseconds=20))
+        scheduler.schedule(cancelled, now + timedelta(milliseconds=20))
+        expired = []
+
+        async def on_expire(rid):
+            expired.append(rid)
+
+        scheduler.start(on_expire)
+        scheduler.schedule(extended, now + timedelta(milliseconds=150))
+        scheduler.unschedule(cancelled)
+
+        await asyncio.sleep(0.08)
+        assert expired == []
+        await asyncio.sleep(0.15)
+        assert expired == [extended]
+
+    async def test_failure_does_not_stop_other_deadlines(self, scheduler):
+        """1件の締切処理が失敗しても、他の募集の締切処理が続くか"""
+        now = datetime.now(timezone.utc)
+        failing, ok = uuid4(), uuid4()
+        scheduler.schedule(failing, now)
+        scheduler.schedule(ok, now + timedelta(milliseconds=10))
+        expired = []
+
+        async def on_expire(rid):
+            if rid == failing:
+                raise RuntimeError("boom")
+            expired.append(rid)
+
+        scheduler.start(on_expire)
+        await asyncio.sleep(0.1)
+
+        assert expired == [ok]
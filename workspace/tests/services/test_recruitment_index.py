@@ -0,0 +1,78 @@
+# tests/services/test_recruitment_index.py
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+# テスト対象のクラスをインポート
+from db.recruitment_repository import Recruitment
+from services.recruitment_index import OpenRecruitmentIndex
+
+NOW = datetime(2025, 7, 7, 12, 0, tzinfo=timezone.utc)
+
+
+def make_recruitment(minutes: int, guild_id="guild_1", party_type="フルパ", **kw):
+    return Recruitment(
+        id=uuid4(),
+        message_id=f"msg_{minutes}",
+        guild_id=guild_id,
+        creator_id="creator",
+        party_type=party_type,
+        max_participants=5,
+        status=kw.get("status", "open"),
+        deadline=NOW + timedelta(minutes=minutes),
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+class TestOpenRecruitmentIndex:
+    """募集中の募集の索引のテストクラス"""
+
+    def test_pages_in_deadline_order_per_guild(self):
+        """ギルドごとに締切の近い順でページングできるか"""
+        index = OpenRecruitmentIndex()
+        recruitments = [make_recruitment(m) for m in [30, 10, 50, 20, 40]]
+        index.load(recruitments + [make_recruitment(5, guild_id="guild_2")])
+
+        first, total = index.page("guild_1", page=1, page_size=2)
+        third, _ = index.page("guild_1", page=3, page_size=2)
+
+        assert total == 5
+        assert [r.message_id for r in first] == ["msg_10", "msg_20"]
+        assert [r.message_id for r in third] == ["msg_50"]
+        assert index.page("guild_1", page=4, page_size=2) == ([], 5)
+
+    def test_filters_by_party_type(self):
+        """募集形式で絞り込めるか"""
+        index = OpenRecruitmentIndex()
+        index.load(
+            [
+                make_recruitment(10, party_type="デュオ"),
+                make_recruitment(20, party_type="フルパ"),
+                make_recruitment(30, party_type="デュオ"),
+            ]
+        )
+
+        duo, total = index.page("guild_1", party_type="デュオ")
+
+        assert total == 2
+        assert [r.message_id for r in duo] == ["msg_10", "msg_30"]
+
+    def test_upsert_moves_and_removes_entries(self):
+        """編集で締切・形式が変わった募集を並べ替え、終了した募集を取り除くか"""
+        index = OpenRecruitmentIndex()
+        first, second = make_recruitment(10), make_recruitment(20)
+        index.load([first, second])
+
+        index.upsert(
+            first.model_copy(
+                update={"deadline": NOW + timedelta(minutes=60), "party_type": "デュオ"}
+            )
+        )
+        assert [r.id for r in index.page("guild_1")[0]] == [second.id, first.id]
+        assert index.page("guild_1", party_type="フルパ")[1] == 1
+
+        index.upsert(second.model_copy(update={"status": "closed"}))
+        index.remove(first.id)
+        assert len(index) == 0
+        assert index.page("guild_1") == ([], 0)
@@ -1,5 +1,7 @@
 # tests/services/test_recruitment_service.py
 
+import asyncio
+import time
 import pytest
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
@@ -7,7 +9,12 @@ from uuid import uuid4
 from freezegun import freeze_time
 
 # テスト対象のクラスと、それが依存するクラスのPydanticモデルをインポート
-from services.recruitment_service import RecruitmentService
+from services.recruitment_service import (
+    BUSY_MESSAGE,
+    CLOSED_MESSAGE,
+    RecruitmentService,
+)
+from services.recruitment_state import RecruitmentStateStore, WriteBehindQueue
 from db.recruitment_repository import Recruitment
 from db.participant_repository import Participant
 
@@ -152,30 +159,36 @@ def service_with_mocks(mocker):
     return service
 
 
+@pytest.mark.asyncio
 class TestJoinRecruitment:
     """join_recruitmentメソッドのテストクラス"""
 
-    def test_join_successfully(
+    async def test_join_successfully(
         self, service_with_mocks: RecruitmentService, mock_recruitment, mock_user
     ):
         service_with_mocks.mocks[
             "participant"
         ].get_participants_by_recruitment_id.return_value = []
 
-        success, message = service_with_mocks.join_recruitment(
+        success, message = await service_with_mocks.join_recruitment(
             mock_recruitment, mock_user
         )
 
         assert success is True
         assert message == "参加しました。"
-        service_with_mocks.mocks["participant"].add_participant.assert_called_once_with(
-            RECRUITMENT_ID, USER_ID
+        participant_repo = service_with_mocks.mocks["participant"]
+        participant_repo.add_participant.assert_called_once_with(
+            RECRUITMENT_ID, USER_ID, update_cache=False
         )
         service_with_mocks.mocks["activity_log"].create_log.assert_called_once_with(
             USER_ID, RECRUITMENT_ID, GUILD_ID, "join"
         )
+        # キャッシュはイベントループ上で更新する
+        participant_repo.cache_participant_added.assert_called_once_with(
+            RECRUITMENT_ID, USER_ID
+        )
 
-    def test_join_when_full(
+    async def test_join_when_full(
         self,
         service_with_mocks: RecruitmentService,
         mock_recruitment,
@@ -187,7 +200,7 @@ class TestJoinRecruitment:
             "participant"
         ].get_participants_by_recruitment_id.return_value = mock_participants
 
-        success, message = service_with_mocks.join_recruitment(
+        success, message = await service_with_mocks.join_recruitment(
             mock_recruitment, mock_user
         )
 
@@ -196,7 +209,7 @@ class TestJoinRecruitment:
         service_with_mocks.mocks["participant"].add_participant.assert_not_called()
         service_with_mocks.mocks["activity_log"].create_log.assert_not_called()
 
-    def test_join_when_already_joined(
+    async def test_join_when_already_joined(
         self, service_with_mocks: RecruitmentService, mock_recruitment, mock_user
     ):
         mock_participant_me = Participant(
@@ -206,7 +219,7 @@ class TestJoinRecruitment:
             "participant"
         ].get_participants_by_recruitment_id.return_value = [mock_participant_me]
 
-        success, message = service_with_mocks.join_recruitment(
+        success, message = await service_with_mocks.join_recruitment(
             mock_recruitment, mock_user
         )
 
@@ -216,24 +229,29 @@ class TestJoinRecruitment:
         service_with_mocks.mocks["activity_log"].create_log.assert_not_called()
 
 
+@pytest.mark.asyncio
 class TestLeaveRecruitment:
     """leave_recruitmentメソッドのテストクラス"""
 
-    def test_leave_successfully(
+    async def test_leave_successfully(
         self, service_with_mocks: RecruitmentService, mock_recruitment, mock_user
     ):
-        success, message = service_with_mocks.leave_recruitment(
+        success, message = await service_with_mocks.leave_recruitment(
             mock_recruitment, mock_user
         )
 
         assert success is True
         assert message == "参加を取り消しました。"
-        service_with_mocks.mocks[
-            "participant"
-        ].remove_participant.assert_called_once_with(RECRUITMENT_ID, USER_ID)
+        participant_repo = service_with_mocks.mocks["participant"]
+        participant_repo.remove_participant.assert_called_once_with(
+            RECRUITMENT_ID, USER_ID, update_cache=False
+        )
         service_with_mocks.mocks["activity_log"].create_log.assert_called_once_with(
             USER_ID, RECRUITMENT_ID, GUILD_ID, "leave"
         )
+        participant_repo.cache_participant_removed.assert_called_once_with(
+            RECRUITMENT_ID, USER_ID
+        )
 
 
 class TestCancelRecruitment:
@@ -310,11 +328,15 @@ class TestCreateRecruitment:
     async def test_create_successfully(
         self, service_with_mocks, mock_interaction, mock_recruitment, mocker
     ):
+        """メッセージ送信後、募集・参加者・ログを1回で保存するか"""
         service_with_mocks.mocks[
             "recruitment"
-        ].create_recruitment.return_value = mock_recruitment
+        ].create_recruitment_with_participants.return_value = mock_recruitment
+        sent_message = mocker.Mock(id=111)
+        sent_message.channel.id = 222
+        publish = mocker.AsyncMock(return_value=sent_message)
 
-        other_members = [mocker.Mock(), mocker.Mock()]
+        other_members = [mocker.Mock(id="member_1"), mocker.Mock(id="member_2")]
 
         recruitment, message = await service_with_mocks.create_recruitment(
             interaction=mock_interaction,
@@ -322,37 +344,132 @@ class TestCreateRecruitment:
             needed_count=2,
             deadline_str="22:00",
             other_members=other_members,
+            publish=publish,
         )
 
         assert recruitment is not None
         assert message == "募集の作成に成功しました。"
 
-        service_with_mocks.mocks["recruitment"].create_recruitment.assert_called_once()
-        call_args, call_kwargs = service_with_mocks.mocks[
+        # 送信時点で募集IDが採番済みで、保存時にはメッセージIDが確定しているか
+        draft, participant_ids = publish.call_args.args
+        assert draft.id is not None
+        assert participant_ids == [CREATOR_ID, "member_1", "member_2"]
+
+        repo = service_with_mocks.mocks["recruitment"]
+        repo.create_recruitment_with_participants.assert_called_once()
+        saved, saved_ids = repo.create_recruitment_with_participants.call_args.args
+        assert saved.id == draft.id
+        assert saved.creator_id == CREATOR_ID
+        assert saved.max_participants == 5
+        assert (saved.message_id, saved.channel_id) == ("111", "222")
+        assert saved_ids == participant_ids
+
+        # 旧フローの個別の書き込みは行わない
+        repo.update_recruitment.assert_not_called()
+        service_with_mocks.mocks["participant"].add_participant.assert_not_called()
+        service_with_mocks.mocks["activity_log"].create_log.assert_not_called()
+
+    @freeze_time("2025-07-07 03:00:00")
+    async def test_create_deletes_message_when_save_fails(
+        self, service_with_mocks, mock_interaction, mocker
+    ):
+        """保存に失敗した場合、送信済みの募集メッセージを削除するか"""
+        service_with_mocks.mocks[
             "recruitment"
-        ].create_recruitment.call_args
-        assert call_kwargs.get("creator_id") == CREATOR_ID
-        assert call_kwargs.get("max_participants") == 5
+        ].create_recruitment_with_participants.return_value = None
+        sent_message = mocker.AsyncMock()
+        publish = mocker.AsyncMock(return_value=sent_message)
+
+        recruitment, message = await service_with_mocks.create_recruitment(
+            interaction=mock_interaction,
+            party_type="デュオ",
+            needed_count=1,
+            deadline_str="22:00",
+            other_members=[],
+            publish=publish,
+        )
+
+        assert recruitment is None
+        assert message == "データベースへの募集情報登録に失敗しました。"
+        sent_message.delete.assert_awaited_once()
 
+    @freeze_time("2025-07-07 03:00:00")
+    async def test_create_deletes_message_when_save_raises(
+        self, service_with_mocks, mock_interaction, mocker
+    ):
+        """保存時に例外が発生した場合も、送信済みの募集メッセージを削除するか"""
         service_with_mocks.mocks[
-            "participant"
-        ].add_initial_participants.assert_called_once()
-        args, _ = service_with_mocks.mocks[
-            "participant"
-        ].add_initial_participants.call_args
-        assert len(args[1]) == 3
+            "recruitment"
+        ].create_recruitment_with_participants.side_effect = Exception("rpc failed")
+        sent_message = mocker.AsyncMock()
+        publish = mocker.AsyncMock(return_value=sent_message)
+
+        recruitment, message = await service_with_mocks.create_recruitment(
+            interaction=mock_interaction,
+            party_type="デュオ",
+            needed_count=1,
+            deadline_str="22:00",
+            other_members=[],
+            publish=publish,
+        )
+
+        assert recruitment is None
+        assert message == "データベースへの募集情報登録に失敗しました。"
+        sent_message.delete.assert_awaited_once()
+        service_with_mocks.mocks["participant"].prime.assert_not_called()
+
+    @freeze_time("2025-07-07 03:00:00")
+    async def test_being_created_until_saved(
+        self, service_with_mocks, mock_interaction, mock_recruitment, mocker
+    ):
+        """メッセージの送信から保存が終わるまでの間だけ、作成中として扱うか"""
+        repo = service_with_mocks.mocks["recruitment"]
+        states = []
 
-        assert service_with_mocks.mocks["activity_log"].create_log.call_count == 3
+        def save(draft, participant_ids):
+            states.append(service_with_mocks.is_being_created(draft.id))
+            return mock_recruitment
+
+        repo.create_recruitment_with_participants.side_effect = save
+        publish = mocker.AsyncMock(return_value=mocker.Mock(id=111))
+
+        await service_with_mocks.create_recruitment(
+            interaction=mock_interaction,
+            party_type="デュオ",
+            needed_count=1,
+            deadline_str="22:00",
+            other_members=[],
+            publish=publish,
+        )
+        draft, _ = publish.call_args.args
+        assert states == [True]
+        assert not service_with_mocks.is_being_created(draft.id)
+
+        # 保存に失敗した場合も作成中の扱いを解除する
+        repo.create_recruitment_with_participants.side_effect = Exception("rpc failed")
+        publish.return_value = mocker.AsyncMock()
+        await service_with_mocks.create_recruitment(
+            interaction=mock_interaction,
+            party_type="デュオ",
+            needed_count=1,
+            deadline_str="22:00",
+            other_members=[],
+            publish=publish,
+        )
+        draft, _ = publish.call_args.args
+        assert not service_with_mocks.is_being_created(draft.id)
 
     async def test_create_with_invalid_deadline(
-        self, service_with_mocks, mock_interaction
+        self, service_with_mocks, mock_interaction, mocker
     ):
+        publish = mocker.AsyncMock()
         recruitment, message = await service_with_mocks.create_recruitment(
             interaction=mock_interaction,
             party_type="デュオ",
             needed_count=1,
             deadline_str="あした",
             other_members=[],
+            publish=publish,
         )
 
         assert recruitment is None
@@ -360,20 +477,21 @@ class TestCreateRecruitment:
             message
             == "募集締め切り時間の形式が正しくないか、過去の時間を指定しています。"
         )
-        service_with_mocks.mocks["recruitment"].create_recruitment.assert_not_called()
+        publish.assert_not_awaited()
         service_with_mocks.mocks[
-            "participant"
-        ].add_initial_participants.assert_not_called()
+            "recruitment"
+        ].create_recruitment_with_participants.assert_not_called()
 
 
 # 【↓ここから新しいテストクラスを追加↓】
 
 
+@pytest.mark.asyncio
 @freeze_time("2025-07-07 03:00:00")
 class TestEditRecruitment:
     """edit_recruitmentメソッドのテストクラス"""
 
-    def test_edit_successfully(
+    async def test_edit_successfully(
         self, service_with_mocks: RecruitmentService, mock_recruitment
     ):
         """正常に編集できるケース"""
@@ -393,7 +511,7 @@ class TestEditRecruitment:
         }
 
         # --- 実行 (Act) ---
-        recruitment, message = service_with_mocks.edit_recruitment(
+        recruitment, message = await service_with_mocks.edit_recruitment(
             RECRUITMENT_ID, updates
         )
 
@@ -415,7 +533,42 @@ class TestEditRecruitment:
         # deadlineはdatetimeオブジェクトに変換されているはず
         assert isinstance(update_dict["deadline"], datetime)
 
-    def test_edit_with_invalid_deadline(self, service_with_mocks: RecruitmentService):
+    async def test_edit_closed_recruitment_is_rejected(
+        self, service_with_mocks: RecruitmentService, mocker
+    ):
+        """締切・キャンセル済みの募集は編集せず、終了している旨を返すか"""
+        repo = service_with_mocks.mocks["recruitment"]
+        # 募集中(open)の条件に一致する行が無い
+        repo.update_recruitment.return_value = None
+        service_with_mocks.expiry_scheduler = mocker.Mock()
+        service_with_mocks.open_index = mocker.Mock()
+
+        recruitment, message = await service_with_mocks.edit_recruitment(
+            RECRUITMENT_ID, {"party_type": "トリオ", "deadline_str": "23:00"}
+        )
+
+        assert recruitment is None
+        assert message == CLOSED_MESSAGE
+        assert repo.update_recruitment.call_args.kwargs == {"only_open": True}
+        service_with_mocks.open_index.upsert.assert_not_called()
+        service_with_mocks.expiry_scheduler.schedule.assert_not_called()
+
+    async def test_edit_returns_error_when_update_raises(
+        self, service_with_mocks: RecruitmentService
+    ):
+        """更新時に例外が発生した場合、更新に失敗した旨を返すか"""
+        service_with_mocks.mocks[
+            "recruitment"
+        ].update_recruitment.side_effect = Exception("db down")
+
+        recruitment, message = await service_with_mocks.edit_recruitment(
+            RECRUITMENT_ID, {"party_type": "トリオ"}
+        )
+
+        assert recruitment is None
+        assert message == "募集情報の更新に失敗しました。"
+
+    async def test_edit_with_invalid_deadline(self, service_with_mocks: RecruitmentService):
         """不正な締切時間で編集しようとしたケース"""
         # --- 準備 (Arrange) ---
         updates = {
@@ -425,7 +578,7 @@ class TestEditRecruitment:
         }
 
         # --- 実行 (Act) ---
-        recruitment, message = service_with_mocks.edit_recruitment(
+        recruitment, message = await service_with_mocks.edit_recruitment(
             RECRUITMENT_ID, updates
         )
 
@@ -436,3 +589,266 @@ class TestEditRecruitment:
             == "募集締め切り時間の形式が正しくないか、過去の時間を指定しています。"
         )
         service_with_mocks.mocks["recruitment"].update_recruitment.assert_not_called()
+
+
+class TestRecruitmentExpiry:
+    """締切タイマーとの連携のテストクラス"""
+
+    @pytest.fixture
+    def service_with_scheduler(self, service_with_mocks, mocker):
+        service_with_mocks.expiry_scheduler = mocker.Mock()
+        return service_with_mocks
+
+    @pytest.mark.asyncio
+    @freeze_time("2025-07-07 03:00:00")
+    async def test_edit_reschedules_deadline(
+        self, service_with_scheduler: RecruitmentService, mock_recruitment
+    ):
+        """編集後の締切でタイマーが登録し直されるか"""
+        new_deadline = datetime(2025, 7, 7, 23, 0, tzinfo=JST)
+        service_with_scheduler.mocks[
+            "recruitment"
+        ].update_recruitment.return_value = mock_recruitment.model_copy(
+            update={"deadline": new_deadline}
+        )
+
+        await service_with_scheduler.edit_recruitment(
+            RECRUITMENT_ID, {"deadline_str": "23:00"}
+        )
+
+        service_with_scheduler.expiry_scheduler.schedule.assert_called_once_with(
+            RECRUITMENT_ID, new_deadline
+        )
+
+    def test_cancel_unschedules_deadline(
+        self, service_with_scheduler: RecruitmentService, mock_recruitment
+    ):
+        """キャンセルした募集の締切タイマーが取り消されるか"""
+        repo = service_with_scheduler.mocks["recruitment"]
+        repo.get_open_recruitment_by_creator_id.return_value = mock_recruitment
+        repo.update_recruitment.return_value = mock_recruitment.model_copy(
+            update={"status": "cancelled"}
+        )
+        service_with_scheduler.mocks[
+            "participant"
+        ].get_participants_by_recruitment_id.return_value = []
+
+        service_with_scheduler.cancel_recruitment(CREATOR_ID)
+
+        service_with_scheduler.expiry_scheduler.unschedule.assert_called_once_with(
+            RECRUITMENT_ID
+        )
+
+    def test_expire_closes_only_open_recruitment(
+        self, service_with_mocks: RecruitmentService
+    ):
+        """締切処理がopenの募集だけを締め切る条件付き更新を使うか"""
+        service_with_mocks.mocks[
+            "recruitment"
+        ].close_recruitment_if_open.return_value = None
+
+        assert service_with_mocks.expire_recruitment(RECRUITMENT_ID) is None
+        service_with_mocks.mocks[
+            "recruitment"
+        ].close_recruitment_if_open.assert_called_once_with(RECRUITMENT_ID)
+
+
+class TestRehydrateOpenRecruitments:
+    """rehydrate_open_recruitmentsメソッドのテストクラス"""
+
+    def test_primes_caches_and_deadlines(
+        self, service_with_mocks: RecruitmentService, mock_recruitment, mocker
+    ):
+        """読み込んだ募集と参加者でキャッシュと締切タイマーが準備されるか"""
+        participants = [
+            Participant(
+                recruitment_id=RECRUITMENT_ID, user_id=USER_ID, joined_at=datetime.now()
+            )
+        ]
+        service_with_mocks.mocks[
+            "recruitment"
+        ].get_open_recruitments_with_participants.return_value = [
+            (mock_recruitment, participants)
+        ]
+        service_with_mocks.expiry_scheduler = mocker.Mock()
+
+        count = service_with_mocks.rehydrate_open_recruitments()
+
+        assert count == 1
+        service_with_mocks.mocks["recruitment"].prime.assert_called_once_with(
+            [mock_recruitment]
+        )
+        service_with_mocks.mocks["participant"].prime.assert_called_once_with(
+            RECRUITMENT_ID, participants
+        )
+        service_with_mocks.expiry_scheduler.load.assert_called_once_with(
+            [mock_recruitment]
+        )
+
+    def test_open_index_follows_rehydrate_and_cancel(
+        self, service_with_mocks: RecruitmentService, mock_recruitment
+    ):
+        """読み込んだ募集が一覧に載り、キャンセルで一覧から外れるか"""
+        repo = service_with_mocks.mocks["recruitment"]
+        repo.get_open_recruitments_with_participants.return_value = [
+            (mock_recruitment, [])
+        ]
+        repo.get_open_recruitment_by_creator_id.return_value = mock_recruitment
+        repo.update_recruitment.return_value = mock_recruitment.model_copy(
+            update={"status": "cancelled"}
+        )
+        service_with_mocks.mocks[
+            "participant"
+        ].get_participants_by_recruitment_id.return_value = []
+
+        service_with_mocks.rehydrate_open_recruitments()
+        assert service_with_mocks.list_open_recruitments(GUILD_ID) == (
+            [mock_recruitment],
+            1,
+        )
+
+        service_with_mocks.cancel_recruitment(CREATOR_ID)
+        assert service_with_mocks.list_open_recruitments(GUILD_ID) == ([], 0)
+
+
+@pytest.mark.asyncio
+class TestInMemoryRecruitmentState:
+    """メモリ上の状態で参加・取消を判定するモードのテストクラス"""
+
+    @pytest.fixture
+    def service_in_memory(self, service_with_mocks, mock_recruitment):
+        service_with_mocks.state_store = RecruitmentStateStore()
+        service_with_mocks.write_behind = WriteBehindQueue(retry_base_delay=0)
+        service_with_mocks.state_store.load(mock_recruitment, [CREATOR_ID])
+        return service_with_mocks
+
+    async def test_join_is_decided_in_memory_and_persisted_later(
+        self, service_in_memory: RecruitmentService, mock_recruitment, mock_user
+    ):
+        """参加の判定でDBを読まず、書き込みは後から順に反映されるか"""
+        success, message = await service_in_memory.join_recruitment(
+            mock_recruitment, mock_user
+        )
+
+        assert success is True
+        assert message == "参加しました。"
+        assert service_in_memory.get_participant_ids(RECRUITMENT_ID) == [
+            CREATOR_ID,
+            USER_ID,
+        ]
+        service_in_memory.mocks[
+            "participant"
+        ].get_participants_by_recruitment_id.assert_not_called()
+
+        assert await service_in_memory.write_behind.drain(timeout=1)
+        service_in_memory.mocks["participant"].add_participant.assert_called_once_with(
+            RECRUITMENT_ID, USER_ID, update_cache=False
+        )
+        service_in_memory.mocks["activity_log"].create_log.assert_called_once_with(
+            USER_ID, RECRUITMENT_ID, GUILD_ID, "join"
+        )
+
+    async def test_concurrent_joins_do_not_overbook(
+        self, service_in_memory: RecruitmentService, mock_recruitment, mocker
+    ):
+        """同時に参加しても定員を超えないか"""
+        users = []
+        for i in range(10):
+            user = mocker.Mock()
+            user.id = f"user_{i}"
+            users.append(user)
+
+        results = await asyncio.gather(
+            *(service_in_memory.join_recruitment(mock_recruitment, u) for u in users)
+        )
+
+        assert sum(success for success, _ in results) == 4
+        assert len(service_in_memory.get_participant_ids(RECRUITMENT_ID)) == 5
+
+    async def test_leave_then_join_persisted_in_order(
+        self, service_in_memory: RecruitmentService, mock_recruitment, mock_user
+    ):
+        """参加→取消の書き込みが操作した順にDBへ反映されるか"""
+        calls = []
+        participant_repo = service_in_memory.mocks["participant"]
+        participant_repo.add_participant.side_effect = lambda *a, **kw: calls.append(
+            "add"
+        )
+        participant_repo.remove_participant.side_effect = (
+            lambda *a, **kw: calls.append("remove")
+        )
+
+        await service_in_memory.join_recruitment(mock_recruitment, mock_user)
+        success, _ = await service_in_memory.leave_recruitment(
+            mock_recruitment, mock_user
+        )
+        await service_in_memory.write_behind.drain(timeout=1)
+
+        assert success is True
+        assert calls == ["add", "remove"]
+
+    async def test_failed_log_does_not_duplicate_participant(
+        self, service_in_memory: RecruitmentService, mock_recruitment, mock_user
+    ):
+        """ログの書き込みだけが失敗した場合、参加者の書き込みを繰り返さないか"""
+        activity_log_repo = service_in_memory.mocks["activity_log"]
+        activity_log_repo.create_log.side_effect = [RuntimeError("boom"), None]
+
+        await service_in_memory.join_recruitment(mock_recruitment, mock_user)
+        assert await service_in_memory.write_behind.drain(timeout=1)
+
+        service_in_memory.mocks["participant"].add_participant.assert_called_once()
+        assert activity_log_repo.create_log.call_count == 2
+        service_in_memory.mocks[
+            "participant"
+        ].cache_participant_added.assert_called_once_with(RECRUITMENT_ID, USER_ID)
+
+
+@pytest.mark.asyncio
+class TestRecruitmentLocks:
+    """募集ごとのロックによる直列化のテストクラス"""
+
+    async def test_concurrent_joins_are_serialized(
+        self, service_with_mocks: RecruitmentService, mock_recruitment, mocker
+    ):
+        """同時に押された参加ボタンが順に処理され、定員を超えないか"""
+        participants = []
+        participant_repo = service_with_mocks.mocks["participant"]
+        participant_repo.get_participants_by_recruitment_id.side_effect = (
+            lambda _: list(participants)
+        )
+
+        def add_participant(_, user_id, update_cache=True):
+            # 書き込みの間に他の操作へ切り替わるよう、時間のかかるDB書き込みを模す
+            time.sleep(0.01)
+            participants.append(mocker.Mock(user_id=user_id))
+
+        participant_repo.add_participant.side_effect = add_participant
+        users = [mocker.Mock(id=f"user_{i}") for i in range(8)]
+
+        results = await asyncio.gather(
+            *(service_with_mocks.join_recruitment(mock_recruitment, u) for u in users)
+        )
+
+        # ロックが無い場合、全員が書き込み前の参加者数で判定して定員を超える
+        assert sum(success for success, _ in results) == 5
+        assert len(participants) == 5
+        metrics = service_with_mocks.recruitment_locks.metrics()
+        assert metrics["acquired"] == 8
+        assert metrics["contended"] > 0
+
+    async def test_busy_when_lock_wait_exceeds_limit(
+        self, service_with_mocks: RecruitmentService, mock_recruitment, mock_user
+    ):
+        """ロックの待機時間が上限を超えた場合、混雑している旨を返すか"""
+        service_with_mocks.recruitment_locks.timeout = 0.01
+
+        async with service_with_mocks.recruitment_locks.hold(RECRUITMENT_ID):
+            success, message = await service_with_mocks.join_recruitment(
+                mock_recruitment, mock_user
+            )
+
+        assert success is False
+        assert message == BUSY_MESSAGE
+        assert service_with_mocks.recruitment_locks.metrics()["timeouts"] == 1
+        service_with_mocks.mocks["participant"].add_participant.assert_not_called()
@@ -0,0 +1,56 @@
+# tests/services/test_recruitment_state.py
+
+import pytest
+
+# テスト対象のクラスをインポート
+from services.recruitment_state import WriteBehindQueue
+
+
+@pytest.mark.asyncio
+class TestWriteBehindQueue:
+    """WriteBehindQueueのテストクラス"""
+
+    async def test_writes_run_in_order(self):
+        """登録した順に書き込みが実行されるか"""
+        queue = WriteBehindQueue()
+        calls = []
+        for i in range(5):
+            queue.enqueue(f"write {i}", lambda i=i: calls.append(i))
+
+        assert await queue.drain(timeout=1)
+        assert calls == [0, 1, 2, 3, 4]
+        assert queue.metrics()["completed"] == 5
+
+    async def test_failed_write_is_retried_before_later_writes(self):
+        """失敗した書き込みは後続より先に再試行されるか"""
+        queue = WriteBehindQueue(retry_base_delay=0)
+        calls = []
+        attempts = {"count": 0}
+
+        def flaky():
+            attempts["count"] += 1
+            if attempts["count"] < 3:
+                raise RuntimeError("temporary")
+            calls.append("flaky")
+
+        queue.enqueue("flaky", flaky)
+        queue.enqueue("next", lambda: calls.append("next"))
+
+        assert await queue.drain(timeout=1)
+        assert calls == ["flaky", "next"]
+        assert queue.metrics()["retried"] == 2
+
+    async def test_write_is_dropped_after_max_retries(self):
+        """再試行の上限を超えた書き込みは破棄され、後続は実行されるか"""
+        queue = WriteBehindQueue(max_retries=1, retry_base_delay=0)
+        calls = []
+
+        def broken():
+            raise RuntimeError("permanent")
+
+        queue.enqueue("broken", broken)
+        queue.enqueue("next", lambda: calls.append("next"))
+
+        assert await queue.drain(timeout=1)
+        assert calls == ["next"]
+        assert queue.metrics()["dropped"] == 1
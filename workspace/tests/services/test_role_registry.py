@@ -0,0 +1,113 @@
+# tests/services/test_role_registry.py
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+
+# テスト対象のクラスをインポート
+from services.role_registry import RoleRegistry, RoleSpec
+
+
+def _create_mock_role(id: int, name: str, guild):
+    """ロールのモックを作成するヘルパー関数"""
+    role = MagicMock()
+    role.id = id
+    role.name = name
+    role.guild = guild
+    return role
+
+
+@pytest.mark.asyncio
+class TestRoleRegistry:
+    """RoleRegistryのテストクラス"""
+
+    @pytest.fixture
+    def registry(self) -> RoleRegistry:
+        return RoleRegistry()
+
+    @pytest.fixture
+    def mock_guild(self, mocker):
+        guild = mocker.Mock()
+        guild.id = 1
+        guild.roles = []
+        return guild
+
+    async def test_existing_role_is_indexed_without_creation(
+        self, registry: RoleRegistry, mock_guild
+    ):
+        """既存ロールは索引から返され、作成されないか"""
+        gold = _create_mock_role(10, "Valorant - Gold", mock_guild)
+        mock_guild.roles = [gold]
+        mock_guild.create_role = AsyncMock()
+
+        role = await registry.get_or_create_role(mock_guild, "Valorant - Gold")
+
+        assert role is gold
+        mock_guild.create_role.assert_not_called()
+
+    async def test_concurrent_creation_is_single_flight(
+        self, registry: RoleRegistry, mock_guild
+    ):
+        """同じロールを同時に要求しても作成は1回だけか"""
+        created = _create_mock_role(20, "幽霊部員", mock_guild)
+
+        async def slow_create_role(**kwargs):
+            await asyncio.sleep(0)
+            return created
+
+        mock_guild.create_role = AsyncMock(side_effect=slow_create_role)
+
+        results = await asyncio.gather(
+            *(registry.get_or_create_role(mock_guild, "幽霊部員") for _ in range(3))
+        )
+
+        assert all(role is created for role in results)
+        mock_guild.create_role.assert_called_once()
+
+    async def test_ensure_roles_creates_only_missing(
+        self, registry: RoleRegistry, mock_guild
+    ):
+        """ensure_rolesが存在しないロールだけを色付きで作成するか"""
+        iron = _create_mock_role(30, "Valorant - Iron", mock_guild)
+        mock_guild.roles = [iron]
+        mock_guild.create_role = AsyncMock(
+            side_effect=lambda **kwargs: _create_mock_role(
+                31, kwargs["name"], mock_guild
+            )
+        )
+        specs = [
+            RoleSpec("Valorant - Iron", discord.Color(0x5A5A5A), hoist=True),
+            RoleSpec("Valorant - Gold", discord.Color(0xE6B64C), hoist=True),
+        ]
+
+        roles = await registry.ensure_roles(mock_guild, specs, reason="test")
+
+        assert roles["Valorant - Iron"] is iron
+        mock_guild.create_role.assert_called_once_with(
+            name="Valorant - Gold",
+            color=discord.Color(0xE6B64C),
+            hoist=True,
+            reason="test",
+        )
+
+    async def test_role_events_refresh_index(self, registry: RoleRegistry, mock_guild):
+        """ロールの作成・更新・削除イベントで索引が最新化されるか"""
+        old = _create_mock_role(40, "旧ロール", mock_guild)
+        mock_guild.roles = [old]
+        registry.get_role(mock_guild, "旧ロール")  # 索引を構築
+
+        renamed = _create_mock_role(40, "新ロール", mock_guild)
+        registry.on_role_update(old, renamed)
+        assert registry.get_role(mock_guild, "旧ロール") is None
+        assert registry.get_role(mock_guild, "新ロール") is renamed
+
+        created = _create_mock_role(41, "追加ロール", mock_guild)
+        registry.on_role_create(created)
+        assert registry.get_role(mock_guild, "追加ロール") is created
+
+        mock_guild.roles = [renamed]
+        registry.on_role_delete(created)
+        assert registry.get_role(mock_guild, "追加ロール") is None
@@ -0,0 +1,133 @@
+# tests/services/test_scheduled_task_service.py
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+# テスト対象のクラスをインポート
+from services.scheduled_task_service import ScheduledTaskService
+
+
+@pytest.mark.asyncio
+class TestScheduledTaskService:
+    """ScheduledTaskServiceのテストクラス"""
+
+    @pytest.fixture
+    def mock_rank_service(self, mocker):
+        service = mocker.Mock()
+        service.refresh_overdue_users = AsyncMock()
+        service.refresh_rank_slice = AsyncMock()
+        return service
+
+    @pytest.fixture
+    def mock_activity_service(self, mocker):
+        service = mocker.Mock()
+        service.update_activity_roles = AsyncMock()
+        return service
+
+    @pytest.fixture
+    def service(self, mock_rank_service, mock_activity_service):
+        return ScheduledTaskService(
+            mock_rank_service, mock_activity_service, guild_concurrency=2
+        )
+
+    async def test_run_daily_tasks_for_all_guilds(
+        self, service, mock_rank_service, mock_activity_service, mocker
+    ):
+        """ランク更新は全ギルドまとめて1回、活動評価はギルドごとに実行されるか"""
+        guilds = [mocker.Mock(), mocker.Mock(), mocker.Mock()]
+
+        await service.run_daily_tasks(guilds)
+
+        mock_rank_service.refresh_overdue_users.assert_awaited_once()
+        args, _ = mock_rank_service.refresh_overdue_users.call_args
+        assert args[0] == guilds
+        assert mock_activity_service.update_activity_roles.await_count == 3
+
+    async def test_failure_in_one_guild_does_not_stop_others(
+        self, service, mock_activity_service, mocker
+    ):
+        """1つのギルドで失敗しても、他のギルドの処理が続行されるか"""
+        guilds = [mocker.Mock(), mocker.Mock()]
+        mock_activity_service.update_activity_roles.side_effect = [
+            RuntimeError("boom"),
+            None,
+        ]
+
+        await service.run_daily_tasks(guilds)
+
+        assert mock_activity_service.update_activity_roles.await_count == 2
+
+    async def test_daily_tasks_skipped_when_lease_is_held(
+        self, mock_rank_service, mock_activity_service, mocker
+    ):
+        """他のプロセスがリースを保持している場合、デイリータスクを実行しないか"""
+        lease_repo = mocker.Mock()
+        lease_repo.try_acquire.return_value = False
+        service = ScheduledTaskService(
+            mock_rank_service, mock_activity_service, job_lease_repo=lease_repo
+        )
+
+        ran = await service.run_daily_tasks([mocker.Mock()])
+
+        assert ran is False
+        mock_rank_service.refresh_overdue_users.assert_not_awaited()
+        mock_activity_service.update_activity_roles.assert_not_awaited()
+
+    async def test_rank_tick_skipped_while_daily_is_running(
+        self, mock_rank_service, mock_activity_service, mocker
+    ):
+        """デイリータスクの実行中は、ランクのローリング更新をスキップするか"""
+        lease_repo = mocker.Mock()
+        lease_repo.is_held.return_value = True
+        service = ScheduledTaskService(
+            mock_rank_service, mock_activity_service, job_lease_repo=lease_repo
+        )
+
+        ran = await service.run_rank_refresh_tick([mocker.Mock()])
+
+        assert ran is False
+        lease_repo.is_held.assert_called_once_with("daily")
+        mock_rank_service.refresh_rank_slice.assert_not_awaited()
+
+    async def test_recruitment_archive_runs_in_batches(
+        self, mock_rank_service, mock_activity_service, mocker
+    ):
+        """終了からN日経った募集を、移動件数がバッチサイズを下回るまで繰り返し移すか"""
+        recruitment_repo = mocker.Mock()
+        recruitment_repo.archive_finished_recruitments.side_effect = [2, 2, 1]
+        service = ScheduledTaskService(
+            mock_rank_service,
+            mock_activity_service,
+            recruitment_repo=recruitment_repo,
+            archive_after_days=30,
+            archive_batch_size=2,
+        )
+        now = datetime(2024, 7, 31, tzinfo=timezone.utc)
+
+        ran = await service.run_recruitment_archive(now)
+
+        assert ran is True
+        assert recruitment_repo.archive_finished_recruitments.call_count == 3
+        recruitment_repo.archive_finished_recruitments.assert_called_with(
+            now - timedelta(days=30), 2
+        )
+
+    async def test_recruitment_archive_skipped_when_lease_is_held(
+        self, mock_rank_service, mock_activity_service, mocker
+    ):
+        """他のプロセスがリースを保持している場合、アーカイブを実行しないか"""
+        lease_repo = mocker.Mock()
+        lease_repo.try_acquire.return_value = False
+        recruitment_repo = mocker.Mock()
+        service = ScheduledTaskService(
+            mock_rank_service,
+            mock_activity_service,
+            job_lease_repo=lease_repo,
+            recruitment_repo=recruitment_repo,
+        )
+
+        ran = await service.run_recruitment_archive()
+
+        assert ran is False
+        recruitment_repo.archive_finished_recruitments.assert_not_called()
@@ -0,0 +1,68 @@
+# tests/services/test_task_checkpoint.py
+
+import pytest
+from datetime import datetime, timezone
+from uuid import uuid4
+
+# テスト対象のクラスをインポート
+from db.task_run_repository import TaskRun
+from services.task_checkpoint import PhaseCheckpoint, TaskCheckpointStore
+
+
+def make_task_run(cursor=None, status="running"):
+    now = datetime.now(timezone.utc)
+    return TaskRun(
+        id=uuid4(),
+        run_id="daily:2024-01-01",
+        phase="rank",
+        cursor=cursor,
+        status=status,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.mark.asyncio
+class TestTaskCheckpoint:
+    """TaskCheckpointStore / PhaseCheckpoint のテストクラス"""
+
+    @pytest.fixture
+    def mock_repo(self, mocker):
+        return mocker.Mock()
+
+    async def test_resume_skips_processed_users(self, mock_repo):
+        """前回のカーソル以下のユーザーがスキップされるか"""
+        mock_repo.get_or_create_task_run.return_value = make_task_run(cursor="200")
+        store = TaskCheckpointStore(mock_repo, "daily:2024-01-01")
+
+        checkpoint = await store.phase("rank")
+
+        assert checkpoint.should_skip(100)
+        assert checkpoint.should_skip(200)
+        assert not checkpoint.should_skip(300)
+
+    async def test_completed_phase_skips_everything(self, mock_repo):
+        """完了済みのフェーズは全ユーザーがスキップされるか"""
+        mock_repo.get_or_create_task_run.return_value = make_task_run(
+            status="completed"
+        )
+        store = TaskCheckpointStore(mock_repo, "daily:2024-01-01")
+
+        checkpoint = await store.phase("rank")
+
+        assert checkpoint.completed
+        assert checkpoint.should_skip(1)
+
+    async def test_cursor_is_flushed_in_batches(self, mock_repo):
+        """カーソルがbatch_size件ごとにまとめてDBへ記録されるか"""
+        checkpoint = PhaseCheckpoint(mock_repo, "run", "rank", batch_size=2)
+
+        await checkpoint.advance(1)
+        mock_repo.update_cursor.assert_not_called()
+        await checkpoint.advance(2)
+        mock_repo.update_cursor.assert_called_once_with("run", "rank", "2")
+
+        await checkpoint.advance(3)
+        await checkpoint.complete()
+        mock_repo.update_cursor.assert_called_with("run", "rank", "3")
+        mock_repo.mark_completed.assert_called_once_with("run", "rank")
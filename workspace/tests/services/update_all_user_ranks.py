@@ -6,6 +6,8 @@ from uuid import uuid4
 from datetime import datetime
 
 # テスト対象のクラスをインポート
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from services.role_registry import RoleRegistry
 from services.rank_service import RankService
 from db.user_repository import User
 
@@ -30,7 +32,12 @@ class TestRankService:
     @pytest.fixture
     def service(self, mock_user_repo, mock_riot_client) -> RankService:
         """テスト対象のRankServiceインスタンス"""
-        return RankService(user_repo=mock_user_repo, riot_client=mock_riot_client)
+        return RankService(
+            user_repo=mock_user_repo,
+            riot_client=mock_riot_client,
+            role_registry=RoleRegistry(),
+            write_governor=DiscordWriteGovernor(),
+        )
 
     def _create_mock_member(self, mocker, id: str, roles=None):
         """メンバーのモックを作成するヘルパー関数"""
@@ -0,0 +1,71 @@
+# tests/views/test_embed_update_coalescer.py
+
+import asyncio
+import discord
+import pytest
+from unittest.mock import AsyncMock
+
+# テスト対象のクラスをインポート
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from views.embed_update_coalescer import EmbedUpdateCoalescer
+
+
+def make_message(mocker, embed: discord.Embed):
+    message = mocker.Mock()
+    message.id = 123
+    message.channel.id = 456
+    message.embeds = [embed]
+    message.components = []
+    message.edit = AsyncMock()
+    return message
+
+
+def render_count(count: int):
+    embed = discord.Embed(title="募集")
+    embed.add_field(name="参加者", value=str(count))
+    return embed, discord.ui.View()
+
+
+@pytest.mark.asyncio
+class TestEmbedUpdateCoalescer:
+    """EmbedUpdateCoalescerのテストクラス"""
+
+    @pytest.fixture
+    def coalescer(self):
+        return EmbedUpdateCoalescer(DiscordWriteGovernor(), interval=0.05)
+
+    async def test_burst_is_coalesced_into_latest_state(self, coalescer, mocker):
+        """連続した更新が最新の状態での1回の編集にまとめられるか"""
+        message = make_message(mocker, render_count(0)[0])
+
+        for count in range(1, 11):
+            coalescer.request(message, lambda count=count: render_count(count))
+        await asyncio.sleep(0.02)
+
+        message.edit.assert_awaited_once()
+        edited_embed = message.edit.call_args.kwargs["embed"]
+        assert edited_embed.fields[0].value == "10"
+        assert coalescer.metrics()["coalesced"] == 9
+
+    async def test_edits_at_most_once_per_interval(self, coalescer, mocker):
+        """前回の編集からinterval秒経つまで次の編集を待つか"""
+        message = make_message(mocker, render_count(0)[0])
+
+        coalescer.request(message, lambda: render_count(1))
+        await asyncio.sleep(0.01)
+        coalescer.request(message, lambda: render_count(2))
+        await asyncio.sleep(0.01)
+        assert message.edit.await_count == 1
+
+        await asyncio.sleep(0.08)
+        assert message.edit.await_count == 2
+
+    async def test_unchanged_render_is_skipped(self, coalescer, mocker):
+        """描画結果がメッセージの内容と同じ場合は編集しないか"""
+        message = make_message(mocker, render_count(3)[0])
+
+        coalescer.request(message, lambda: render_count(3))
+        await asyncio.sleep(0.02)
+
+        message.edit.assert_not_awaited()
+        assert coalescer.metrics()["skipped"] == 1
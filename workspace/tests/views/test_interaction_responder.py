@@ -0,0 +1,110 @@
+# tests/views/test_interaction_responder.py
+
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock
+
+from api_clients.discord_write_governor import DiscordWriteGovernor
+
+# テスト対象のクラスをインポート
+from views.interaction_responder import (
+    BUSY_MESSAGE,
+    ERROR_MESSAGE,
+    InteractionResponder,
+)
+
+
+@pytest.fixture
+def interaction(mocker):
+    """discord.Interactionのモック"""
+    interaction = mocker.Mock()
+    interaction.response.defer = AsyncMock()
+    interaction.response.send_modal = AsyncMock()
+    interaction.response.send_message = AsyncMock()
+    interaction.edit_original_response = AsyncMock()
+    return interaction
+
+
+@pytest.mark.asyncio
+class TestInteractionResponder:
+    """先に応答してから処理するラッパーのテストクラス"""
+
+    async def test_defers_before_work_and_edits_result(self, interaction):
+        """処理より前にdeferし、結果で元の応答を編集するか"""
+        responder = InteractionResponder()
+
+        async def work():
+            interaction.response.defer.assert_awaited_once_with(
+                ephemeral=True, thinking=True
+            )
+            await asyncio.sleep(0.05)
+            return "参加しました。"
+
+        await responder.run(interaction, "recruitment_join", work)
+
+        interaction.edit_original_response.assert_awaited_once_with(
+            content="参加しました。"
+        )
+        stats = responder.metrics()["recruitment_join"]
+        assert stats["count"] == 1
+        assert stats["ack_max_ms"] < 50 <= stats["full_max_ms"]
+
+    async def test_responses_use_interaction_priority(self, interaction):
+        """応答の書き込みが最優先(INTERACTION)で書き込み調停に通されるか"""
+        governor = DiscordWriteGovernor()
+        responder = InteractionResponder(governor)
+
+        async def work():
+            return "参加しました。"
+
+        await responder.run(interaction, "recruitment_join", work)
+
+        assert governor.metrics()["completed"]["INTERACTION"] == 2
+        interaction.edit_original_response.assert_awaited_once()
+
+    async def test_error_is_reported_to_user(self, interaction):
+        """処理中の例外はエラーメッセージで応答を編集し、回数を記録するか"""
+        responder = InteractionResponder()
+
+        async def work():
+            raise RuntimeError("db down")
+
+        await responder.run(interaction, "recruitment_leave", work)
+
+        interaction.edit_original_response.assert_awaited_once_with(
+            content=ERROR_MESSAGE
+        )
+        assert responder.metrics()["recruitment_leave"]["errors"] == 1
+
+    async def test_modal_lookup_over_budget_returns_busy(self, interaction):
+        """モーダル前の取得が時間内に終わらない場合、混雑している旨を返すか"""
+        responder = InteractionResponder(modal_budget_seconds=0.01)
+
+        await responder.send_modal(
+            interaction,
+            "recruitment_edit",
+            lambda: time.sleep(0.1),
+            lambda _: "unreachable",
+        )
+
+        interaction.response.send_modal.assert_not_awaited()
+        interaction.response.send_message.assert_awaited_once_with(
+            BUSY_MESSAGE, ephemeral=True
+        )
+
+    async def test_modal_uses_cached_result_without_lookup(self, interaction, mocker):
+        """キャッシュから取得済みの場合、スレッドでのlookupを実行しないか"""
+        responder = InteractionResponder()
+        lookup = mocker.Mock()
+        build = mocker.Mock(return_value="built")
+
+        await responder.send_modal(
+            interaction, "recruitment_edit", lookup, build, cached="recruitment"
+        )
+
+        lookup.assert_not_called()
+        build.assert_called_once_with("recruitment")
+        interaction.response.send_message.assert_awaited_once_with(
+            "built", ephemeral=True
+        )
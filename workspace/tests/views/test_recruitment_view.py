@@ -0,0 +1,280 @@
+# tests/views/test_recruitment_view.py
+
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from api_clients.discord_write_governor import DiscordWriteGovernor
+
+# テスト対象のクラスをインポート
+from db.participant_repository import ParticipantRepository
+from db.recruitment_repository import Recruitment, RecruitmentRepository
+from services.interaction_dedupe import InteractionDeduplicator
+from services.recruitment_service import CREATING_MESSAGE, RecruitmentService
+from views.recruitment_view import (
+    JoinRecruitmentButton,
+    LeaveRecruitmentButton,
+    RecruitmentButtonHandler,
+    RecruitmentView,
+)
+
+RECRUITMENT_ID = uuid4()
+
+
+def make_recruitment(**updates):
+    recruitment = Recruitment(
+        id=RECRUITMENT_ID,
+        message_id="msg_123",
+        channel_id="channel_123",
+        guild_id="guild_123",
+        creator_id="creator_456",
+        party_type="フルパ",
+        max_participants=2,
+        status="open",
+        deadline=datetime.now(),
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    return recruitment.model_copy(update=updates)
+
+
+@pytest.mark.asyncio
+class TestRecruitmentButtons:
+    """募集IDを埋め込んだボタンのテストクラス"""
+
+    async def test_custom_id_round_trip(self):
+        """custom_idから募集IDが復元できるか"""
+        view = RecruitmentView(RECRUITMENT_ID)
+        join, leave = view.children
+
+        for item, cls in [
+            (join, JoinRecruitmentButton),
+            (leave, LeaveRecruitmentButton),
+        ]:
+            match = item.template.fullmatch(item.custom_id)
+            assert isinstance(item, cls)
+            restored = await cls.from_custom_id(None, item.item, match)
+            assert restored.recruitment_id == RECRUITMENT_ID
+
+    async def test_join_uses_recruitment_id_without_message_lookup(self, mocker):
+        """ボタンの募集IDで処理し、メッセージIDから募集を探さないか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment()
+        service.join_recruitment = AsyncMock(return_value=(True, "参加しました。"))
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), embed_coalescer=mocker.Mock()
+        )
+        interaction = mocker.Mock()
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+
+        service.get_recruitment.assert_called_once_with(
+            RECRUITMENT_ID, service.new_context.return_value
+        )
+        service.get_recruitment_by_message_id.assert_not_called()
+        handler.embed_coalescer.request.assert_called_once()
+        interaction.edit_original_response.assert_awaited_once_with(
+            content="参加しました。"
+        )
+
+    async def test_render_disables_join_when_full(self, mocker):
+        """満員の場合に参加ボタンだけが無効化されるか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment()
+        service.get_participant_ids.return_value = ["user_1", "user_2"]
+        handler = RecruitmentButtonHandler(service, DiscordWriteGovernor())
+
+        embed, view = handler.render(RECRUITMENT_ID)
+
+        join, leave = view.children
+        assert join.item.disabled is True
+        assert leave.item.disabled is False
+        assert embed.fields[2].value == "満員"
+
+    async def test_render_uses_edited_recruitment(self, mocker):
+        """押された時点のメッセージではなく、編集後の募集情報からEmbedを作り直すか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment(
+            party_type="デュオ", max_participants=3
+        )
+        service.get_participant_ids.return_value = ["user_1"]
+        handler = RecruitmentButtonHandler(service, DiscordWriteGovernor())
+
+        embed, view = handler.render(RECRUITMENT_ID)
+
+        assert embed.title == "【募集中】VALORANT @3"
+        assert "デュオ" in embed.description
+        assert embed.fields[2].value == "あと 2人"
+        assert view.children[0].item.disabled is False
+
+    async def test_render_skips_closed_recruitment(self, mocker):
+        """終了した募集は再描画しないか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment(status="closed")
+        handler = RecruitmentButtonHandler(service, DiscordWriteGovernor())
+
+        assert handler.render(RECRUITMENT_ID) is None
+
+    async def test_join_and_render_read_budget(self, mocker):
+        """参加ボタン1回と、その後の描画で募集と参加者をDBから1回ずつしか読み取らないか"""
+        tables = {name: mocker.MagicMock() for name in ("recruitments", "participants")}
+        db = mocker.Mock()
+        db.table.side_effect = tables.__getitem__
+        recruitment_select = tables["recruitments"].select
+        recruitment_query = recruitment_select.return_value.eq.return_value.limit
+        recruitment_query.return_value.execute.return_value.data = [
+            make_recruitment().model_dump(mode="json")
+        ]
+        participant_select = tables["participants"].select
+        participant_query = participant_select.return_value.eq.return_value
+        participant_query.execute.return_value.data = []
+
+        recruitment_repo = RecruitmentRepository(db)
+        participant_repo = ParticipantRepository(db)
+        get_recruitment = mocker.spy(recruitment_repo, "get_recruitment_by_id")
+        get_participants = mocker.spy(
+            participant_repo, "get_participants_by_recruitment_id"
+        )
+        service = RecruitmentService(
+            recruitment_repo=recruitment_repo,
+            participant_repo=participant_repo,
+            activity_log_repo=mocker.Mock(),
+        )
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), embed_coalescer=mocker.Mock()
+        )
+        interaction = mocker.Mock()
+        interaction.user.id = "user_1"
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+
+        # 操作中は同じコンテキストで使い回し、Repositoryを1回ずつしか呼ばない
+        assert get_recruitment.call_count == 1
+        assert get_participants.call_count == 1
+        assert recruitment_select.call_count == 1
+        assert participant_select.call_count == 1
+
+        # まとめて行われる描画は新しいコンテキストで読み直すが、DBには問い合わせない
+        _, render = handler.embed_coalescer.request.call_args.args
+        embed, view = render()
+
+        assert get_recruitment.call_count == 2
+        assert get_participants.call_count == 2
+        assert recruitment_select.call_count == 1
+        assert participant_select.call_count == 1
+        assert embed.fields[3].value == "<@user_1>"
+        assert not view.children[0].item.disabled
+
+    async def test_deferred_render_sees_later_cancel(self, mocker):
+        """参加から描画までの間にキャンセルされた場合、募集中の表示で上書きしないか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment()
+        service.join_recruitment = AsyncMock(return_value=(True, "参加しました。"))
+        service.new_context.side_effect = lambda: mocker.Mock()
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), embed_coalescer=mocker.Mock()
+        )
+        interaction = mocker.Mock()
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+        service.get_recruitment.return_value = make_recruitment(status="cancelled")
+        _, render = handler.embed_coalescer.request.call_args.args
+
+        assert render() is None
+        # 描画は操作時とは別のコンテキストで読み直す
+        click_ctx = service.get_recruitment.call_args_list[0].args[1]
+        render_ctx = service.get_recruitment.call_args_list[1].args[1]
+        assert click_ctx is not render_ctx
+
+    async def test_legacy_click_swaps_buttons_even_when_rejected(self, mocker):
+        """移行前のボタンは、操作が失敗した場合でも押された時点で新しいボタンに置き換えるか"""
+        service = mocker.Mock()
+        service.get_recruitment_by_message_id.return_value = make_recruitment()
+        service.join_recruitment = AsyncMock(return_value=(False, "既に参加しています。"))
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), embed_coalescer=mocker.Mock()
+        )
+        interaction = mocker.Mock()
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction)
+
+        message, _ = handler.embed_coalescer.request.call_args.args
+        assert message is interaction.message
+        interaction.edit_original_response.assert_awaited_once_with(
+            content="既に参加しています。"
+        )
+
+    async def test_rejected_click_does_not_edit_message(self, mocker):
+        """新しいボタンで操作が失敗した場合は、メッセージを編集しないか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = make_recruitment()
+        service.join_recruitment = AsyncMock(return_value=(False, "既に参加しています。"))
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), embed_coalescer=mocker.Mock()
+        )
+        interaction = mocker.Mock()
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+
+        handler.embed_coalescer.request.assert_not_called()
+
+    async def test_rate_limited_click_skips_work(self, mocker):
+        """実行頻度の上限を超えたクリックは、処理せずに本人にだけ応答するか"""
+        service = mocker.Mock()
+        rate_limiter = mocker.Mock()
+        rate_limiter.hit.return_value = 3.0
+        handler = RecruitmentButtonHandler(
+            service, DiscordWriteGovernor(), rate_limiter=rate_limiter
+        )
+        interaction = mocker.Mock()
+        interaction.response.send_message = AsyncMock()
+        interaction.response.defer = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+
+        rate_limiter.hit.assert_called_once_with(
+            interaction.user.id, "recruitment_join"
+        )
+        interaction.response.defer.assert_not_awaited()
+        service.get_recruitment.assert_not_called()
+        assert interaction.response.send_message.await_args.kwargs["ephemeral"]
+
+    async def test_click_while_being_created_asks_to_retry(self, mocker):
+        """保存が終わる前の募集のボタンは、終了扱いにせず作成中である旨を返すか"""
+        service = mocker.Mock()
+        service.get_recruitment.return_value = None
+        service.is_being_created.return_value = True
+        service.join_recruitment = AsyncMock()
+        handler = RecruitmentButtonHandler(
+            service,
+            DiscordWriteGovernor(),
+            embed_coalescer=mocker.Mock(),
+            deduplicator=InteractionDeduplicator(),
+        )
+        interaction = mocker.Mock()
+        interaction.response.defer = AsyncMock()
+        interaction.edit_original_response = AsyncMock()
+
+        await handler.join(interaction, RECRUITMENT_ID)
+        interaction.edit_original_response.assert_awaited_once_with(
+            content=CREATING_MESSAGE
+        )
+        service.join_recruitment.assert_not_awaited()
+
+        # 保存後の再試行は、作成中の応答を使い回さずに実行される
+        service.get_recruitment.return_value = make_recruitment()
+        service.is_being_created.return_value = False
+        service.join_recruitment.return_value = (True, "参加しました。")
+        await handler.join(interaction, RECRUITMENT_ID)
+        service.join_recruitment.assert_awaited_once()
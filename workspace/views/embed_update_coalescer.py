@@ -0,0 +1,133 @@
+# views/embed_update_coalescer.py
+import asyncio
+from typing import Callable, Dict, Optional, Tuple
+
+import discord
+
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    channel_bucket,
+)
+
+# 最新の状態からEmbedとViewを組み立てる関数。Noneを返した場合は編集しない (募集終了後など)
+RenderFunc = Callable[[], Optional[Tuple[discord.Embed, discord.ui.View]]]
+
+
+def _view_signature(view: discord.ui.View) -> tuple:
+    # DynamicItemは中身のボタンの状態で比較する
+    items = [getattr(item, "item", item) for item in view.children]
+    return tuple(
+        (getattr(item, "custom_id", None), getattr(item, "disabled", None))
+        for item in items
+    )
+
+
+def _message_signature(message: discord.Message) -> tuple:
+    embed = message.embeds[0].to_dict() if message.embeds else None
+    components = tuple(
+        (getattr(child, "custom_id", None), getattr(child, "disabled", None))
+        for row in message.components
+        for child in getattr(row, "children", [])
+    )
+    return embed, components
+
+
+class _PendingUpdate:
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.render: Optional[RenderFunc] = None
+        self.task: Optional[asyncio.Task] = None
+        self.last_edit: float = float("-inf")
+        # 最後にメッセージへ反映した内容 (変化が無ければ編集しない)
+        self.signature = _message_signature(message)
+
+
+class EmbedUpdateCoalescer:
+    """
+    募集メッセージのEmbed更新をまとめるクラス
+
+    参加・取消のたびに編集するのではなく、メッセージを「更新が必要」とマークし、
+    メッセージごとに最大でinterval秒に1回、その時点の最新の状態から描画して編集する。
+    描画結果が前回の編集内容と同じ場合は編集しない。
+    """
+
+    # 保持するメッセージ数の上限 (超えた場合は待機中でないものから破棄する)
+    MAX_ENTRIES = 1000
+
+    def __init__(self, write_governor: DiscordWriteGovernor, interval: float = 1.0):
+        self.write_governor = write_governor
+        self.interval = interval
+        self._pending: Dict[int, _PendingUpdate] = {}
+
+        # メトリクス
+        self.requested = 0
+        self.coalesced = 0
+        self.edits = 0
+        self.skipped = 0
+
+    def request(self, message: discord.Message, render: RenderFunc):
+        """
+        メッセージの再描画を予約する。予約済みの場合は描画関数だけを差し替える
+        """
+        self.requested += 1
+        entry = self._pending.get(message.id)
+        if entry is None:
+            self._prune()
+            entry = self._pending[message.id] = _PendingUpdate(message)
+        entry.message = message
+        entry.render = render
+
+        if entry.task is not None:
+            self.coalesced += 1
+            return
+        entry.task = asyncio.create_task(self._flush_later(entry))
+
+    async def _flush_later(self, entry: _PendingUpdate):
+        loop = asyncio.get_running_loop()
+        delay = entry.last_edit + self.interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # 描画・編集中に届いた更新は、次の周期でまとめて反映する
+        entry.task = None
+        try:
+            rendered = entry.render()
+        except Exception as e:
+            print(f"Failed to render message {entry.message.id}: {e!r}")
+            return
+        if rendered is None:
+            return
+        embed, view = rendered
+        signature = (embed.to_dict(), _view_signature(view))
+        if signature == entry.signature:
+            self.skipped += 1
+            return
+
+        entry.last_edit = loop.time()
+        message = entry.message
+        try:
+            await self.write_governor.submit(
+                WritePriority.EMBED_EDIT,
+                channel_bucket(message.channel.id),
+                lambda: message.edit(embed=embed, view=view),
+            )
+        except Exception as e:
+            print(f"Failed to edit message {message.id}: {e!r}")
+            return
+        entry.signature = signature
+        self.edits += 1
+
+    def _prune(self):
+        if len(self._pending) < self.MAX_ENTRIES:
+            return
+        for message_id in [k for k, v in self._pending.items() if v.task is None]:
+            del self._pending[message_id]
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "edits": self.edits,
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,195 @@
+# views/interaction_responder.py
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import discord
+
+from api_clients.discord_write_governor import (
+    DiscordWriteGovernor,
+    WritePriority,
+    interaction_bucket,
+)
+
+# 処理中に例外が発生した場合にユーザーへ返すメッセージ
+ERROR_MESSAGE = "処理中にエラーが発生しました。時間をおいて再度お試しください。"
+# モーダルを開く前の準備が間に合わなかった場合のメッセージ
+BUSY_MESSAGE = "現在混み合っています。少し待ってから再度お試しください。"
+
+# ユーザーの実行頻度が上限を超えた場合のメッセージ
+RATE_LIMITED_MESSAGE = "操作が多すぎます。{retry_after:.0f}秒ほど待ってから再度お試しください。"
+
+# 取得結果からモーダルか、代わりに返すメッセージを組み立てる関数
+ModalBuilder = Callable[[Any], Union[discord.ui.Modal, str]]
+
+
+class _LatencyStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ack = 0.0
+        self.max_ack = 0.0
+        self.total_full = 0.0
+        self.max_full = 0.0
+        self.slo_misses = 0
+        self.errors = 0
+        self.expired = 0
+
+    def record(self, ack: float, full: float, slo: float):
+        self.count += 1
+        self.total_ack += ack
+        self.max_ack = max(self.max_ack, ack)
+        self.total_full += full
+        self.max_full = max(self.max_full, full)
+        if ack > slo:
+            self.slo_misses += 1
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "ack_avg_ms": (self.total_ack / self.count * 1000) if self.count else 0.0,
+            "ack_max_ms": self.max_ack * 1000,
+            "full_avg_ms": (self.total_full / self.count * 1000) if self.count else 0.0,
+            "full_max_ms": self.max_full * 1000,
+            "slo_misses": self.slo_misses,
+            "errors": self.errors,
+            "expired": self.expired,
+        }
+
+
+async def send_rate_limited(interaction: discord.Interaction, retry_after: float):
+    """
+    実行頻度の上限を超えたユーザーに、DB等に触れずに本人にだけ見える応答を返す
+    """
+    try:
+        await interaction.response.send_message(
+            RATE_LIMITED_MESSAGE.format(retry_after=max(1.0, retry_after)),
+            ephemeral=True,
+        )
+    except (discord.NotFound, discord.InteractionResponded):
+        pass
+
+
+class InteractionResponder:
+    """
+    インタラクションに先に応答(defer)してから処理を行い、結果で元の応答を編集するクラス
+
+    Discordはインタラクションに3秒以内の応答を求めるため、DBアクセスなどの処理より前に
+    応答を返す。応答までの時間(ack)と結果を返すまでの時間(full)は操作ごとに別々に記録する。
+    """
+
+    def __init__(
+        self,
+        write_governor: Optional[DiscordWriteGovernor] = None,
+        slo_seconds: float = 3.0,
+        modal_budget_seconds: float = 2.0,
+    ):
+        # 指定された場合、応答は最優先(INTERACTION)で書き込み調停に通す
+        self.write_governor = write_governor
+        # 応答までの目標時間 (超えた回数をslo_missesとして数える)
+        self.slo_seconds = slo_seconds
+        # モーダルは応答そのものなので、開く前の準備はこの時間内に終える
+        self.modal_budget_seconds = modal_budget_seconds
+        self._stats: Dict[str, _LatencyStats] = {}
+
+    def _stats_for(self, action: str) -> _LatencyStats:
+        return self._stats.setdefault(action, _LatencyStats())
+
+    async def _write(
+        self, interaction: discord.Interaction, factory: Callable[[], Awaitable[Any]]
+    ):
+        if self.write_governor is None:
+            return await factory()
+        return await self.write_governor.submit(
+            WritePriority.INTERACTION, interaction_bucket(interaction.id), factory
+        )
+
+    async def run(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        work: Callable[[], Awaitable[Optional[str]]],
+    ):
+        """
+        応答してからworkを実行し、返されたメッセージで元の応答(考え中の表示)を編集する
+        """
+        started = time.perf_counter()
+        stats = self._stats_for(action)
+        try:
+            await self._write(
+                interaction,
+                lambda: interaction.response.defer(ephemeral=True, thinking=True),
+            )
+        except (discord.NotFound, discord.InteractionResponded) as e:
+            # 応答期限切れ・応答済みの場合は、ユーザーには失敗と表示されているため処理しない
+            stats.expired += 1
+            print(f"Failed to acknowledge interaction for {action}: {e!r}")
+            return
+        ack = time.perf_counter() - started
+
+        try:
+            message = await work()
+        except Exception as e:
+            stats.errors += 1
+            print(f"Error while handling {action}: {e!r}")
+            message = ERROR_MESSAGE
+
+        try:
+            await self._write(
+                interaction,
+                lambda: interaction.edit_original_response(
+                    content=message or "完了しました。"
+                ),
+            )
+        except discord.HTTPException as e:
+            print(f"Failed to send result for {action}: {e!r}")
+        stats.record(ack, time.perf_counter() - started, self.slo_seconds)
+
+    async def send_modal(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        lookup: Callable[[], Any],
+        build: ModalBuilder,
+        cached: Any = None,
+    ):
+        """
+        モーダルを開く。モーダルは defer の後に送れないため、lookup (DBアクセス) をスレッドで実行し、
+        modal_budget_seconds 以内に終わらなければ混雑している旨を返す
+        cached (イベントループ上でキャッシュから取得した結果) がある場合はlookupを実行しない
+        """
+        started = time.perf_counter()
+        stats = self._stats_for(action)
+        try:
+            if cached is not None:
+                found = cached
+            else:
+                found = await asyncio.wait_for(
+                    asyncio.to_thread(lookup), timeout=self.modal_budget_seconds
+                )
+            result = build(found)
+        except asyncio.TimeoutError:
+            result = BUSY_MESSAGE
+        except Exception as e:
+            stats.errors += 1
+            print(f"Error while preparing {action}: {e!r}")
+            result = ERROR_MESSAGE
+
+        try:
+            if isinstance(result, discord.ui.Modal):
+                await self._write(
+                    interaction, lambda: interaction.response.send_modal(result)
+                )
+            else:
+                await self._write(
+                    interaction,
+                    lambda: interaction.response.send_message(result, ephemeral=True),
+                )
+        except (discord.NotFound, discord.InteractionResponded) as e:
+            stats.expired += 1
+            print(f"Failed to acknowledge interaction for {action}: {e!r}")
+            return
+        elapsed = time.perf_counter() - started
+        stats.record(elapsed, elapsed, self.slo_seconds)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {action: stats.as_dict() for action, stats in self._stats.items()}
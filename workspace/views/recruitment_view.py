@@ -1,64 +1,307 @@
 # views/recruitment_view.py
-from typing import List
+import re
+from functools import partial
+from typing import Awaitable, Callable, List, Optional, Tuple
+from uuid import UUID
+
 import discord
 
-from services.recruitment_service import RecruitmentService
-from db.recruitment_repository import Recruitment
-from db.participant_repository import Participant
+from api_clients.discord_write_governor import DiscordWriteGovernor
+from services.interaction_dedupe import InteractionDeduplicator
+from services.rate_limiter import UserRateLimiter
+from services.recruitment_context import RecruitmentReadContext
+from services.recruitment_service import (
+    BUSY_MESSAGE,
+    CLOSED_MESSAGE,
+    CREATING_MESSAGE,
+    RecruitmentService,
+)
+from views.embed_update_coalescer import EmbedUpdateCoalescer
+from views.interaction_responder import InteractionResponder, send_rate_limited
 
+# custom_idに埋め込む募集ID (UUID) の正規表現
+_UUID_PATTERN = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
 
-class RecruitmentView(discord.ui.View):
-    def __init__(self, recruitment_service: RecruitmentService):
-        # timeout=NoneでViewを永続化する
-        super().__init__(timeout=None)
+
+def build_recruitment_embed(
+    recruitment: dict, participant_ids: List[str]
+) -> discord.Embed:
+    """
+    募集情報と参加者IDから募集中の募集のEmbedを組み立てる
+    """
+    # メンションはIDだけで組み立てられるため、ユーザー情報は取得しない
+    participant_mentions = [f"<@{user_id}>" for user_id in participant_ids]
+    remaining_count = recruitment["max_participants"] - len(participant_ids)
+
+    embed = discord.Embed(
+        title=f"【募集中】VALORANT @{recruitment['max_participants']}",
+        description=f"**{recruitment['party_type']}** で参加者を募集しています！",
+        color=discord.Color.green(),
+    )
+    embed.add_field(
+        name="募集主", value=f"<@{recruitment['creator_id']}>", inline=False
+    )
+    embed.add_field(
+        name="締切",
+        value=f"<t:{int(recruitment['deadline'].timestamp())}:R>",
+        inline=False,
+    )
+    embed.add_field(
+        name="残り人数",
+        value=f"あと {remaining_count}人" if remaining_count > 0 else "満員",
+        inline=False,
+    )
+    embed.add_field(
+        name=f"現在の参加者 ({len(participant_ids)}/{recruitment['max_participants']})",
+        value=", ".join(participant_mentions)
+        if participant_mentions
+        else "まだいません",
+        inline=False,
+    )
+    embed.set_footer(text=f"Recruitment ID | {recruitment['id']}")
+    return embed
+
+
+class RecruitmentButtonHandler:
+    """
+    募集メッセージのボタン操作を処理するクラス
+    ボタンはcustom_idから募集IDを受け取るため、メッセージやEmbedから募集を探さない
+    """
+
+    def __init__(
+        self,
+        recruitment_service: RecruitmentService,
+        write_governor: DiscordWriteGovernor,
+        embed_coalescer: Optional[EmbedUpdateCoalescer] = None,
+        responder: Optional[InteractionResponder] = None,
+        rate_limiter: Optional[UserRateLimiter] = None,
+        deduplicator: Optional[InteractionDeduplicator] = None,
+    ):
         self.recruitment_service = recruitment_service
+        self.write_governor = write_governor
+        self.embed_coalescer = embed_coalescer or EmbedUpdateCoalescer(
+            self.write_governor
+        )
+        self.responder = responder or InteractionResponder(self.write_governor)
+        self.rate_limiter = rate_limiter
+        self.deduplicator = deduplicator
+
+    async def _allow(self, interaction: discord.Interaction, action: str) -> bool:
+        if self.rate_limiter is None:
+            return True
+        retry_after = self.rate_limiter.hit(interaction.user.id, action)
+        if retry_after:
+            await send_rate_limited(interaction, retry_after)
+            return False
+        return True
 
-    async def _update_embed(
-        self, original_embed: discord.Embed, interaction: discord.Interaction
+    async def join(
+        self, interaction: discord.Interaction, recruitment_id: Optional[UUID] = None
     ):
         """
-        メッセージのEmbedを最新の状態に更新するヘルパー関数
+        参加ボタンの処理。recruitment_idが無い場合(移行前のボタン)はメッセージIDから募集を探す
         """
-        # custom_idからrecruitment_idを取得
-        recruitment_id = original_embed.footer.text.split(" | ")[1]
+        await self._handle(
+            interaction,
+            "recruitment_join",
+            recruitment_id,
+            self.recruitment_service.join_recruitment,
+        )
 
-        # 最新の参加者リストを取得
-        participants = self.recruitment_service.participant_repo.get_participants_by_recruitment_id(
-            recruitment_id
+    async def leave(
+        self, interaction: discord.Interaction, recruitment_id: Optional[UUID] = None
+    ):
+        """
+        参加取消ボタンの処理。recruitment_idが無い場合(移行前のボタン)はメッセージIDから募集を探す
+        """
+        await self._handle(
+            interaction,
+            "recruitment_leave",
+            recruitment_id,
+            self.recruitment_service.leave_recruitment,
         )
-        participant_mentions = [f"<@{p.user_id}>" for p in participants]
 
-        # 募集情報を取得
-        recruitment = (
-            self.recruitment_service.recruitment_repo.get_recruitment_by_message_id(
-                str(interaction.message.id)
+    async def _handle(
+        self,
+        interaction: discord.Interaction,
+        action: str,
+        recruitment_id: Optional[UUID],
+        operation: Callable[..., Awaitable[Tuple[bool, str]]],
+    ):
+        if not await self._allow(interaction, action):
+            return
+
+        async def work() -> str:
+            apply = partial(self._apply, interaction, recruitment_id, operation)
+            if self.deduplicator is None:
+                return await apply()
+            # ダブルクリック・再送は最初の操作の結果を返す
+            # (混雑・作成中で実行できなかった場合は、再試行で実行し直せるよう保持しない)
+            return await self.deduplicator.run(
+                interaction.user.id,
+                interaction.message.id,
+                action,
+                apply,
+                keep=lambda message: message not in (BUSY_MESSAGE, CREATING_MESSAGE),
             )
+
+        await self.responder.run(interaction, action, work)
+
+    async def _apply(
+        self,
+        interaction: discord.Interaction,
+        recruitment_id: Optional[UUID],
+        operation: Callable[..., Awaitable[Tuple[bool, str]]],
+    ) -> str:
+        # このインタラクションの間、募集と参加者の読み取り結果を使い回す
+        ctx = self.recruitment_service.new_context()
+        if recruitment_id is None:
+            recruitment = self.recruitment_service.get_recruitment_by_message_id(
+                str(interaction.message.id), ctx
+            )
+        else:
+            recruitment = self.recruitment_service.get_recruitment(recruitment_id, ctx)
+        # メッセージの送信直後で、まだDBに保存されていない募集
+        if (
+            not recruitment
+            and recruitment_id is not None
+            and self.recruitment_service.is_being_created(recruitment_id)
+        ):
+            return CREATING_MESSAGE
+        if not recruitment or recruitment.status != "open":
+            return CLOSED_MESSAGE
+
+        success, message = await operation(recruitment, interaction.user, ctx)
+        # 移行前のボタン(recruitment_idが無い)は、押された時点で新しいボタンに置き換える
+        if success or recruitment_id is None:
+            self._update_embed(interaction.message, recruitment.id)
+        return message
+
+    def render(
+        self,
+        recruitment_id: UUID,
+        ctx: Optional[RecruitmentReadContext] = None,
+    ) -> Optional[Tuple[discord.Embed, discord.ui.View]]:
+        """
+        最新の募集情報と参加者からEmbedとボタンの状態を組み立てる
+        (押された時点のメッセージは/editの前の内容のことがあるため、Embedは募集情報から作り直す)
+        """
+        ctx = ctx or self.recruitment_service.new_context()
+        recruitment = self.recruitment_service.get_recruitment(recruitment_id, ctx)
+        # 締切・キャンセル後は、それぞれの処理で編集済みのため上書きしない
+        if not recruitment or recruitment.status != "open":
+            return None
+
+        participant_ids = self.recruitment_service.get_participant_ids(
+            recruitment.id, ctx
         )
+        embed = build_recruitment_embed(recruitment.model_dump(), participant_ids)
+        # 満員の間は参加ボタンを無効化する
+        full = len(participant_ids) >= recruitment.max_participants
+        return embed, RecruitmentView(recruitment.id, full=full)
+
+    def _update_embed(self, message: discord.Message, recruitment_id: UUID):
+        """
+        メッセージのEmbedの更新を予約する
+        連続した参加・取消はまとめて、編集する時点の状態で1回だけ編集する
+        (編集までの間の/cancel・締切・/editを反映するため、操作時のコンテキストは使わない)
+        """
+        self.embed_coalescer.request(message, lambda: self.render(recruitment_id))
+
+
+def _handler(interaction: discord.Interaction) -> RecruitmentButtonHandler:
+    return interaction.client.recruitment_buttons
 
-        # 残り人数を更新
-        remaining_count = recruitment.max_participants - len(participants)
-        original_embed.set_field_at(
-            index=2,  # 「残り人数」フィールドを想定
-            name="残り人数",
-            value=f"あと {remaining_count}人" if remaining_count > 0 else "満員",
-            inline=False,
+
+class JoinRecruitmentButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=rf"recruitment:join:(?P<id>{_UUID_PATTERN})",
+):
+    """
+    「参加する」ボタン。custom_idに募集IDを埋め込む
+    """
+
+    def __init__(self, recruitment_id: UUID, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label="参加する",
+                style=discord.ButtonStyle.success,
+                custom_id=f"recruitment:join:{recruitment_id}",
+                disabled=disabled,
+            )
         )
+        self.recruitment_id = recruitment_id
+
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Button,
+        match: re.Match[str],
+    ):
+        return cls(UUID(match["id"]))
 
-        # 参加者リストを更新
-        original_embed.set_field_at(
-            index=3,  # 「参加者」フィールドを想定
-            name=f"参加者 ({len(participants)}/{recruitment.max_participants})",
-            value=", ".join(participant_mentions)
-            if participant_mentions
-            else "まだいません",
-            inline=False,
+    async def callback(self, interaction: discord.Interaction):
+        await _handler(interaction).join(interaction, self.recruitment_id)
+
+
+class LeaveRecruitmentButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=rf"recruitment:leave:(?P<id>{_UUID_PATTERN})",
+):
+    """
+    「参加を取り消す」ボタン。custom_idに募集IDを埋め込む
+    """
+
+    def __init__(self, recruitment_id: UUID, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label="参加を取り消す",
+                style=discord.ButtonStyle.danger,
+                custom_id=f"recruitment:leave:{recruitment_id}",
+                disabled=disabled,
+            )
         )
+        self.recruitment_id = recruitment_id
 
-        # 満員になったらボタンを無効化する
-        if remaining_count <= 0:
-            self.get_item("join_button").disabled = True
+    @classmethod
+    async def from_custom_id(
+        cls,
+        interaction: discord.Interaction,
+        item: discord.ui.Button,
+        match: re.Match[str],
+    ):
+        return cls(UUID(match["id"]))
 
-        await interaction.message.edit(embed=original_embed, view=self)
+    async def callback(self, interaction: discord.Interaction):
+        await _handler(interaction).leave(interaction, self.recruitment_id)
+
+
+class RecruitmentView(discord.ui.View):
+    """
+    募集メッセージに付けるボタン
+    ボタンの処理はBotに登録したDynamicItemが受け持つため、Viewは送信・編集時にのみ使う
+    """
+
+    def __init__(
+        self, recruitment_id: UUID, *, full: bool = False, closed: bool = False
+    ):
+        super().__init__(timeout=None)
+        self.add_item(JoinRecruitmentButton(recruitment_id, disabled=full or closed))
+        self.add_item(LeaveRecruitmentButton(recruitment_id, disabled=closed))
+
+
+class LegacyRecruitmentView(discord.ui.View):
+    """
+    募集IDを埋め込む前のボタン(固定のcustom_id)を処理する永続View
+    メッセージIDから募集を特定し、最初に押された時に新しいボタンへ置き換える
+    (移行前の募集はチャンネルIDを保存していないため、起動時には置き換えられない)
+    """
+
+    def __init__(self, handler: RecruitmentButtonHandler):
+        # timeout=NoneでViewを永続化する
+        super().__init__(timeout=None)
+        self.handler = handler
 
     @discord.ui.button(
         label="参加する",
@@ -68,27 +311,7 @@ class RecruitmentView(discord.ui.View):
     async def join_button(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        # custom_idではなく、Embedのフッターから募集IDを取得する方が確実
-        recruitment_id_str = interaction.message.embeds[0].footer.text.split(" | ")[1]
-        recruitment = (
-            self.recruitment_service.recruitment_repo.get_recruitment_by_message_id(
-                str(interaction.message.id)
-            )
-        )
-
-        if not recruitment:
-            await interaction.response.send_message(
-                "この募集は既に終了しているようです。", ephemeral=True
-            )
-            return
-
-        success, message = self.recruitment_service.join_recruitment(
-            recruitment, interaction.user
-        )
-
-        await interaction.response.send_message(message, ephemeral=True)
-        if success:
-            await self._update_embed(interaction.message.embeds[0], interaction)
+        await self.handler.join(interaction)
 
     @discord.ui.button(
         label="参加を取り消す",
@@ -98,22 +321,4 @@ class RecruitmentView(discord.ui.View):
     async def leave_button(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        recruitment = (
-            self.recruitment_service.recruitment_repo.get_recruitment_by_message_id(
-                str(interaction.message.id)
-            )
-        )
-
-        if not recruitment:
-            await interaction.response.send_message(
-                "この募集は既に終了しているようです。", ephemeral=True
-            )
-            return
-
-        success, message = self.recruitment_service.leave_recruitment(
-            recruitment, interaction.user
-        )
-
-        await interaction.response.send_message(message, ephemeral=True)
-        if success:
-            await self._update_embed(interaction.message.embeds[0], interaction)
+        await self.handler.leave(interaction)
@@ -1,7 +1,7 @@
 # web/server.py
 
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 
 from services.user_service import UserService
 
@@ -11,6 +11,12 @@ app = FastAPI()
 @app.on_event("startup")
 async def startup_event():
     app.state.user_service = None
+    app.state.write_governor = None
+    app.state.recruitment_locks = None
+    app.state.interaction_responder = None
+    app.state.dm_notifier = None
+    app.state.rate_limiter = None
+    app.state.interaction_dedupe = None
 
 
 @app.get("/oauth/callback/riot.txt", response_class=FileResponse)
@@ -18,6 +24,72 @@ async def get_riot_verification_file():
     return FileResponse("static/riot.txt", media_type="text/plain")
 
 
+@app.get("/metrics/discord-writes")
+async def discord_write_metrics(request: Request):
+    """
+    Discordへの書き込みキューの深さなどの統計情報を返すエンドポイント
+    """
+    write_governor = request.app.state.write_governor
+    if not write_governor:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(write_governor.metrics())
+
+
+@app.get("/metrics/recruitment-locks")
+async def recruitment_lock_metrics(request: Request):
+    """
+    募集ごとのロックの待ち時間・競合回数などの統計情報を返すエンドポイント
+    """
+    recruitment_locks = request.app.state.recruitment_locks
+    if not recruitment_locks:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(recruitment_locks.metrics())
+
+
+@app.get("/metrics/interactions")
+async def interaction_metrics(request: Request):
+    """
+    ボタン・コマンドの操作ごとの応答(ack)までの時間と完了までの時間を返すエンドポイント
+    """
+    interaction_responder = request.app.state.interaction_responder
+    if not interaction_responder:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(interaction_responder.metrics())
+
+
+@app.get("/metrics/dm-notifications")
+async def dm_notification_metrics(request: Request):
+    """
+    DM通知の送信成功・失敗数などの統計情報を返すエンドポイント
+    """
+    dm_notifier = request.app.state.dm_notifier
+    if not dm_notifier:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(dm_notifier.metrics())
+
+
+@app.get("/metrics/rate-limits")
+async def rate_limit_metrics(request: Request):
+    """
+    ユーザー単位の実行頻度の制限で許可・拒否した回数などを返すエンドポイント
+    """
+    rate_limiter = request.app.state.rate_limiter
+    if not rate_limiter:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(rate_limiter.metrics())
+
+
+@app.get("/metrics/interaction-dedupe")
+async def interaction_dedupe_metrics(request: Request):
+    """
+    ダブルクリック・再送としてまとめた募集ボタン操作の回数などを返すエンドポイント
+    """
+    interaction_dedupe = request.app.state.interaction_dedupe
+    if not interaction_dedupe:
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return JSONResponse(interaction_dedupe.metrics())
+
+
 @app.get("/oauth/callback", response_class=HTMLResponse)
 async def oauth_callback(request: Request, code: str, state: str):
     """